@@ -0,0 +1,140 @@
+"""
+Benchmark of memory taken by the elements of a grid.
+
+Compares objects with __dict__ and lists of links (as they were before slots)
+with slotted objects created from the grid's tables and with the tables alone.
+
+Usage: python benchmarks/bench_memory.py [points by axis]
+"""
+import os
+import sys
+import tracemalloc
+
+# The package is imported from the repository when the script is run by its path.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from triangular_grid_merge.grid import Grid
+
+
+class DictNode:
+    def __init__(self):
+        self.Id = None
+        self.x = None
+        self.y = None
+        self.faces = list()
+        self.edges = list()
+
+
+class DictEdge:
+    def __init__(self):
+        self.Id = None
+        self.nodes = list()
+        self.faces = list()
+
+
+class DictFace:
+    def __init__(self):
+        self.Id = None
+        self.nodes = list()
+        self.nodes_ids = list()
+        self.edges = list()
+
+
+def build_dict_objects(grid):
+    """
+    Create and link objects with __dict__ and lists from the grid's tables.
+
+    :param grid: Grid object.
+    :return: tuple of lists of nodes, edges and faces.
+    """
+    nodes = list()
+    for i, (x, y) in enumerate(grid.coordinates.tolist()):
+        n = DictNode()
+        n.Id, n.x, n.y = i, x, y
+        nodes.append(n)
+
+    faces = list()
+    for i, ids in enumerate(grid.face_nodes.tolist()):
+        f = DictFace()
+        f.Id = i
+        f.nodes_ids = [j + 1 for j in ids]
+        for j in ids:
+            f.nodes.append(nodes[j])
+            nodes[j].faces.append(f)
+        faces.append(f)
+
+    edges = list()
+    for i, (ids, fids) in enumerate(zip(grid.edge_nodes.tolist(), grid.edge_faces.tolist())):
+        e = DictEdge()
+        e.Id = i
+        for j in ids:
+            e.nodes.append(nodes[j])
+            nodes[j].edges.append(e)
+        for j in fids:
+            if j != -1:
+                e.faces.append(faces[j])
+                faces[j].edges.append(e)
+        edges.append(e)
+
+    return nodes, edges, faces
+
+
+def build_slotted_objects(grid):
+    """
+    Create slotted objects from the grid's tables.
+
+    :param grid: Grid object.
+    """
+    grid.drop_objects()
+    return grid.Nodes, grid.Edges, grid.Faces
+
+
+def build_slotted_adjacency(grid):
+    """
+    Create slotted objects from the grid's tables and the lists of faces and edges of each node.
+
+    :param grid: Grid object.
+    """
+    grid.drop_objects()
+    for n in grid.Nodes:
+        n.faces
+        n.edges
+    return grid.Nodes, grid.Edges, grid.Faces
+
+
+def measure(build, grid):
+    """
+    Measure memory allocated by the function.
+
+    :return: allocated bytes.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build(grid)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return after - before
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    grid = Grid()
+    grid.init(n, n, (0, 1), (0, 1))
+    grid.build_edges()
+    grid.drop_objects()
+
+    elements = len(grid.coordinates) + len(grid.edge_nodes) + len(grid.face_nodes)
+    tables = sum(a.nbytes for a in (grid.coordinates, grid.face_nodes, grid.edge_nodes, grid.edge_faces))
+
+    print('{} nodes, {} edges, {} faces'.format(len(grid.coordinates), len(grid.edge_nodes), len(grid.face_nodes)))
+    print('{:10} {:10.1f} bytes per element'.format('tables', tables / elements))
+
+    for name, build in (('dict', build_dict_objects), ('slots', build_slotted_objects),
+                        ('slots+adj', build_slotted_adjacency)):
+        print('{:10} {:10.1f} bytes per element'.format(name, measure(build, grid) / elements))
+
+
+if __name__ == '__main__':
+    main()
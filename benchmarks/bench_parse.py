@@ -0,0 +1,79 @@
+"""
+Benchmark of parsing of tecplot files.
+
+Compares line based `parce_nodes_and_faces` with streaming
+`iter_tecplot_zones` parsing numbers by NumPy.
+
+Usage: python benchmarks/bench_parse.py [points by axis] [zones]
+"""
+import os
+import sys
+import tempfile
+import time
+
+# The package is imported from the repository when the script is run by its path.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.reader import iter_tecplot_zones
+from triangular_grid_merge.tecplot import print_tecplot, parce_nodes_and_faces, number_of_faces
+
+
+def write_grid(filename, n, zones):
+    """
+    Write a grid with the given number of equal zones.
+
+    :param filename: file to write in.
+    :param n: number of points by each axis of a zone.
+    :param zones: number of zones.
+    """
+    grid = Grid()
+    grid.init(n, n, (0, 1), (0, 1))
+    grid.Zones = grid.Zones * zones
+    print_tecplot(grid, filename)
+
+
+def parce_lines(filename):
+    """
+    Parce the file the way `read_tecplot` did before streaming.
+
+    :param filename: file to read.
+    """
+    with open(filename, 'r') as f:
+        lines = f.readlines()
+
+    for i, line in enumerate(lines):
+        if line.find('ELEMENTS =') != -1:
+            parce_nodes_and_faces(lines[i + 3: i + 5 + number_of_faces(line)])
+
+
+def parce_stream(filename):
+    """
+    Parce the file by `iter_tecplot_zones`.
+
+    :param filename: file to read.
+    """
+    for _ in iter_tecplot_zones(filename):
+        pass
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    zones = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, 'grid.dat')
+        write_grid(filename, n, zones)
+        size = os.path.getsize(filename) / 2 ** 20
+
+        print('{} zones of {} nodes, {:.1f} MiB'.format(zones, n * n, size))
+
+        for name, parce in (('lines', parce_lines), ('stream', parce_stream)):
+            start = time.perf_counter()
+            parce(filename)
+            elapsed = time.perf_counter() - start
+            print('{:8} {:8.3f} s {:8.1f} MiB/s'.format(name, elapsed, size / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""
+Benchmark suite of reading, merging, building edges and writing of grids.
+
+Grids are made by `Grid.init` and split into strips of faces along x,
+each strip is a zone listing all nodes of its faces, so the zones
+share the nodes of their common borders.
+
+For each size the suite times:
+
+    parce_lines - line based `parce_nodes_and_faces`;
+    parce_stream - streaming `iter_tecplot_zones`;
+    set_nodes - merge of zones' nodes by each algorithm;
+    set_faces - connectivity and edges of all faces;
+    print_zones, print_merged - `print_tecplot` without and with merge;
+    print_zones.gz, parce_stream.gz... - writing and reading of the file
+    compressed by each compression, with the throughput of uncompressed text.
+
+Each phase is run once to measure time and once more under tracemalloc
+to measure peak memory. Results are written as JSON and can be compared
+with the results of another version.
+
+Usage: python benchmarks/bench_suite.py [--sizes 50 100 200] [--zones 4] [--output results.json]
+                                        [--compare old.json] [--compressions gz xz]
+
+With --calibrate FILE the suite fits the cost model of `algorithm='auto'`
+on this machine instead and writes the coefficients to FILE, see
+`triangular_grid_merge.auto.load_costs`.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# The package is imported from the repository when the script is run by its path.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from triangular_grid_merge import auto
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.zone import Zone
+from triangular_grid_merge.reader import iter_tecplot_zones
+from triangular_grid_merge.tecplot import print_tecplot, set_nodes, set_faces, parce_nodes_and_faces, \
+    number_of_faces
+
+COMPRESSIONS = ['gz', 'xz']
+
+ALGORITHMS = ['n_square', 'dichotomy_1_sided', 'dichotomy_2_sided', 'spatial_hash', 'sorted_batch', 'boundary', 'auto']
+
+# Algorithms taking time quadratic in the number of nodes.
+QUADRATIC = ['n_square']
+
+
+def split_grid(n, zones):
+    """
+    Make a grid of n x n points split into zones by strips of squares along x.
+
+    :param n: number of points by each axis.
+    :param zones: number of zones.
+    :return: Grid object.
+    """
+    grid = Grid()
+    grid.init(n, n, (0, 1), (0, 1))
+
+    # Column of the square of each face.
+    column = (np.arange(len(grid.face_nodes)) // 2) % (n - 1)
+    bounds = np.linspace(0, n - 1, zones + 1).astype(int)
+
+    grid.Zones = list()
+    for i in range(zones):
+        z = Zone()
+        z.grid = grid
+        z.face_ids = np.flatnonzero((column >= bounds[i]) & (column < bounds[i + 1])).astype(np.int32)
+        z.node_ids = np.unique(grid.face_nodes[z.face_ids]).astype(np.int32)
+        grid.Zones.append(z)
+
+    return grid
+
+
+def parce_lines(filename):
+    """
+    Parce the file the way `read_tecplot` did before streaming.
+    """
+    with open(filename, 'r') as f:
+        lines = f.readlines()
+
+    for i, line in enumerate(lines):
+        if line.find('ELEMENTS =') != -1:
+            parce_nodes_and_faces(lines[i + 3: i + 5 + number_of_faces(line)])
+
+
+def parce_stream(filename):
+    """
+    Parce the file by `iter_tecplot_zones`.
+
+    :return: tuple (list, list): coordinates and connectivity lists of zones.
+    """
+    nodes = list()
+    faces = list()
+    for header, coordinates, face_nodes in iter_tecplot_zones(filename):
+        nodes.append(coordinates)
+        faces.append(face_nodes)
+    return nodes, faces
+
+
+def read_grid(nodes, faces, algorithm):
+    """
+    Merge zones into a new grid.
+
+    :return: tuple (Grid, list): the grid and the remaps of zones' nodes.
+    """
+    grid = Grid()
+    remaps = set_nodes(grid, nodes, algorithm, faces)
+    return grid, remaps
+
+
+def build_faces(coordinates, remaps, faces):
+    """
+    Make a grid of the merged nodes and add faces and edges of zones to it.
+
+    :return: Grid object.
+    """
+    grid = Grid()
+    grid.coordinates = coordinates
+    for _ in faces:
+        z = Zone()
+        z.grid = grid
+        grid.Zones.append(z)
+    set_faces(grid, remaps, faces, grid.Zones)
+    return grid
+
+
+def measure(function, *args):
+    """
+    Run the function twice measuring time and peak memory.
+
+    :return: tuple (float, int, object): seconds, peak of allocated bytes and the result of the function.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    seconds = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return seconds, peak, result
+
+
+def run(n, zones, algorithms, max_quadratic, directory, compressions=(), workers=()):
+    """
+    Benchmark all phases for the grid of n x n points.
+
+    :return: list of dicts: results of phases.
+    """
+    results = list()
+
+    def record(phase, seconds, peak, algorithm=None, size=None):
+        results.append({'points': n, 'nodes': n * n, 'zones': zones, 'phase': phase, 'algorithm': algorithm,
+                        'seconds': seconds, 'peak_bytes': peak})
+        line = '{:6} {:16} {:18} {:10.3f} s {:10.1f} MiB'.format(n * n, phase, algorithm or '',
+                                                                seconds, peak / 2 ** 20)
+        if size is not None:
+            # Throughput of uncompressed text.
+            results[-1]['mb_per_s'] = size / 1e6 / max(seconds, 1e-9)
+            line += ' {:8.1f} MB/s'.format(results[-1]['mb_per_s'])
+        print(line)
+
+    filename = os.path.join(directory, 'zones.dat')
+    grid = split_grid(n, zones)
+
+    seconds, peak, _ = measure(print_tecplot, grid, filename)
+    record('print_zones', seconds, peak)
+
+    seconds, peak, _ = measure(parce_lines, filename)
+    record('parce_lines', seconds, peak)
+
+    seconds, peak, (nodes, faces) = measure(parce_stream, filename)
+    record('parce_stream', seconds, peak)
+
+    size = os.path.getsize(filename)
+    for compression in compressions:
+        compressed = '{}.{}'.format(filename, compression)
+        seconds, peak, _ = measure(print_tecplot, grid, compressed)
+        record('print_zones.' + compression, seconds, peak, size=size)
+        seconds, peak, _ = measure(parce_stream, compressed)
+        record('parce_stream.' + compression, seconds, peak, size=size)
+
+    merged = None
+    for algorithm in algorithms:
+        if algorithm in QUADRATIC and sum(len(c) for c in nodes) > max_quadratic:
+            continue
+        seconds, peak, merged = measure(read_grid, nodes, faces, algorithm)
+        record('set_nodes', seconds, peak, algorithm)
+
+    if merged is None:
+        merged = read_grid(nodes, faces, 'sorted_batch')
+
+    grid, remaps = merged
+    seconds, peak, grid = measure(build_faces, grid.coordinates, remaps, faces)
+    record('set_faces', seconds, peak)
+
+    seconds, peak, _ = measure(print_tecplot, grid, os.path.join(directory, 'merged.dat'), True)
+    record('print_merged', seconds, peak)
+
+    for count in workers:
+        # merge, format, stats, reorder, pipeline, workers.
+        seconds, peak, _ = measure(print_tecplot, grid, os.path.join(directory, 'merged.dat'), True,
+                                   None, None, None, True, count)
+        record('print_pipelined', seconds, peak, '{} workers'.format(count))
+
+    return results
+
+
+def compare(results, filename):
+    """
+    Print the ratio of time and memory of the results to the old ones.
+
+    :param results: list of dicts: new results.
+    :param filename: JSON file of old results.
+    """
+    with open(filename) as f:
+        old = {(r['nodes'], r['zones'], r['phase'], r['algorithm']): r for r in json.load(f)['results']}
+
+    print('\ncompared with {}: time and peak memory, new / old'.format(filename))
+    for r in results:
+        o = old.get((r['nodes'], r['zones'], r['phase'], r['algorithm']))
+        if o is None:
+            continue
+        print('{:6} {:16} {:18} {:8.2f} {:8.2f}'.format(r['nodes'], r['phase'], r['algorithm'] or '',
+                                                        r['seconds'] / max(o['seconds'], 1e-9),
+                                                        r['peak_bytes'] / max(o['peak_bytes'], 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite of triangular_grid_merge.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 100, 200], help='points by each axis')
+    parser.add_argument('--zones', type=int, default=4, help='number of zones')
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS, choices=ALGORITHMS)
+    parser.add_argument('--max-quadratic', type=int, default=5000,
+                        help='skip quadratic algorithms for more zones\' nodes than this')
+    parser.add_argument('--output', default='bench_results.json', help='JSON file to write results in')
+    parser.add_argument('--compare', help='JSON file of results of another version')
+    parser.add_argument('--compressions', nargs='*', default=COMPRESSIONS, choices=COMPRESSIONS,
+                        help='compressions to time writing and reading with')
+    parser.add_argument('--workers', type=int, nargs='*', default=[],
+                        help='numbers of workers to time pipelined writing of the merged grid with')
+    parser.add_argument('--calibrate', help='JSON file to write coefficients of the cost model of auto in')
+    args = parser.parse_args()
+
+    if args.calibrate:
+        costs = auto.calibrate()
+        with open(args.calibrate, 'w') as f:
+            json.dump(costs, f, indent=1)
+        print(json.dumps(costs))
+        return
+
+    results = list()
+    with tempfile.TemporaryDirectory() as directory:
+        for n in args.sizes:
+            results += run(n, args.zones, args.algorithms, args.max_quadratic, directory, args.compressions,
+                           args.workers)
+
+    with open(args.output, 'w') as f:
+        json.dump({'python': sys.version.split()[0], 'numpy': np.__version__, 'platform': platform.platform(),
+                   'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, f, indent=1)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
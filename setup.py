@@ -13,6 +13,8 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/SergeiShumilin/triangle-grid-merge",
     packages=setuptools.find_packages(),
+    install_requires=["numpy"],
+    entry_points={"console_scripts": ["tgm = triangular_grid_merge.cli:main"]},
     download_url="https://github.com/SergeiShumilin/triangle-grid-merge/archive/v1.0.0.tar.gz",
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.tecplot import print_tecplot
+
+
+def jittered(filename, count=4, points=9, seed=0):
+    """
+    Write a file of count x count structured zones sharing their borders,
+    the nodes moved randomly by less than EPS / 4.
+    """
+    rng = np.random.default_rng(seed)
+    grid = Grid()
+    for k in range(count * count):
+        zone = Grid()
+        zone.init(points, points, (k % count, k % count + 1), (k // count, k // count + 1))
+        coordinates = zone.coordinates + rng.uniform(-2.5e-5, 2.5e-5, zone.coordinates.shape)
+        grid.add_zone(coordinates, zone.face_nodes)
+    print_tecplot(grid, filename)
+
+
+@pytest.fixture
+def write_jittered():
+    return jittered
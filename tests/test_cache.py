@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+from triangular_grid_merge import cache
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.stats import Stats
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot
+from triangular_grid_merge.zone_index import open_tecplot, INDEXES
+
+
+def write_zones(filename, count, points=5):
+    grid = Grid()
+    for k in range(count):
+        zone = Grid()
+        zone.init(points, points, (k, k + 1), (0, 1))
+        grid.add_zone(zone.coordinates, zone.face_nodes)
+    print_tecplot(grid, filename)
+
+
+def read(filename, cache_dir, **kwargs):
+    grid = Grid()
+    stats = Stats()
+    read_tecplot(grid, filename, algorithm='sorted_batch', cache_dir=cache_dir, stats=stats, **kwargs)
+    return grid, stats.counters
+
+
+def test_hit_equals_read(tmp_path):
+    write_zones(tmp_path / 'a.dat', 3)
+    first, counters = read(tmp_path / 'a.dat', tmp_path / 'cache')
+    assert counters['cache_misses'] == 1
+
+    second, counters = read(tmp_path / 'a.dat', tmp_path / 'cache')
+    assert counters['cache_hits'] == 1
+    for name in cache.TABLES:
+        assert np.array_equal(getattr(first, name), getattr(second, name))
+    assert [z.node_ids.tolist() for z in first.Zones] == [z.node_ids.tolist() for z in second.Zones]
+
+
+def test_invalidation(tmp_path):
+    filename = tmp_path / 'a.dat'
+    write_zones(filename, 2)
+    read(filename, tmp_path / 'cache')
+
+    # Touched, not changed: the contents are hashed and the entry is kept.
+    st = os.stat(filename)
+    os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert read(filename, tmp_path / 'cache')[1]['cache_hits'] == 1
+
+    # Changed.
+    write_zones(filename, 3)
+    grid, counters = read(filename, tmp_path / 'cache')
+    assert counters['cache_misses'] == 1
+    assert len(grid.Zones) == 3
+
+    # Other settings of the merge make other entries.
+    assert read(filename, tmp_path / 'cache')[1]['cache_hits'] == 1
+    grid = Grid()
+    stats = Stats()
+    read_tecplot(grid, filename, algorithm='spatial_hash', cache_dir=tmp_path / 'cache', stats=stats)
+    assert stats.counters['cache_misses'] == 1
+
+
+def test_eviction_by_cache_size(tmp_path):
+    for name in ('a.dat', 'b.dat', 'c.dat'):
+        write_zones(tmp_path / name, 2)
+        read(tmp_path / name, tmp_path / 'cache', cache_size=1)
+    # Only the last entry is kept.
+    assert len(os.listdir(tmp_path / 'cache')) == 1
+
+
+def test_concurrent_store(tmp_path, monkeypatch):
+    write_zones(tmp_path / 'a.dat', 2)
+    rename = os.rename
+
+    def racing_rename(source, target):
+        # Another process stores the same entry first.
+        os.mkdir(target)
+        open(os.path.join(target, 'stamp.json'), 'w').close()
+        rename(source, target)
+
+    monkeypatch.setattr(os, 'rename', racing_rename)
+    grid, counters = read(tmp_path / 'a.dat', tmp_path / 'cache')
+    assert counters['cache_misses'] == 1
+    assert len(grid.Zones) == 2
+    assert not [name for name in os.listdir(tmp_path / 'cache') if name.startswith('.')]
+
+
+def test_cache_errors_do_not_fail_the_read(tmp_path):
+    write_zones(tmp_path / 'a.dat', 2)
+    # The cache directory cannot be made.
+    (tmp_path / 'file').write_text('')
+    grid, counters = read(tmp_path / 'a.dat', tmp_path / 'file' / 'cache')
+    assert len(grid.Zones) == 2
+
+    # A broken entry.
+    read(tmp_path / 'a.dat', tmp_path / 'cache')
+    for entry in os.listdir(tmp_path / 'cache'):
+        (tmp_path / 'cache' / entry / 'stamp.json').write_text('[1]')
+    grid, counters = read(tmp_path / 'a.dat', tmp_path / 'cache')
+    assert counters['cache_misses'] == 1
+    assert len(grid.Zones) == 2
+
+
+def test_zone_index_invalidation(tmp_path):
+    filename = tmp_path / 'a.dat'
+    write_zones(filename, 2)
+    assert len(open_tecplot(filename, cache_dir=tmp_path / 'cache').zones) == 2
+
+    INDEXES.clear()
+    assert len(open_tecplot(filename, cache_dir=tmp_path / 'cache').zones) == 2
+
+    write_zones(filename, 4)
+    INDEXES.clear()
+    assert len(open_tecplot(filename, cache_dir=tmp_path / 'cache').zones) == 4
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from triangular_grid_merge import cli, node_algorithms
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_zones(filename, count, points=4):
+    """
+    Write a file of count structured zones of points x points nodes along x sharing their borders.
+    """
+    grid = Grid()
+    for k in range(count):
+        zone = Grid()
+        zone.init(points, points, (k, k + 1), (0, 1))
+        grid.add_zone(zone.coordinates, zone.face_nodes)
+    print_tecplot(grid, filename)
+
+
+def run(*argv):
+    with pytest.raises(SystemExit) as exit:
+        cli.main([str(a) for a in argv])
+    return exit.value.code
+
+
+def test_merge(tmp_path, capsys):
+    write_zones(tmp_path / 'two.dat', 2)
+    assert run('merge', tmp_path / 'two.dat', '-o', tmp_path / 'out', '--jobs', 1,
+               '--algorithm', 'sorted_batch') == 0
+
+    grid = Grid()
+    read_tecplot(grid, tmp_path / 'out' / 'two.dat', algorithm='sorted_batch')
+    assert len(grid.Zones) == 1
+    assert len(grid.coordinates) == 28
+    assert 'duplicates 4' in capsys.readouterr().out
+
+
+def test_merge_single_zone(tmp_path):
+    write_zones(tmp_path / 'one.dat', 1)
+    write_zones(tmp_path / 'two.dat', 2)
+    assert run('merge', tmp_path / 'one.dat', tmp_path / 'two.dat', '-o', tmp_path / 'out', '--jobs', 2) == 0
+    assert (tmp_path / 'out' / 'one.dat').read_bytes() == (tmp_path / 'one.dat').read_bytes()
+
+
+def test_merge_failure(tmp_path):
+    write_zones(tmp_path / 'two.dat', 2)
+    assert run('merge', tmp_path / 'two.dat', tmp_path / 'missing.dat', '-o', tmp_path / 'out') == 1
+    assert (tmp_path / 'out' / 'two.dat').exists()
+
+
+def test_merge_restores_eps(tmp_path):
+    # The second zone is shifted by more than the default EPS.
+    grid = Grid()
+    for k in range(2):
+        zone = Grid()
+        zone.init(4, 4, (k + 1e-3 * k, k + 1 + 1e-3 * k), (0, 1))
+        grid.add_zone(zone.coordinates, zone.face_nodes)
+    print_tecplot(grid, tmp_path / 'two.dat')
+
+    eps = node_algorithms.EPS
+    assert run('merge', tmp_path / 'two.dat', '-o', tmp_path / 'out', '--jobs', 1, '--eps', 1e-2) == 0
+    assert node_algorithms.EPS == eps
+
+    grid = Grid()
+    read_tecplot(grid, tmp_path / 'out' / 'two.dat')
+    assert len(grid.coordinates) == 28
+
+    result = cli.merge_file(str(tmp_path / 'missing.dat'), str(tmp_path / 'out' / 'missing.dat'), 'auto', 1e-2)
+    assert 'error' in result
+    assert node_algorithms.EPS == eps
+
+
+def test_merge_refuses_to_overwrite_inputs(tmp_path):
+    write_zones(tmp_path / 'two.dat', 2)
+    data = (tmp_path / 'two.dat').read_bytes()
+    assert run('merge', tmp_path / 'two.dat', '-o', tmp_path) == 2
+
+    # A hard link to an input in the output directory.
+    os.mkdir(tmp_path / 'linked')
+    os.link(tmp_path / 'two.dat', tmp_path / 'linked' / 'three.dat')
+    write_zones(tmp_path / 'three.dat', 2)
+    assert run('merge', tmp_path / 'two.dat', tmp_path / 'three.dat', '-o', tmp_path / 'linked') == 2
+    assert (tmp_path / 'two.dat').read_bytes() == data
+
+
+def test_info(tmp_path, capsys):
+    write_zones(tmp_path / 'three.dat', 3)
+    assert run('info', tmp_path / 'three.dat') == 0
+    assert '3 zones, 48 nodes, 54 elements' in capsys.readouterr().out
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='needs resource limits')
+def test_merge_memory_limit(tmp_path):
+    write_zones(tmp_path / 'two.dat', 2, 100)
+
+    # A fresh process, as workers forked from this one would reuse its free heap.
+    def merge(megabytes):
+        command = [sys.executable, '-m', 'triangular_grid_merge.cli', 'merge', str(tmp_path / 'two.dat'),
+                   '-o', str(tmp_path / 'out'), '--max-memory', str(megabytes)]
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        return subprocess.run(command, env=env, stdout=subprocess.DEVNULL).returncode
+
+    assert merge(1) == 1
+    assert merge(4096) == 0
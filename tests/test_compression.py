@@ -0,0 +1,58 @@
+import gzip
+import lzma
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from triangular_grid_merge import compression
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot, read_headers
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+DECOMPRESS = {'gz': gzip.decompress, 'xz': lzma.decompress}
+
+
+def read(filename, **kwargs):
+    grid = Grid()
+    read_tecplot(grid, filename, algorithm='sorted_batch', **kwargs)
+    return grid
+
+
+@pytest.mark.parametrize('method', ['gz', 'xz'])
+@pytest.mark.parametrize('format', ['dat', 'plt'])
+def test_round_trip(tmp_path, monkeypatch, method, format):
+    # Chunks smaller than the file go through the queues of the threads.
+    monkeypatch.setattr(compression, 'COMPRESS_CHUNK', 100)
+    monkeypatch.setattr(compression, 'DECOMPRESS_CHUNK', 100)
+
+    grid = read(os.path.join(DATA, 'mz.dat'))
+    plain = tmp_path / ('grid.' + format)
+    packed = tmp_path / ('grid.{}.{}'.format(format, method))
+    print_tecplot(grid, plain)
+    print_tecplot(grid, packed, format=format)
+
+    assert compression.compression(packed) == method
+    assert DECOMPRESS[method](packed.read_bytes()) == plain.read_bytes()
+
+    expected = read(plain)
+    for kwargs in ({}, {'workers': 2}):
+        result = read(packed, format=format, **kwargs)
+        assert np.array_equal(result.coordinates, expected.coordinates)
+        assert np.array_equal(result.face_nodes, expected.face_nodes)
+    assert read_headers(packed, format=format) == read_headers(plain)
+
+
+def test_detected_by_contents(tmp_path):
+    # A compressed file without the extension, and a plain one with it.
+    with open(os.path.join(DATA, 'mz.dat'), 'rb') as f:
+        (tmp_path / 'grid.dat').write_bytes(gzip.compress(f.read()))
+    shutil.copy(os.path.join(DATA, 'mz.dat'), tmp_path / 'plain.dat.xz')
+
+    assert compression.compression(tmp_path / 'grid.dat') == 'gz'
+    assert compression.compression(tmp_path / 'plain.dat.xz') is None
+    assert compression.compression(tmp_path / 'new.dat.xz') == 'xz'
+
+    assert len(read(tmp_path / 'grid.dat').coordinates) == len(read(tmp_path / 'plain.dat.xz').coordinates) == 52
@@ -0,0 +1,255 @@
+import os
+
+import numpy as np
+import pytest
+
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def read_grid(algorithm='n_square'):
+    grid = Grid()
+    read_tecplot(grid, os.path.join(DATA, 'mz.dat'), algorithm=algorithm)
+    return grid
+
+
+def structured(xn, yn, x=(0, 1), y=(0, 1)):
+    grid = Grid()
+    grid.init(xn, yn, x, y)
+    return grid
+
+
+def test_node_edits_are_written(tmp_path):
+    for name in ('edited.dat', 'edited.plt'):
+        grid = structured(4, 3)
+        grid.Nodes[2].x = 5.5
+        print_tecplot(grid, tmp_path / name)
+
+        read = Grid()
+        read_tecplot(read, tmp_path / name, algorithm='sorted_batch')
+        assert read.coordinates[2, 0] == 5.5
+
+
+def test_face_edits_are_written(tmp_path):
+    grid = structured(3, 3)
+    face = grid.Faces[0]
+    face.nodes = face.nodes[::-1]
+    print_tecplot(grid, tmp_path / 'faces.dat')
+
+    read = Grid()
+    read_tecplot(read, tmp_path / 'faces.dat', algorithm='sorted_batch')
+    assert read.face_nodes[0].tolist() == [n.Id for n in face.nodes]
+
+
+def test_face_edges_in_side_order():
+    grid = structured(5, 4)
+    for face in grid.Faces:
+        nodes = [n.Id for n in face.nodes]
+        sides = [sorted(nodes[k: k + 2] if k < 2 else [nodes[2], nodes[0]]) for k in range(3)]
+        assert [sorted(n.Id for n in e.nodes) for e in face.edges] == sides
+
+
+def test_zones_of_other_grids_are_written(tmp_path):
+    left = structured(3, 3, (0, 1))
+    right = structured(3, 3, (1, 2))
+
+    grid = Grid()
+    grid.Zones.append(left.Zones[0])
+    grid.Zones.append(right.Zones[0])
+    print_tecplot(grid, tmp_path / 'zones.dat')
+
+    # The zones stay in their grids.
+    assert left.Zones[0].grid is left and right.Zones[0].grid is right
+
+    read = Grid()
+    read_tecplot(read, tmp_path / 'zones.dat', algorithm='sorted_batch')
+    assert len(read.Zones) == 2
+    assert len(read.coordinates) == 15
+
+    # Changed objects of the other grid are written.
+    left.Nodes[0].x = -1.0
+    print_tecplot(grid, tmp_path / 'changed.dat')
+    read = Grid()
+    read_tecplot(read, tmp_path / 'changed.dat', algorithm='sorted_batch')
+    assert read.coordinates[:, 0].min() == -1.0
+
+
+def test_zone_arrays_refer_to_first_occurrence():
+    grid = structured(3, 3)
+    zone = grid.Zones[0]
+    zone.node_ids = np.concatenate((zone.node_ids, zone.node_ids[:2]))
+    coordinates, face_nodes = grid.zone_arrays(zone)
+    assert len(coordinates) == 11
+    assert face_nodes.max() < 9
+
+
+def test_node_edits_are_merged(tmp_path):
+    print_tecplot(structured(3, 3, (1, 2)), tmp_path / 'zone.dat')
+
+    for add in ('read_tecplot', 'add_zone'):
+        grid = structured(3, 3)
+        grid.Nodes[0].x = -5.0
+        if add == 'read_tecplot':
+            read_tecplot(grid, tmp_path / 'zone.dat', algorithm='sorted_batch')
+        else:
+            zone = structured(3, 3, (1, 2))
+            grid.add_zone(zone.coordinates, zone.face_nodes)
+
+        assert grid.coordinates[0, 0] == -5.0
+        assert len(grid.Zones) > 1
+
+
+def test_table_and_object_edits_are_written(tmp_path):
+    for name in ('mixed.dat', 'mixed.plt'):
+        grid = structured(4, 3)
+        _ = grid.Nodes
+        grid.coordinates[0, 0] = -7.0
+        grid.Nodes[2].x = 5.5
+        face = grid.Faces[1]
+        face.nodes = face.nodes[::-1]
+        grid.face_nodes[0] = grid.face_nodes[0, ::-1]
+        print_tecplot(grid, tmp_path / name)
+
+        read = Grid()
+        read_tecplot(read, tmp_path / name, algorithm='sorted_batch')
+        assert read.coordinates[0, 0] == -7.0 and read.coordinates[2, 0] == 5.5
+        assert np.array_equal(read.face_nodes[:2], grid.face_nodes[:2])
+        assert read.face_nodes[1].tolist() == [n.Id for n in face.nodes]
+
+    # Objects built again see the edited tables, forgotten ones do not write.
+    grid.drop_objects()
+    assert grid.Nodes[0].x == -7.0
+    node = grid.Nodes[1]
+    grid.drop_objects()
+    node.x = 9.0
+    assert grid.coordinates[1, 0] != 9.0
+
+
+def test_build_edges():
+    grid = read_grid()
+    faces = grid.face_nodes.tolist()
+
+    # Sides of the faces in order of the first appearance, both faces for shared sides.
+    sides = dict()
+    for f, nodes in enumerate(faces):
+        for k in range(3):
+            key = tuple(sorted((nodes[k], nodes[(k + 1) % 3])))
+            sides.setdefault(key, [(nodes[k], nodes[(k + 1) % 3])]).append(f)
+
+    grid.build_edges()
+    assert grid.edge_nodes.tolist() == [list(side[0]) for side in sides.values()]
+    assert grid.edge_faces.tolist() == [side[1:] + [-1] * (3 - len(side)) for side in sides.values()]
+
+
+def test_edge_of_three_faces():
+    grid = Grid()
+    grid.coordinates = np.array([[0, 0], [1, 0], [0, 1], [0, -1], [1, 1]], dtype=np.float64)
+    grid.face_nodes = np.array([[0, 1, 2], [1, 0, 3], [0, 1, 4]], dtype=np.int32)
+    with pytest.raises(Exception, match='maximum number of faces'):
+        grid.build_edges()
+
+
+def test_node_adjacency():
+    grid = read_grid()
+    grid.build_edges()
+
+    for node in grid.Nodes:
+        assert sorted(f.Id for f in node.faces) == [f.Id for f in grid.Faces if node in f.nodes]
+        assert sorted(e.Id for e in node.edges) == [e.Id for e in grid.Edges if node in e.nodes]
+        assert not hasattr(node, '__dict__')
+
+    # Lists set on objects are kept.
+    node = grid.Nodes[0]
+    node.faces = node.faces[:1]
+    assert len(grid.Nodes[0].faces) == 1
+
+
+def test_init_tables():
+    xn, yn = 5, 4
+    grid = structured(xn, yn, (1, 3), (-1, 2))
+
+    assert len(grid.coordinates) == Grid.number_of_nodes(xn, yn)
+    assert len(grid.face_nodes) == Grid.number_of_faces(xn, yn)
+    assert len(grid.edge_nodes) == Grid.number_of_edges(xn, yn)
+
+    # Nodes go row by row from (x1, y1) to (x2, y2).
+    x, y = np.meshgrid(np.linspace(1, 3, xn), np.linspace(-1, 2, yn))
+    assert np.allclose(grid.coordinates, np.stack((x.ravel(), y.ravel()), axis=1))
+
+    # Faces have one orientation and cover the rectangle.
+    a, b, c = (grid.coordinates[grid.face_nodes[:, k]] for k in range(3))
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    assert np.all(area < 0) and np.isclose(area.sum() / 2, -6)
+
+    assert grid.Zones[0].node_ids.tolist() == list(range(xn * yn))
+    assert grid.Zones[0].face_ids.tolist() == list(range(len(grid.face_nodes)))
+
+
+def shuffled(xn, yn, seed=0):
+    """
+    Structured grid with nodes and faces in random order.
+    """
+    grid = structured(xn, yn)
+    rng = np.random.default_rng(seed)
+    node_order = rng.permutation(len(grid.coordinates))
+    new_ids = np.argsort(node_order).astype(np.int32)
+    grid.coordinates = grid.coordinates[node_order]
+    grid.face_nodes = new_ids[grid.face_nodes][rng.permutation(len(grid.face_nodes))]
+    grid.build_edges()
+    grid.Zones[0].node_ids = new_ids[grid.Zones[0].node_ids]
+    grid.drop_objects()
+    return grid
+
+
+def triangles(grid, face_ids=None):
+    """
+    Set of the faces as tuples of coordinates of their nodes.
+    """
+    face_nodes = grid.face_nodes if face_ids is None else grid.face_nodes[face_ids]
+    return {tuple(map(tuple, grid.coordinates[nodes].tolist())) for nodes in face_nodes}
+
+
+def spreads(grid):
+    """
+    Largest difference of ids of nodes of each face.
+    """
+    return grid.face_nodes.max(axis=1) - grid.face_nodes.min(axis=1)
+
+
+@pytest.mark.parametrize('method', ['hilbert', 'rcm'])
+def test_reorder(method):
+    grid = shuffled(20, 15)
+    faces = triangles(grid)
+    spread = spreads(grid).mean()
+    zone_coordinates = grid.coordinates[grid.Zones[0].node_ids]
+
+    node_order, face_order = grid.reorder(method)
+
+    assert sorted(node_order.tolist()) == list(range(300))
+    assert triangles(grid) == faces
+    assert np.array_equal(grid.coordinates[grid.Zones[0].node_ids], zone_coordinates)
+    assert triangles(grid, grid.Zones[0].face_ids) == faces
+    assert len(grid.edge_nodes) == Grid.number_of_edges(20, 15)
+
+    # Faces are sorted by their nodes, the nodes of a face get close ids.
+    assert np.all(np.diff(grid.face_nodes.min(axis=1)) >= 0)
+    assert spreads(grid).mean() < spread / 5
+    if method == 'rcm':
+        assert spreads(grid).max() <= 20
+
+
+def test_reorder_written(tmp_path):
+    grid = shuffled(6, 5)
+    faces = triangles(grid)
+
+    with pytest.raises(Exception, match='merged grid'):
+        print_tecplot(grid, tmp_path / 'zones.dat', reorder='rcm')
+
+    grid.Zones.append(grid.Zones[0])
+    print_tecplot(grid, tmp_path / 'reordered.dat', merge=True, reorder='rcm')
+    read = Grid()
+    read_tecplot(read, tmp_path / 'reordered.dat', algorithm='sorted_batch')
+    assert triangles(read) == faces
+    assert spreads(read).max() <= 7
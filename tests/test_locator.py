@@ -0,0 +1,86 @@
+import numpy as np
+
+from triangular_grid_merge.grid import Grid
+
+
+def distorted(xn, yn, x, y, seed):
+    """
+    Structured grid with inner nodes moved randomly within their cells.
+    """
+    grid = Grid()
+    grid.init(xn, yn, x, y)
+    rng = np.random.default_rng(seed)
+    step = np.array([(x[1] - x[0]) / (xn - 1), (y[1] - y[0]) / (yn - 1)])
+    inner = np.flatnonzero((grid.coordinates[:, 0] > x[0]) & (grid.coordinates[:, 0] < x[1])
+                           & (grid.coordinates[:, 1] > y[0]) & (grid.coordinates[:, 1] < y[1]))
+    grid.coordinates[inner] += rng.uniform(-0.3, 0.3, (len(inner), 2)) * step
+    grid.drop_objects()
+    return grid
+
+
+def barycentric(grid, points):
+    """
+    Barycentric coordinates of each point by each face, shape (n, F, 3).
+    """
+    a, b, c = (grid.coordinates[grid.face_nodes[:, k]] for k in range(3))
+    det = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    d = points[:, None, :] - a[None]
+    l1 = (d[..., 0] * (c[:, 1] - a[:, 1]) - d[..., 1] * (c[:, 0] - a[:, 0])) / det
+    l2 = ((b[:, 0] - a[:, 0]) * d[..., 1] - (b[:, 1] - a[:, 1]) * d[..., 0]) / det
+    return np.stack((1 - l1 - l2, l1, l2), axis=-1)
+
+
+def check(grid, points):
+    faces, weights = grid.locate_faces(points)
+    inside = barycentric(grid, points).min(axis=2) >= -1e-9
+
+    assert np.array_equal(faces >= 0, inside.any(axis=1))
+    found = faces >= 0
+    assert inside[found, faces[found]].all()
+    assert np.allclose((weights[found, :, None] * grid.coordinates[grid.face_nodes[faces[found]]]).sum(axis=1),
+                       points[found])
+
+    nodes, distances = grid.nearest_nodes(points)
+    brute = np.sqrt(((points[:, None, :] - grid.coordinates[None]) ** 2).sum(axis=2))
+    assert np.allclose(distances, brute.min(axis=1))
+    assert np.allclose(brute[np.arange(len(points)), nodes], distances)
+
+
+def test_against_brute_force():
+    grid = distorted(15, 12, (0, 3), (1, 2), seed=0)
+    points = np.random.default_rng(1).uniform((-0.5, 0.5), (3.5, 2.5), (500, 2))
+    # Nodes themselves lie on faces' borders.
+    check(grid, np.concatenate((points, grid.coordinates[::7])))
+
+
+def test_added_zones_and_new_tables():
+    grid = distorted(8, 8, (0, 1), (0, 1), seed=2)
+    points = np.random.default_rng(3).uniform(-0.2, 2.2, (300, 2))
+    check(grid, points)
+    locator = grid.locator
+
+    other = distorted(8, 8, (1, 2), (0, 1), seed=4)
+    grid.add_zone(other.coordinates, other.face_nodes)
+    assert grid.build_locator() is locator
+    check(grid, points)
+
+    grid.reorder('hilbert')
+    check(grid, points)
+    assert grid.locator is not locator
+
+
+def test_graded_and_huge_faces():
+    # Sizes of the faces differ by orders of magnitude.
+    grid = distorted(20, 20, (0, 1), (0, 1), seed=5)
+    grid.coordinates = (np.exp(6 * grid.coordinates) - 1) / (np.exp(6) - 1)
+    grid.add_zone(np.array([[-1e4, -1e4], [1e4, -1e4], [0, 1e4]]), np.array([[0, 1, 2]], dtype=np.int32))
+
+    rng = np.random.default_rng(6)
+    points = np.concatenate((rng.uniform(0, 1, (300, 2)), rng.uniform(0, 0.05, (100, 2)),
+                             rng.uniform(-2e4, 2e4, (100, 2))))
+    check(grid, points)
+
+    # Each face is kept once.
+    levels = grid.locator.faces
+    assert sum(len(keys) for level in levels for keys, _ in level.segments) == len(grid.face_nodes)
+    assert len(levels) > 10
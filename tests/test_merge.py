@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pytest
+
+from triangular_grid_merge import tecplot
+from triangular_grid_merge.auto import GridFeatures
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.node_algorithms import EPS
+from triangular_grid_merge.reader import iter_tecplot_zones
+from triangular_grid_merge.stats import Stats
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Algorithms giving the nodes in the order of n_square.
+ORDERED = ['spatial_hash', 'sorted_batch', 'boundary', 'auto']
+
+
+def read_bytes(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def written(tmp_path, filename, algorithm, merge):
+    grid = Grid()
+    read_tecplot(grid, filename, algorithm=algorithm)
+    output = tmp_path / '{}_{}.dat'.format('merged' if merge else 'zones', algorithm)
+    print_tecplot(grid, output, merge=merge)
+    return read_bytes(output)
+
+
+@pytest.mark.parametrize('algorithm', ['n_square', 'dichotomy_1_sided', 'dichotomy_2_sided'])
+def test_baseline_output(tmp_path, algorithm):
+    filename = os.path.join(DATA, 'mz.dat')
+    assert written(tmp_path, filename, algorithm, True) == read_bytes(os.path.join(DATA, 'merged_' + algorithm + '.dat'))
+    assert written(tmp_path, filename, algorithm, False) == read_bytes(os.path.join(DATA, 'zones_' + algorithm + '.dat'))
+
+
+def test_init_output(tmp_path):
+    grid = Grid()
+    grid.init(7, 6, (0, 60), (0, 100))
+    print_tecplot(grid, tmp_path / 'init.dat')
+    assert read_bytes(tmp_path / 'init.dat') == read_bytes(os.path.join(DATA, 'init.dat'))
+
+
+@pytest.mark.parametrize('algorithm', ORDERED)
+def test_same_output_as_n_square(tmp_path, algorithm, write_jittered):
+    write_jittered(tmp_path / 'jittered.dat')
+
+    for filename in (os.path.join(DATA, 'mz.dat'), tmp_path / 'jittered.dat'):
+        for merge in (True, False):
+            assert written(tmp_path, filename, algorithm, merge) == written(tmp_path, filename, 'n_square', merge)
+
+
+def test_auto_after_dichotomy_zones(tmp_path, monkeypatch, write_jittered):
+    # Dichotomy moves the nodes of the earlier zones, their ids are remapped.
+    # It is chosen while the grid is sorted by x only.
+    chosen = iter(['dichotomy_2_sided', 'dichotomy_1_sided'] * 2 + ['dichotomy_2_sided']
+                  + ['spatial_hash', 'sorted_batch'] * 2)
+    monkeypatch.setattr(tecplot, 'choose_algorithm', lambda coordinates, points, features: (next(chosen), {}))
+    write_jittered(tmp_path / 'jittered.dat', count=3, points=5)
+
+    stats = Stats()
+    grid = Grid()
+    read_tecplot(grid, tmp_path / 'jittered.dat', algorithm='auto', stats=stats)
+    reference = Grid()
+    read_tecplot(reference, tmp_path / 'jittered.dat', algorithm='n_square')
+
+    assert stats.counters['auto_dichotomy_2_sided'] == 3
+    assert len(grid.coordinates) == len(reference.coordinates)
+    for zone, expected in zip(grid.Zones, reference.Zones):
+        assert np.array_equal(grid.coordinates[zone.node_ids], reference.coordinates[expected.node_ids])
+        assert np.array_equal(grid.coordinates[grid.face_nodes[zone.face_ids]],
+                              reference.coordinates[reference.face_nodes[expected.face_ids]])
+
+
+def test_auto_features_kept_between_zones(monkeypatch):
+    # The grid is sorted by x while dichotomy adds the nodes.
+    chosen = iter(['dichotomy_1_sided', 'dichotomy_2_sided', 'spatial_hash', 'sorted_batch', 'n_square'])
+    monkeypatch.setattr(tecplot, 'choose_algorithm', lambda coordinates, points, features: (next(chosen), {}))
+    rng = np.random.default_rng(0)
+    zones = [rng.uniform(k, k + 2, (50, 2)) for k in range(5)]
+
+    grid = Grid()
+    for k, points in enumerate(zones):
+        tecplot.set_nodes(grid, [points], 'auto')
+        kept = grid.auto_features
+        taken = GridFeatures(grid.coordinates)
+
+        assert kept.is_valid(grid.coordinates)
+        assert kept.is_sorted == taken.is_sorted == (k < 2)
+        assert np.all(kept.lo <= taken.lo) and np.all(kept.hi >= taken.hi)
+        assert np.all(taken.lo - kept.lo <= EPS) and np.all(kept.hi - taken.hi <= EPS)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_chains_as_n_square(seed):
+    # Nodes closer than EPS one after another, the ends of a chain are not merged.
+    rng = np.random.default_rng(seed)
+    chain = np.stack((np.arange(200) * 0.6 * EPS, np.zeros(200)), axis=1)
+    cloud = rng.uniform(0, 20 * EPS, (200, 2))
+    zones = [chain[rng.permutation(200)], cloud, np.concatenate((cloud[:50] + EPS / 2, chain[::-1]))]
+
+    grids = list()
+    for algorithm in ('n_square', 'sorted_batch', 'auto'):
+        grid = Grid()
+        remaps = tecplot.set_nodes(grid, zones, algorithm)
+        grids.append((grid.coordinates, [r.tolist() for r in remaps]))
+
+    # The index of add_zone is kept between zones.
+    grid = Grid()
+    added = [grid.add_zone(points, np.empty((0, 3), dtype=np.int32)) for points in zones]
+    grids.append((grid.coordinates, [z.node_ids.tolist() for z in added]))
+
+    reference = grids[0]
+    assert len(reference[0]) < 600
+    for coordinates, remaps in grids[1:]:
+        assert np.array_equal(coordinates, reference[0])
+        assert remaps == reference[1]
+
+
+def test_add_zone_as_merge_zones(tmp_path, write_jittered):
+    write_jittered(tmp_path / 'jittered.dat', count=3, points=6)
+    zones = list(iter_tecplot_zones(tmp_path / 'jittered.dat'))
+
+    expected = Grid()
+    read_tecplot(expected, tmp_path / 'jittered.dat', algorithm='sorted_batch')
+
+    grid = Grid()
+    for k, (_, coordinates, face_nodes) in enumerate(zones):
+        before = grid.edge_nodes.copy() if k else None
+        grid.add_zone(coordinates, face_nodes)
+        if k:
+            # Ids of the existing elements do not change.
+            assert np.array_equal(grid.edge_nodes[:len(before)], before)
+
+    for name in ('coordinates', 'face_nodes', 'edge_nodes', 'edge_faces'):
+        assert np.array_equal(getattr(grid, name), getattr(expected, name))
+    for zone, other in zip(grid.Zones, expected.Zones):
+        assert np.array_equal(zone.node_ids, other.node_ids) and np.array_equal(zone.face_ids, other.face_ids)
+
+    # Objects of the grid follow the added zones.
+    assert len(grid.Nodes) == len(expected.coordinates)
+    grid.add_zone(zones[0][1] + 10, zones[0][2])
+    assert len(grid.Nodes) == len(expected.coordinates) + len(zones[0][1])
+
+
+def test_boundary_appends_interior_nodes():
+    # The middle node of the second zone coincides with an interior node of the first one.
+    first = Grid()
+    first.init(3, 3, (0, 2), (0, 2))
+    second = Grid()
+    second.init(3, 3, (1, 3), (1, 3))
+    zones = [first.coordinates, second.coordinates]
+    faces = [first.face_nodes, second.face_nodes]
+
+    counts = dict()
+    for algorithm in ('boundary', 'n_square'):
+        grid = Grid()
+        tecplot.set_nodes(grid, zones, algorithm, faces)
+        counts[algorithm] = len(grid.coordinates)
+
+    # (1, 1) is interior to the first zone, (2, 2) to the second one.
+    assert counts == {'boundary': 16, 'n_square': 14}
@@ -0,0 +1,46 @@
+import numpy as np
+
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.node_algorithms import EPS
+from triangular_grid_merge.out_of_core import merge_tecplot_files
+from triangular_grid_merge.plt import write_plt
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot
+
+
+def test_same_output_as_in_memory(tmp_path, write_jittered):
+    # More nodes than a run holds with the least memory limit.
+    write_jittered(tmp_path / 'first.dat', count=4, points=12, seed=1)
+    write_jittered(tmp_path / 'second.plt', count=3, points=9, seed=2)
+    inputs = [tmp_path / 'first.dat', tmp_path / 'second.plt']
+
+    grid = Grid()
+    for filename in inputs:
+        read_tecplot(grid, filename, algorithm='sorted_batch')
+    print_tecplot(grid, tmp_path / 'in_memory.dat', merge=True)
+
+    nodes, faces = merge_tecplot_files(inputs, tmp_path / 'merged.dat', memory_limit=1, tmp_dir=tmp_path)
+
+    assert (nodes, faces) == (len(grid.coordinates), len(grid.face_nodes))
+    assert (tmp_path / 'merged.dat').read_bytes() == (tmp_path / 'in_memory.dat').read_bytes()
+    # Temporary files are removed.
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['first.dat', 'in_memory.dat', 'merged.dat', 'second.plt']
+
+
+def test_chains_as_n_square(tmp_path):
+    # Nodes closer than EPS one after another span several runs and blocks of the merge.
+    rng = np.random.default_rng(0)
+    chain = np.stack((np.arange(600) * 0.6 * EPS, np.zeros(600)), axis=1)
+    cloud = rng.uniform(0, 20 * EPS, (600, 2))
+    zones = [chain[rng.permutation(600)], cloud, np.concatenate((cloud[:300] + EPS / 2, chain[::-1]))]
+    with open(tmp_path / 'chains.plt', 'wb') as f:
+        write_plt(f, [('ZONE {}'.format(k + 1), points, np.array([[0, 1, 2]], dtype=np.int32))
+                      for k, points in enumerate(zones)])
+
+    grid = Grid()
+    read_tecplot(grid, tmp_path / 'chains.plt', algorithm='n_square')
+    print_tecplot(grid, tmp_path / 'n_square.dat', merge=True)
+
+    nodes, _ = merge_tecplot_files([tmp_path / 'chains.plt'], tmp_path / 'merged.dat', memory_limit=1)
+
+    assert nodes == len(grid.coordinates) < 2100
+    assert (tmp_path / 'merged.dat').read_bytes() == (tmp_path / 'n_square.dat').read_bytes()
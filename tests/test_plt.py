@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pytest
+
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.plt import write_plt
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot, read_headers
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def read(filename, algorithm='n_square'):
+    grid = Grid()
+    read_tecplot(grid, filename, algorithm=algorithm)
+    return grid
+
+
+@pytest.mark.parametrize('merge', [False, True])
+def test_round_trip(tmp_path, merge):
+    grid = read(os.path.join(DATA, 'mz.dat'))
+    print_tecplot(grid, tmp_path / 'grid.plt', merge=merge)
+    print_tecplot(grid, tmp_path / 'grid.dat', merge=merge)
+
+    from_plt = read(tmp_path / 'grid.plt')
+    from_dat = read(tmp_path / 'grid.dat')
+
+    assert len(from_plt.Zones) == (1 if merge else 3)
+    for name in ('coordinates', 'face_nodes', 'edge_nodes', 'edge_faces'):
+        assert np.array_equal(getattr(from_plt, name), getattr(from_dat, name))
+    for zone, expected in zip(from_plt.Zones, from_dat.Zones):
+        assert np.array_equal(zone.node_ids, expected.node_ids)
+
+    assert read_headers(tmp_path / 'grid.plt') == read_headers(tmp_path / 'grid.dat')
+
+
+def test_exact_values(tmp_path):
+    # Binary values are not rounded like the text ones.
+    coordinates = np.array([[0.1, 1 / 3], [np.pi, 0], [0, 1e-300]])
+    with open(tmp_path / 'exact.plt', 'wb') as f:
+        write_plt(f, [('ZONE 1', coordinates, np.array([[0, 1, 2]], dtype=np.int32))])
+
+    grid = read(tmp_path / 'exact.plt')
+    assert np.array_equal(grid.coordinates, coordinates)
+    assert grid.face_nodes.tolist() == [[0, 1, 2]]
+
+
+def test_not_plt(tmp_path):
+    with pytest.raises(Exception, match='not a binary tecplot file'):
+        read_headers(os.path.join(DATA, 'mz.dat'), format='plt')
@@ -0,0 +1,86 @@
+import io
+import os
+
+import numpy as np
+
+from triangular_grid_merge.reader import Tokenizer, iter_tecplot_zones, parce_file_header, parce_zone
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# The zone of 4 nodes and 2 faces written in the ways tecplot accepts.
+FREE_FORM = b'''# comment line
+TITLE="free, form"
+VARIABLES = X,Y,"P"
+ZONE T = "ZONE 1"
+ ZONETYPE=FETRIANGLE, DATAPACKING =BLOCK
+ NODES=4 ELEMENTS
+=
+2
+0.0,1.0  0.0	1.0
+0.0 0.0 1.0 1e0
+5 5 5 5
+1 2 3
+2
+4 3
+ZONE N=3, E=1, F=FEPOINT, ET=TRIANGLE
+0 0 7
+1 0 7 0 1 7
+1 2 3
+'''
+
+
+def zones_of(f, chunk):
+    tokenizer = Tokenizer(f, chunk=chunk)
+    variables = parce_file_header(tokenizer)
+    zones = list()
+    while tokenizer.peek() is not None:
+        zones.append(parce_zone(tokenizer, variables))
+    return zones
+
+
+def test_free_form():
+    first, second = zones_of(io.BytesIO(FREE_FORM), chunk=5)
+
+    assert first[0]['T'] == 'ZONE 1' and first[0]['NODES'] == 4
+    assert first[1].tolist() == [[0, 0], [1, 0], [0, 1], [1, 1]]
+    assert first[2].tolist() == [[0, 1, 2], [1, 3, 2]]
+
+    assert second[0]['DATAPACKING'] == 'POINT'
+    assert second[1].tolist() == [[0, 0], [1, 0], [0, 1]]
+    assert second[2].tolist() == [[0, 1, 2]]
+
+
+def test_chunks_split_tokens():
+    filename = os.path.join(DATA, 'mz.dat')
+    expected = list(iter_tecplot_zones(filename))
+    assert len(expected) == 3
+
+    for chunk in (1, 3, 64):
+        with open(filename, 'rb') as f:
+            zones = zones_of(f, chunk)
+        assert len(zones) == len(expected)
+        for (header, coordinates, face_nodes), zone in zip(zones, expected):
+            assert header == zone[0]
+            assert np.array_equal(coordinates, zone[1]) and np.array_equal(face_nodes, zone[2])
+
+
+def test_blocks_read_from_file(tmp_path):
+    # Numbers separated by commas fall back from np.fromfile to the tokens.
+    (tmp_path / 'free.dat').write_bytes(FREE_FORM)
+    expected = zones_of(io.BytesIO(FREE_FORM), chunk=1 << 16)
+
+    for (header, coordinates, face_nodes), zone in zip(iter_tecplot_zones(tmp_path / 'free.dat'), expected):
+        assert header == zone[0]
+        assert coordinates.dtype == np.float64 and face_nodes.dtype == np.int32
+        assert np.array_equal(coordinates, zone[1]) and np.array_equal(face_nodes, zone[2])
+
+
+def test_parallel_zones_in_order():
+    filename = os.path.join(DATA, 'mz.dat')
+    expected = list(iter_tecplot_zones(filename))
+
+    zones = list(iter_tecplot_zones(filename, workers=2))
+    assert [header['T'] for header, _, _ in zones] == ['ZONE 1', 'ZONE 2', 'ZONE 3']
+    for (header, coordinates, face_nodes), zone in zip(zones, expected):
+        assert header == zone[0]
+        assert np.array_equal(coordinates, zone[1]) and np.array_equal(face_nodes, zone[2])
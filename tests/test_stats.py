@@ -0,0 +1,43 @@
+import json
+import logging
+import os
+
+import pytest
+
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.stats import Stats
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+@pytest.mark.parametrize('algorithm', ['n_square', 'spatial_hash', 'sorted_batch'])
+def test_read_counters(algorithm):
+    stats = Stats()
+    grid = Grid()
+    read_tecplot(grid, os.path.join(DATA, 'mz.dat'), algorithm=algorithm, stats=stats)
+
+    counters = stats.counters
+    assert {name: counters[name] for name in ('zones', 'zone_nodes', 'faces', 'nodes', 'edges')} == \
+        {'zones': 3, 'zone_nodes': 60, 'faces': 72, 'nodes': len(grid.coordinates), 'edges': len(grid.edge_nodes)}
+    assert counters['matches'] + counters['inserts'] == 60
+    assert counters['inserts'] == len(grid.coordinates)
+    assert counters['comparisons'] >= counters['matches']
+
+    assert stats.phases['parse']['calls'] == 3 and stats.phases['parse']['items'] == 60
+    assert stats.phases['read']['seconds'] >= stats.phases['set_nodes']['seconds']
+
+
+def test_write_counters(tmp_path, caplog):
+    grid = Grid()
+    read_tecplot(grid, os.path.join(DATA, 'mz.dat'), algorithm='sorted_batch')
+
+    stats = Stats()
+    print_tecplot(grid, tmp_path / 'zones.dat', stats=stats)
+    assert stats.counters == {'written_zones': 3, 'written_nodes': 60, 'written_faces': 72}
+    assert stats.phases['write_zone']['calls'] == 3
+
+    assert json.loads(stats.to_json()) == stats.as_dict()
+    with caplog.at_level(logging.INFO):
+        stats.log()
+    assert 'written_zones: 3' in caplog.text
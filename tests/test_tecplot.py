@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from triangular_grid_merge import tecplot
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot, write_structured_tecplot
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+@pytest.mark.parametrize('chunk_rows', [None, 1, 2, 100])
+def test_structured_writer(tmp_path, chunk_rows):
+    grid = Grid()
+    grid.init(7, 5, (0, 60), (-1, 100))
+    print_tecplot(grid, tmp_path / 'grid.dat')
+
+    write_structured_tecplot(tmp_path / 'streamed.dat', 7, 5, (0, 60), (-1, 100), chunk_rows=chunk_rows)
+    assert (tmp_path / 'streamed.dat').read_bytes() == (tmp_path / 'grid.dat').read_bytes()
+
+
+@pytest.mark.parametrize('name', ['grid.dat', 'grid.dat.gz'])
+def test_pipelined_writer(tmp_path, monkeypatch, name):
+    # Several chunks are formatted by each worker.
+    monkeypatch.setattr(tecplot, 'CHUNK', 50)
+    grid = Grid()
+    read_tecplot(grid, os.path.join(DATA, 'mz.dat'), algorithm='sorted_batch')
+
+    for merge in (False, True):
+        print_tecplot(grid, tmp_path / name, merge=merge)
+        print_tecplot(grid, tmp_path / ('pipelined.' + name), merge=merge, pipeline=True, workers=2)
+        assert (tmp_path / ('pipelined.' + name)).read_bytes() == (tmp_path / name).read_bytes()
@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+
+from triangular_grid_merge import zone_index
+from triangular_grid_merge.grid import Grid
+from triangular_grid_merge.reader import iter_tecplot_zones
+from triangular_grid_merge.tecplot import read_tecplot, print_tecplot, merge_zones
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+@pytest.fixture
+def files(tmp_path):
+    grid = Grid()
+    read_tecplot(grid, os.path.join(DATA, 'mz.dat'), algorithm='sorted_batch')
+    print_tecplot(grid, tmp_path / 'mz.plt')
+    print_tecplot(grid, tmp_path / 'mz.dat.gz')
+    return [os.path.join(DATA, 'mz.dat'), tmp_path / 'mz.plt', tmp_path / 'mz.dat.gz']
+
+
+def test_lazy_zones(files):
+    expected = list(iter_tecplot_zones(files[0]))
+
+    for filename in files:
+        f = zone_index.open_tecplot(filename)
+        assert len(f.zones) == 3
+        assert [zone.name for zone in f.zones] == ['ZONE 1', 'ZONE 2', 'ZONE 3']
+
+        # Sizes come from the headers, the data is read on access.
+        zone = f.zones[-1]
+        assert (zone.nodes, zone.elements) == (20, 24) and zone._data is None
+        assert np.array_equal(zone.coordinates, expected[2][1])
+        assert np.array_equal(zone.face_nodes, expected[2][2])
+
+        assert [z.index for z in f.zones.named('ZONE [13]')] == [0, 2]
+        assert [z.index for z in f.zones[1:]] == [1, 2]
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_merge_of_some_zones(files, workers):
+    expected = list(iter_tecplot_zones(files[0]))
+    reference = Grid()
+    merge_zones(reference, [expected[2][1], expected[0][1]], [expected[2][2], expected[0][2]], 'n_square')
+
+    for filename in files:
+        f = zone_index.open_tecplot(filename)
+        grid = f.merge(zones=[f.zones[2], 'ZONE 1'], algorithm='sorted_batch', workers=workers)
+        for name in ('coordinates', 'face_nodes', 'edge_nodes', 'edge_faces'):
+            assert np.array_equal(getattr(grid, name), getattr(reference, name))
+
+    with pytest.raises(Exception, match='No zone named'):
+        f.merge(zones=['ZONE 4'])
+
+
+def test_index_kept_while_file_is_unchanged(tmp_path, monkeypatch):
+    filename = tmp_path / 'mz.dat'
+    filename.write_bytes(open(os.path.join(DATA, 'mz.dat'), 'rb').read())
+    zone_index.open_tecplot(filename)
+
+    def scan(filename):
+        raise AssertionError('scanned again')
+
+    monkeypatch.setattr(zone_index, 'read_zone_headers', scan)
+    assert len(zone_index.open_tecplot(filename).zones) == 3
+
+    # A changed file is scanned again.
+    with open(filename, 'a') as f:
+        f.write('\n')
+    with pytest.raises(AssertionError, match='scanned again'):
+        zone_index.open_tecplot(filename)
+
+
+def test_indexes_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(zone_index, 'INDEXES', type(zone_index.INDEXES)())
+    monkeypatch.setattr(zone_index, 'INDEX_COUNT', 2)
+    data = open(os.path.join(DATA, 'mz.dat'), 'rb').read()
+    names = [tmp_path / '{}.dat'.format(k) for k in range(3)]
+    for filename in names:
+        filename.write_bytes(data)
+
+    zone_index.open_tecplot(names[0])
+    zone_index.open_tecplot(names[1])
+    # The first file is used again, so the second one is removed for the third.
+    zone_index.open_tecplot(names[0])
+    zone_index.open_tecplot(names[2])
+    assert [os.path.basename(key[0]) for key in zone_index.INDEXES] == ['0.dat', '2.dat']
+
+    # A change of the file replaces its index.
+    monkeypatch.setattr(zone_index, 'INDEX_COUNT', 4)
+    for k in range(3):
+        with open(names[2], 'a') as f:
+            f.write('\n')
+        zone_index.open_tecplot(names[2])
+    assert [os.path.basename(key[0]) for key in zone_index.INDEXES] == ['0.dat', '2.dat']
+    assert list(zone_index.INDEXES)[1][2] == os.path.getsize(names[2])
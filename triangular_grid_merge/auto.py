@@ -0,0 +1,274 @@
+"""
+Module provides the choice of the algorithm merging a zone into the grid.
+
+The time of each algorithm is estimated by a linear cost model:
+
+    time = sum(c[i] * term[i])
+
+where the last term is 1 for the time of a call and the others are computed
+from the features of the zone and the grid:
+
+    n - number of the zone's nodes;
+    N - number of the grid's nodes;
+    overlap - share of the zone's nodes lying inside the bounding box of the grid;
+    column - mean number of the grid's nodes having the x-coordinate of a zone's node
+    (closer than EPS), which dichotomy goes through;
+    sorted - whether the grid's nodes are sorted by x, dichotomy needs it.
+
+The features are taken from a sample of the zone's nodes. The bounding box
+and the order of the grid's nodes are kept in `GridFeatures` while zones are
+merged, so choosing the algorithm does not go through the grid.
+
+The coefficients are fitted by `calibrate` timing the algorithms on generated zones
+(`python benchmarks/bench_suite.py --calibrate costs.json`) and can be loaded
+by `load_costs`.
+"""
+import json
+import time
+from math import log2
+
+import numpy as np
+
+from . import node_algorithms
+
+# Features taken from at most this number of the zone's nodes.
+SAMPLE = 1024
+
+# Coefficients of the terms of each algorithm in seconds.
+COSTS = {
+    'n_square': [4.2e-07, 1.6e-06, 1.4e-04],
+    'dichotomy_1_sided': [4.3e-07, 2.9e-09, 2.9e-06, 0.0],
+    'dichotomy_2_sided': [7.0e-07, 1.2e-08, 3.0e-06, 0.0],
+    'spatial_hash': [3.5e-06, 1.2e-06, 0.0],
+    'sorted_batch': [3.0e-07, 5.8e-08, 3.6e-04],
+}
+
+
+class GridFeatures:
+    __doc__ = "Bounding box and order of the grid's nodes kept while zones are merged into the grid."
+
+    def __init__(self, coordinates):
+        """
+        Take the features of the grid's nodes.
+
+        :param coordinates: (N, 2) array of the grid's nodes.
+        """
+        self.count = 0
+        self.lo = np.full(2, np.inf)
+        self.hi = np.full(2, -np.inf)
+        self.is_sorted = True
+
+        # Nodes the features are taken from.
+        self.coordinates = None
+
+        self.add(coordinates, coordinates)
+
+    def is_valid(self, coordinates):
+        """
+        Whether the features are taken from these nodes.
+
+        :param coordinates: (N, 2) array of the grid's nodes.
+        """
+        return self.coordinates is coordinates
+
+    def add(self, coordinates, points, kept_order=False):
+        """
+        Take the features of the grid after a zone is merged into it.
+
+        New nodes are appended to the grid's nodes, or inserted keeping
+        them sorted by x like dichotomy does. Only the new nodes are looked at.
+
+        :param coordinates: (N, 2) array of the grid's nodes after the merge.
+        :param points: (n, 2) array of the zone's nodes.
+        :param kept_order: whether the nodes are inserted keeping the order by x.
+        """
+        # Merged nodes lie within EPS of the grid's nodes, so the box of the zone is taken whole.
+        if len(points):
+            self.lo = np.minimum(self.lo, points.min(axis=0))
+            self.hi = np.maximum(self.hi, points.max(axis=0))
+
+        if not kept_order:
+            xs = coordinates[max(self.count - 1, 0):, 0]
+            self.is_sorted = self.is_sorted and bool(np.all(xs[1:] >= xs[:-1]))
+
+        self.count = len(coordinates)
+        self.coordinates = coordinates
+
+
+def zone_features(coordinates, points, features=None):
+    """
+    Features of the zone and the grid for the cost model.
+
+    :param coordinates: (N, 2) array of the grid's nodes.
+    :param points: (n, 2) array of the zone's nodes.
+    :param features: GridFeatures of the grid's nodes. Taken from coordinates if not given.
+    :return: dict.
+    """
+    eps = node_algorithms.EPS
+    n = len(points)
+    count = len(coordinates)
+
+    if features is None:
+        features = GridFeatures(coordinates)
+
+    sample = points[np.linspace(0, n - 1, min(n, SAMPLE)).astype(np.int64)] if n else points
+
+    if count and len(sample):
+        lo = features.lo - eps
+        hi = features.hi + eps
+        overlap = float(np.mean(np.all((sample >= lo) & (sample <= hi), axis=1)))
+    else:
+        overlap = 0.0
+
+    # Dichotomy goes through the nodes sharing x.
+    if features.is_sorted and count:
+        xs = coordinates[:, 0]
+        column = np.searchsorted(xs, sample[:, 0] + eps) - np.searchsorted(xs, sample[:, 0] - eps)
+        column = float(np.mean(column)) if len(column) else 0.0
+    elif len(sample):
+        # The grid is made of the zone's nodes then. Nodes of the sample besides
+        # the node itself stand for (n - 1) / (len(sample) - 1) nodes each.
+        sample_xs = np.sort(sample[:, 0])
+        others = np.searchsorted(sample_xs, sample[:, 0] + eps) - np.searchsorted(sample_xs, sample[:, 0] - eps) - 1
+        scale = (n - 1) / (len(sample) - 1) if len(sample) > 1 else 0.0
+        column = (1 + float(np.mean(others)) * scale) / 2
+    else:
+        column = 0.0
+
+    return {'n': n, 'N': count, 'overlap': overlap, 'column': column, 'sorted': features.is_sorted}
+
+
+def cost_terms(algorithm, features):
+    """
+    Terms of the cost model of the algorithm.
+
+    :param algorithm: name of the algorithm.
+    :param features: dict of `zone_features`.
+    :return: list of terms matching the coefficients in COSTS.
+    """
+    return algorithm_terms(algorithm, features) + [1.0]
+
+
+def algorithm_terms(algorithm, features):
+    """
+    Terms of the cost model of the algorithm depending on the features.
+    """
+    n = features['n']
+    count = features['N']
+    linear = n + count
+
+    if algorithm == 'n_square':
+        # A node found is searched for through half of the grid on average.
+        return [n * (count + n / 2) * (1 - features['overlap'] / 2), linear]
+
+    if algorithm in ('dichotomy_1_sided', 'dichotomy_2_sided'):
+        # Search by x, scan of a column and insertion into the list of nodes.
+        return [n * (log2(linear + 1) + features['column']), n * (count + n / 2), linear]
+
+    if algorithm == 'spatial_hash':
+        return [n, linear]
+
+    if algorithm == 'sorted_batch':
+        return [n, linear]
+
+    raise Exception('No cost model for algorithm {}'.format(algorithm))
+
+
+def estimate(algorithm, features, costs=None):
+    """
+    Estimate the time of merging the zone by the algorithm.
+
+    :return: seconds.
+    """
+    costs = COSTS if costs is None else costs
+    return float(np.dot(costs[algorithm], cost_terms(algorithm, features)))
+
+
+def choose_algorithm(coordinates, points, costs=None, features=None):
+    """
+    Choose the fastest algorithm to merge the zone into the grid.
+
+    Dichotomy is only considered when the grid's nodes are sorted by x.
+
+    :param coordinates: (N, 2) array of the grid's nodes.
+    :param points: (n, 2) array of the zone's nodes.
+    :param costs: coefficients of the cost model. COSTS if not given.
+    :param features: GridFeatures of the grid's nodes kept between zones.
+    Taken from coordinates if not given.
+    :return: tuple (str, dict): name of the algorithm and estimated seconds of each one.
+    """
+    costs = COSTS if costs is None else costs
+    zone = zone_features(coordinates, points, features)
+
+    estimates = dict()
+    for algorithm in costs:
+        if algorithm.startswith('dichotomy') and not zone['sorted']:
+            continue
+        estimates[algorithm] = estimate(algorithm, zone, costs)
+
+    return min(estimates, key=estimates.get), estimates
+
+
+def load_costs(filename):
+    """
+    Load coefficients of the cost model written by `calibrate` into COSTS.
+
+    :param filename: JSON file.
+    """
+    with open(filename) as f:
+        COSTS.update(json.load(f))
+
+
+def calibrate(sizes=(10, 20, 40, 80, 160), algorithms=None, max_quadratic=3000):
+    """
+    Fit the coefficients of the cost model by timing the algorithms.
+
+    Grids of n x n points split into four zones by strips along x and along y
+    are merged zone by zone, the coefficients are fitted by least squares
+    of relative errors.
+
+    :param sizes: numbers of points by axis of the generated grids.
+    :param algorithms: algorithms to calibrate. All of COSTS if not given.
+    :param max_quadratic: largest number of the grid's nodes to time n_square at.
+    :return: dict of coefficients like COSTS.
+    """
+    from .grid import Grid
+    from .tecplot import set_nodes
+
+    algorithms = list(COSTS) if algorithms is None else algorithms
+
+    zones = list()
+    for n in sizes:
+        grid = Grid()
+        grid.init(n, n, (0, 1), (0, 1))
+        points = grid.coordinates
+        for axis in (0, 1):
+            # Strips of points including the common borders.
+            bounds = np.linspace(0, n - 1, 5).astype(int)
+            position = np.round(points[:, axis] * (n - 1)).astype(int)
+            zones.append([points[(position >= a) & (position <= b)] for a, b in zip(bounds[:-1], bounds[1:])])
+
+    costs = dict()
+    for algorithm in algorithms:
+        terms = list()
+        times = list()
+        for zone_list in zones:
+            if algorithm == 'n_square' and sum(len(z) for z in zone_list) > max_quadratic:
+                continue
+            grid = Grid()
+            grid.coordinates = np.empty((0, 2))
+            for points in zone_list:
+                features = zone_features(grid.coordinates, points)
+                start = time.perf_counter()
+                set_nodes(grid, [points], algorithm)
+                times.append(time.perf_counter() - start)
+                terms.append(cost_terms(algorithm, features))
+
+        terms = np.array(terms, dtype=np.float64)
+        times = np.array(times)
+
+        # Relative errors matter, so each measurement is divided by its time.
+        fitted = np.linalg.lstsq(terms / times[:, None], np.ones(len(times)), rcond=None)[0]
+        costs[algorithm] = [float('%.2g' % max(c, 0.0)) for c in fitted]
+
+    return costs
@@ -0,0 +1,307 @@
+"""
+Module provides the binary cache of grids read from tecplot files.
+
+An entry of the cache is a directory holding the tables of the grid
+read from a file as .npy files, which are memory-mapped when loaded,
+and a stamp of the source file:
+
+    coordinates.npy, face_nodes.npy, edge_nodes.npy, edge_faces.npy - tables of the grid;
+
+    zone_node_ids.npy, zone_face_ids.npy - ids of the zones' elements one zone after another;
+
+    zone_sizes.npy - (Z, 2) numbers of nodes and faces of each zone;
+
+    stamp.json - size, modification time and hash of the contents of the source file.
+
+An entry of the index of zones of a file, see `zone_index`, holds index.json
+with the positions and headers of zones and the stamp without the hash.
+
+The entry is found by the path of the source file and the settings of merge,
+the stamp tells whether the source file was changed since the entry was made.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from . import node_algorithms
+from .zone import Zone
+
+# Version of the layout of entries.
+VERSION = 1
+
+# Default bound of the total size of entries in the cache directory in bytes.
+CACHE_SIZE = 1 << 30
+
+# Size of the blocks the source file is hashed by.
+HASH_BLOCK = 1 << 20
+
+# Tables of the grid stored in an entry.
+TABLES = ('coordinates', 'face_nodes', 'edge_nodes', 'edge_faces')
+
+
+def entry_path(cache_dir, filename, algorithm, format):
+    """
+    Directory of the cache entry for the file read with the given settings.
+
+    :param cache_dir: directory of the cache.
+    :param filename: source tecplot file.
+    :param algorithm: algorithm to merge nodes.
+    :param format: format of the source file.
+    :return: str.
+    """
+    key = json.dumps([VERSION, os.path.realpath(filename), algorithm, format, repr(node_algorithms.EPS)])
+    return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest())
+
+
+def index_path(cache_dir, filename, format):
+    """
+    Directory of the cache entry for the index of zones of the file.
+
+    :param cache_dir: directory of the cache.
+    :param filename: source tecplot file.
+    :param format: format of the source file.
+    :return: str.
+    """
+    key = json.dumps([VERSION, os.path.realpath(filename), 'zone_index', format])
+    return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest())
+
+
+def file_hash(filename):
+    """
+    Hash of the contents of the file.
+    """
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load(grid, entry, filename):
+    """
+    Fill the empty grid from the cache entry if it is valid for the file.
+
+    The entry is valid when the file has the size and the modification time
+    it had when the entry was made. If only the time differs, the contents
+    of the file are hashed and compared.
+
+    :param grid: empty Grid object.
+    :param entry: directory of the cache entry.
+    :param filename: source tecplot file.
+    :return: (bool) whether the grid was loaded.
+    """
+    if not check_stamp(entry, filename):
+        return False
+
+    try:
+        # Copy-on-write mapping: pages are read on access, the file is never changed.
+        tables = {name: np.load(os.path.join(entry, name + '.npy'), mmap_mode='c')
+                  for name in TABLES + ('zone_node_ids', 'zone_face_ids')}
+        sizes = np.load(os.path.join(entry, 'zone_sizes.npy'))
+    except (OSError, ValueError):
+        return False
+
+    for name in TABLES:
+        setattr(grid, name, tables[name])
+
+    node_start = 0
+    face_start = 0
+    for nodes, faces in sizes.tolist():
+        z = Zone()
+        z.grid = grid
+        z.node_ids = tables['zone_node_ids'][node_start: node_start + nodes]
+        z.face_ids = tables['zone_face_ids'][face_start: face_start + faces]
+        grid.Zones.append(z)
+        node_start += nodes
+        face_start += faces
+
+    grid.drop_objects()
+
+    # Mark the entry as recently used for the eviction.
+    os.utime(os.path.join(entry, 'stamp.json'))
+    return True
+
+
+def check_stamp(entry, filename):
+    """
+    Tell whether the cache entry is valid for the file, see `load`.
+
+    Entries stamped without the hash are invalid once the modification time differs.
+
+    :param entry: directory of the cache entry.
+    :param filename: source tecplot file.
+    :return: bool.
+    """
+    try:
+        with open(os.path.join(entry, 'stamp.json')) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if not isinstance(stamp, dict) or not {'size', 'mtime', 'hash'} <= stamp.keys():
+        return False
+
+    st = os.stat(filename)
+    if stamp['size'] != st.st_size:
+        return False
+    if stamp['mtime'] != st.st_mtime_ns:
+        if stamp['hash'] is None or stamp['hash'] != file_hash(filename):
+            return False
+        # The file was touched, not changed.
+        stamp['mtime'] = st.st_mtime_ns
+        write_stamp(entry, stamp)
+
+    return True
+
+
+def store(grid, entry, filename, max_size=CACHE_SIZE):
+    """
+    Save the grid read from the file into the cache entry,
+    then evict old entries of the cache directory.
+
+    The entry is written into a temporary directory first and renamed,
+    so readers never see a partly written entry.
+
+    :param grid: Grid object read from the file.
+    :param entry: directory of the cache entry.
+    :param filename: source tecplot file.
+    :param max_size: bound of the total size of entries in the cache directory in bytes.
+    """
+    st = os.stat(filename)
+    stamp = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'hash': file_hash(filename)}
+
+    def save(tmp):
+        for name in TABLES:
+            np.save(os.path.join(tmp, name + '.npy'), getattr(grid, name))
+        np.save(os.path.join(tmp, 'zone_node_ids.npy'),
+                np.concatenate([np.empty(0, dtype=np.int32)] + [z.node_ids for z in grid.Zones]))
+        np.save(os.path.join(tmp, 'zone_face_ids.npy'),
+                np.concatenate([np.empty(0, dtype=np.int32)] + [z.face_ids for z in grid.Zones]))
+        np.save(os.path.join(tmp, 'zone_sizes.npy'),
+                np.array([(len(z.node_ids), len(z.face_ids)) for z in grid.Zones], dtype=np.int64).reshape(-1, 2))
+
+    store_entry(entry, stamp, save, max_size)
+
+
+def load_index(entry, filename):
+    """
+    Load the index of zones of the file from the cache entry if it is valid for the file.
+
+    :param entry: directory of the cache entry made by `index_path`.
+    :param filename: source tecplot file.
+    :return: dict of the index or None.
+    """
+    if not check_stamp(entry, filename):
+        return None
+
+    try:
+        with open(os.path.join(entry, 'index.json')) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    os.utime(os.path.join(entry, 'stamp.json'))
+    return index
+
+
+def store_index(entry, filename, index, max_size=CACHE_SIZE):
+    """
+    Save the index of zones of the file into the cache entry.
+
+    The file is not hashed, so storing is cheap, and the entry is made
+    invalid by any change of the modification time.
+
+    :param entry: directory of the cache entry made by `index_path`.
+    :param filename: source tecplot file.
+    :param index: dict of the index, saved as JSON.
+    :param max_size: bound of the total size of entries in the cache directory in bytes.
+    """
+    st = os.stat(filename)
+    stamp = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'hash': None}
+
+    def save(tmp):
+        with open(os.path.join(tmp, 'index.json'), 'w') as f:
+            json.dump(index, f)
+
+    store_entry(entry, stamp, save, max_size)
+
+
+def store_entry(entry, stamp, save, max_size=CACHE_SIZE):
+    """
+    Make the cache entry, then evict old entries of the cache directory.
+
+    The entry is written into a temporary directory first and renamed,
+    so readers never see a partly written entry. If another process
+    stores the same entry at the same time, one of the entries is kept.
+
+    :param entry: directory of the cache entry.
+    :param stamp: dict: stamp of the source file.
+    :param save: function writing the files of the entry into the given directory.
+    :param max_size: bound of the total size of entries in the cache directory in bytes.
+    """
+    cache_dir = os.path.dirname(entry)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    tmp = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp')
+    try:
+        save(tmp)
+        write_stamp(tmp, stamp)
+        shutil.rmtree(entry, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        # Another process stored the entry after it was removed.
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(entry):
+            raise
+
+    evict(cache_dir, max_size, keep=entry)
+
+
+def write_stamp(entry, stamp):
+    """
+    Write the stamp of the source file into the entry.
+    """
+    with open(os.path.join(entry, 'stamp.json'), 'w') as f:
+        json.dump(stamp, f)
+
+
+def evict(cache_dir, max_size, keep=None):
+    """
+    Remove least recently used entries until the entries
+    take no more than max_size bytes.
+
+    :param cache_dir: directory of the cache.
+    :param max_size: bound of the total size of entries in bytes.
+    :param keep: entry which is never removed.
+    """
+    entries = list()
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        stamp_file = os.path.join(path, 'stamp.json')
+        if name.startswith('.') or not os.path.isfile(stamp_file):
+            continue
+        try:
+            size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+            entries.append((os.stat(stamp_file).st_mtime, size, path))
+        except OSError:
+            # The entry is being replaced or removed by another process.
+            continue
+
+    total = sum(size for _, size, _ in entries)
+
+    # Oldest first.
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        if path == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
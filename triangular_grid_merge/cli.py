@@ -0,0 +1,214 @@
+"""
+Module provides the command line tool tgm.
+
+    tgm merge IN... -o OUTDIR [--jobs N] [--algorithm auto] [--eps 1e-4] [--max-memory MB]
+                              [--report report.json]
+
+Each input file is read, its zones are merged into a single zone and the
+grid is written to OUTDIR under the name of the input file, so the format
+and the compression of the output are the ones of the input. A file of a
+single zone is written as it is read. Outputs never replace inputs.
+
+Files are merged in parallel by N worker processes, each holding one grid
+at a time. With --max-memory the address space of each worker is limited,
+so a file too large fails alone instead of exhausting the machine.
+A line with the time, the numbers of zones, nodes and merged duplicate
+nodes is printed for each file as it is done. The exit status is 1 if any
+file failed.
+
+    tgm info FILE...
+
+prints the name and the numbers of nodes and elements of each zone reading
+only the headers of zones, see `tecplot.read_headers`.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import node_algorithms
+from .grid import Grid
+from .stats import Stats
+from .tecplot import read_tecplot, print_tecplot, read_headers, ALGORITHMS
+
+parser = argparse.ArgumentParser(prog='tgm', description='Merge and inspect tecplot triangular grids.')
+commands = parser.add_subparsers(dest='command', required=True)
+
+merge_parser = commands.add_parser('merge', help='merge the zones of each file into a single zone')
+merge_parser.add_argument('inputs', nargs='+', metavar='IN', help='tecplot files to merge')
+merge_parser.add_argument('-o', '--output', required=True, metavar='OUTDIR', help='directory to write merged files in')
+merge_parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='number of worker processes')
+merge_parser.add_argument('--algorithm', default='auto', choices=ALGORITHMS, help='algorithm to merge nodes')
+merge_parser.add_argument('--eps', type=float, default=node_algorithms.EPS,
+                          help='nodes closer than eps by each coordinate are merged')
+merge_parser.add_argument('--max-memory', type=int, metavar='MB',
+                          help='limit of the address space of each worker process in MiB')
+merge_parser.add_argument('--report', metavar='FILE', help='JSON file to write results of all files in')
+
+info_parser = commands.add_parser('info', help='print the zones of files reading only their headers')
+info_parser.add_argument('inputs', nargs='+', metavar='FILE', help='tecplot files')
+
+
+def merge_file(filename, output, algorithm, eps):
+    """
+    Merge the zones of the file into a single zone and write it.
+
+    A file of a single zone is written without merge.
+
+    :param filename: tecplot file to read.
+    :param output: file to write the merged grid in.
+    :param algorithm: algorithm to merge nodes.
+    :param eps: EPS of the merge.
+    :return: dict: result of the file, with the key error if it failed.
+    """
+    result = {'input': filename, 'output': output}
+    start = time.perf_counter()
+
+    # The merge reads EPS of the module, so it is set for this file only.
+    previous = node_algorithms.EPS
+    try:
+        node_algorithms.EPS = eps
+        stats = Stats()
+        grid = Grid()
+        read_tecplot(grid, filename, algorithm=algorithm, stats=stats)
+        print_tecplot(grid, output, merge=len(grid.Zones) > 1)
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+    else:
+        result.update({name: stats.counters.get(name, 0) for name in ('zones', 'zone_nodes', 'nodes', 'faces')})
+        result['duplicates'] = result['zone_nodes'] - result['nodes']
+    finally:
+        node_algorithms.EPS = previous
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def file_id(filename):
+    """
+    Device and inode of the file, or None if it does not exist.
+    """
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def limit_memory(megabytes):
+    """
+    Limit the address space of the process, so allocations over the limit raise MemoryError.
+
+    :param megabytes: limit in MiB.
+    """
+    import resource
+
+    limit = megabytes << 20
+    resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+
+def print_result(result):
+    """
+    Print the line of the result of a file.
+    """
+    if 'error' in result:
+        print('FAILED {} {:8.3f} s  {}'.format(result['input'], result['seconds'], result['error']), flush=True)
+    else:
+        print('ok     {} {:8.3f} s  zones {}  nodes {} -> {}  duplicates {}'.format(
+            result['input'], result['seconds'], result['zones'], result['zone_nodes'], result['nodes'],
+            result['duplicates']), flush=True)
+
+
+def merge(args):
+    """
+    Run tgm merge.
+
+    :return: exit status.
+    """
+    outputs = [os.path.join(args.output, os.path.basename(filename)) for filename in args.inputs]
+    if len(set(outputs)) < len(outputs):
+        parser.error('input files must have different names')
+    if args.jobs < 1:
+        parser.error('--jobs must be positive')
+
+    # Inputs by path and by file, so links to them are found too.
+    paths = {os.path.realpath(filename) for filename in args.inputs}
+    files = {file_id(filename) for filename in args.inputs} - {None}
+    for output in outputs:
+        if os.path.realpath(output) in paths or file_id(output) in files:
+            parser.error('output {} would overwrite an input file'.format(output))
+
+    os.makedirs(args.output, exist_ok=True)
+    start = time.perf_counter()
+    results = list()
+
+    # The limit of memory is set in workers, never in this process.
+    if (args.jobs == 1 or len(args.inputs) == 1) and args.max_memory is None:
+        for filename, output in zip(args.inputs, outputs):
+            results.append(merge_file(filename, output, args.algorithm, args.eps))
+            print_result(results[-1])
+    else:
+        initializer = None if args.max_memory is None else limit_memory
+        with ProcessPoolExecutor(min(args.jobs, len(args.inputs)), initializer=initializer,
+                                 initargs=(args.max_memory,)) as pool:
+            futures = {pool.submit(merge_file, filename, output, args.algorithm, args.eps): filename
+                       for filename, output in zip(args.inputs, outputs)}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker died, e.g. killed for lack of memory.
+                    result = {'input': futures[future], 'error': '{}: {}'.format(type(e).__name__, e),
+                              'seconds': 0.0}
+                results.append(result)
+                print_result(result)
+
+    failed = sum('error' in result for result in results)
+    print('{} files, {} failed, {:.3f} s'.format(len(results), failed, time.perf_counter() - start))
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    return 1 if failed else 0
+
+
+def info(args):
+    """
+    Run tgm info.
+
+    :return: exit status.
+    """
+    status = 0
+
+    for filename in args.inputs:
+        try:
+            headers = read_headers(filename)
+        except Exception as e:
+            print('FAILED {}  {}: {}'.format(filename, type(e).__name__, e))
+            status = 1
+            continue
+
+        print('{}: {} zones, {} nodes, {} elements'.format(filename, len(headers),
+                                                         sum(h['NODES'] for h in headers),
+                                                         sum(h['ELEMENTS'] for h in headers)))
+        for k, header in enumerate(headers):
+            print('{:6} {:>12} {:>12}  {}'.format(k, header['NODES'], header['ELEMENTS'], header['T']))
+
+    return status
+
+
+def main(argv=None):
+    """
+    Entry point of tgm.
+
+    :param argv: arguments without the program name, sys.argv if not given.
+    """
+    args = parser.parse_args(argv)
+    sys.exit(merge(args) if args.command == 'merge' else info(args))
+
+
+if __name__ == '__main__':
+    main()
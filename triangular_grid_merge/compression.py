@@ -0,0 +1,286 @@
+"""
+Module provides streaming compression of tecplot files.
+
+Files named name.dat.gz or name.dat.xz (name.plt.gz...) are written compressed
+by gzip or xz. Files being read are recognized as compressed by their first
+bytes, or by the extension if they cannot be read yet.
+
+Text of ASCII files is compressed by chunks in a background thread while the next chunk
+is formatted, and decompressed by chunks in a background thread while the
+previous chunk is parced. zlib and lzma release the GIL, so the threads
+work in parallel. Queues between the threads are bounded, so only a few
+chunks are kept in memory.
+"""
+import gzip
+import lzma
+import os
+import queue
+import threading
+import zlib
+
+# Compression by the extension of the file.
+EXTENSIONS = {'.gz': 'gz', '.xz': 'xz'}
+
+# Compression by the first bytes of the file.
+MAGIC = {b'\x1f\x8b': 'gz', b'\xfd7zXZ\x00': 'xz'}
+
+# Compression level of gzip and preset of xz.
+GZIP_LEVEL = 3
+XZ_PRESET = 3
+
+# Size of the text compressed at once.
+COMPRESS_CHUNK = 1 << 22
+
+# Size of the chunk read from the decompressed stream at once.
+DECOMPRESS_CHUNK = 1 << 20
+
+# Number of chunks waiting in the queue between the threads.
+QUEUE_SIZE = 4
+
+
+def compression(filename, detect=True):
+    """
+    Compression of the file.
+
+    :param filename: name of the file.
+    :param detect: recognize the compression of an existing file by its first bytes.
+    Otherwise, or if the file does not exist, it is chosen by the extension.
+    :return: 'gz', 'xz' or None.
+    """
+    if detect and os.path.isfile(filename):
+        with open(filename, 'rb') as f:
+            head = f.read(max(len(magic) for magic in MAGIC))
+        for magic, method in MAGIC.items():
+            if head.startswith(magic):
+                return method
+        return None
+
+    return EXTENSIONS.get(os.path.splitext(str(filename))[1].lower())
+
+
+def strip_extension(filename):
+    """
+    Name of the file without the extension of the compression, e.g. name.dat for name.dat.gz.
+    """
+    name, extension = os.path.splitext(str(filename))
+    return name if extension.lower() in EXTENSIONS else str(filename)
+
+
+def open_input(filename, background=True):
+    """
+    Open the file for binary reading, decompressing it if needed.
+
+    :param filename: file to read from.
+    :param background: decompress in a background thread. The stream can only be read
+    by chunks then, otherwise it can also seek.
+    :return: binary file object.
+    """
+    method = compression(filename)
+    if method is None:
+        return open(filename, 'rb')
+
+    f = gzip.open(filename, 'rb') if method == 'gz' else lzma.open(filename, 'rb')
+    return BackgroundReader(f) if background else f
+
+
+def open_output(filename, buffering=-1):
+    """
+    Open the file for text writing, compressing it if its extension is .gz or .xz.
+
+    :param filename: file to write in.
+    :param buffering: size of the buffer of the uncompressed file.
+    :return: text file object.
+    """
+    method = compression(filename, detect=False)
+    if method is None:
+        return open(filename, 'w', buffering=buffering)
+    return CompressedWriter(filename, method)
+
+
+def open_binary_output(filename):
+    """
+    Open the file for binary writing, compressing it if its extension is .gz or .xz.
+
+    :param filename: file to write in.
+    :return: binary file object.
+    """
+    method = compression(filename, detect=False)
+    if method == 'gz':
+        return gzip.open(filename, 'wb', compresslevel=GZIP_LEVEL)
+    if method == 'xz':
+        return lzma.open(filename, 'wb', preset=XZ_PRESET)
+    return open(filename, 'wb')
+
+
+class CompressedWriter:
+    __doc__ = "Text file compressing the written text by chunks in a background thread."
+
+    def __init__(self, filename, method):
+        """
+        Open the file.
+
+        :param filename: file to write in.
+        :param method: 'gz' or 'xz'.
+        """
+        if method == 'gz':
+            # wbits 31 makes the gzip header and trailer.
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        elif method == 'xz':
+            self.compressor = lzma.LZMACompressor(preset=XZ_PRESET)
+        else:
+            raise Exception('Wrong name for compression')
+
+        self.f = open(filename, 'wb')
+
+        # Text written since the last chunk was passed to the thread.
+        self.parts = list()
+        self.size = 0
+
+        # Numbers of uncompressed and compressed bytes.
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        self.error = None
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.thread = threading.Thread(target=self.compress, daemon=True)
+        self.thread.start()
+
+    def write(self, text):
+        """
+        Write the text.
+
+        :param text: str.
+        :return: number of characters written.
+        """
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= COMPRESS_CHUNK:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        """
+        Pass the written text to the compressing thread.
+        """
+        if self.error is not None:
+            raise self.error
+        if self.parts:
+            data = ''.join(self.parts).encode()
+            self.parts = list()
+            self.size = 0
+            self.bytes_in += len(data)
+            self.queue.put(data)
+
+    def compress(self):
+        """
+        Compress the chunks from the queue and write them to the file until None comes.
+        """
+        try:
+            while True:
+                data = self.queue.get()
+                if data is None:
+                    break
+                self.write_compressed(self.compressor.compress(data))
+            self.write_compressed(self.compressor.flush())
+        except BaseException as e:
+            self.error = e
+            # Let the writer put the rest of the chunks.
+            while self.queue.get() is not None:
+                pass
+
+    def write_compressed(self, data):
+        self.f.write(data)
+        self.bytes_out += len(data)
+
+    def close(self):
+        """
+        Compress the rest of the text and close the file.
+        """
+        if self.thread is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+            self.f.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class BackgroundReader:
+    __doc__ = "Binary stream reading chunks of another stream ahead in a background thread."
+
+    def __init__(self, f):
+        """
+        Start reading.
+
+        :param f: binary file object, e.g. decompressing one.
+        """
+        self.f = f
+        self.error = None
+        self.stopped = False
+        self.queue = queue.Queue(QUEUE_SIZE)
+        self.thread = threading.Thread(target=self.read_ahead, daemon=True)
+        self.thread.start()
+
+    def read_ahead(self):
+        """
+        Put the chunks of the stream into the queue, and b'' at the end.
+        """
+        try:
+            while not self.stopped:
+                chunk = self.f.read(DECOMPRESS_CHUNK)
+                self.queue.put(chunk)
+                if not chunk:
+                    return
+        except BaseException as e:
+            self.error = e
+            self.queue.put(b'')
+
+    def read(self, size=-1):
+        """
+        Read the next chunk of the stream.
+
+        :param size: ignored, chunks have the size DECOMPRESS_CHUNK.
+        :return: bytes, b'' at the end of the stream.
+        """
+        if self.thread is None:
+            return b''
+        chunk = self.queue.get()
+        if self.error is not None:
+            raise self.error
+        if not chunk:
+            # The end is put once.
+            self.queue.put(b'')
+        return chunk
+
+    def close(self):
+        """
+        Stop reading and close the stream.
+        """
+        if self.thread is None:
+            return
+        self.stopped = True
+        while self.thread.is_alive():
+            # Free the place in the queue for the thread waiting to put a chunk.
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.thread.join(0.01)
+        self.thread = None
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
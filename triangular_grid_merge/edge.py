@@ -4,11 +4,48 @@
 class Edge:
     __doc__ = "Module describing grid's edge."
 
+    __slots__ = ('Id', '_nodes', '_faces', 'grid')
+
     def __init__(self):
         """
         Construct an edge.
         :param id: edge's id.
         """
+        # Grid the edge is created from, see `nodes`.
+        self.grid = None
+
         self.Id = None
-        self.nodes = list()
-        self.faces = list()
+
+        # Tuples of two nodes and at most two faces.
+        self.nodes = ()
+        self.faces = ()
+
+    @property
+    def nodes(self):
+        """
+        Tuple of edge's two nodes.
+
+        Written into grid.edge_nodes when set if the edge is created from the grid's tables.
+        """
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes):
+        self._nodes = nodes
+        if self.grid is not None:
+            self.grid.write_edge(self)
+
+    @property
+    def faces(self):
+        """
+        Tuple of edge's faces.
+
+        Written into grid.edge_faces when set if the edge is created from the grid's tables.
+        """
+        return self._faces
+
+    @faces.setter
+    def faces(self, faces):
+        self._faces = faces
+        if self.grid is not None:
+            self.grid.write_edge(self)
@@ -4,14 +4,50 @@
 class Face:
     __doc__ = "Module describing grid's face."
 
+    __slots__ = ('Id', '_nodes', 'edges', 'grid', '_nodes_ids')
+
     def __init__(self):
         """
         Construct a face.
         :param id: face's id.
         """
+        # Grid the face is created from, see `nodes`.
+        self.grid = None
+
         self.Id = None
 
-        # Nodes and edges set clockwise.
-        self.nodes = list()
-        self.nodes_ids = list()
-        self.edges = list()
+        # Tuples of three nodes and three edges set clockwise.
+        self.nodes = ()
+        self.edges = ()
+
+        self._nodes_ids = None
+
+    @property
+    def nodes(self):
+        """
+        Tuple of face's nodes.
+
+        Written into grid.face_nodes when set if the face is created from the grid's tables.
+        """
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes):
+        self._nodes = nodes
+        if self.grid is not None:
+            self.grid.write_face(self)
+
+    @property
+    def nodes_ids(self):
+        """
+        1-based ids of face's nodes.
+
+        If not set, taken from the ids of the linked nodes.
+        """
+        if self._nodes_ids is None:
+            return [n.Id + 1 for n in self.nodes]
+        return self._nodes_ids
+
+    @nodes_ids.setter
+    def nodes_ids(self, ids):
+        self._nodes_ids = ids
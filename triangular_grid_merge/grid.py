@@ -1,8 +1,13 @@
 """Module describes triangular grid."""
+import numpy as np
+
 from .node import Node
 from .edge import Edge
 from .face import Face
 from .zone import Zone
+from .merge_index import MergeIndex
+from .locator import Locator
+from . import reorder
 from math import fabs
 
 
@@ -12,25 +17,554 @@ class Grid:
     def __init__(self):
         """
         Grid constructor.
+
+        The grid is stored in the array tables:
+
+            `coordinates` - (N, 2) float64 array of nodes' x, y.
+
+            `face_nodes` - (F, 3) int32 array of ids of the face's nodes.
+
+            `edge_nodes` - (E, 2) int32 array of ids of the edge's nodes.
+
+            `edge_faces` - (E, 2) int32 array of ids of the edge's faces,
+            -1 if the edge belongs to a single face.
+
+        Node, Edge and Face objects are views of the tables created on demand
+        when grid.Nodes, grid.Edges or grid.Faces are accessed.
+        Coordinates of the nodes, nodes of the faces, nodes and faces of the edges
+        are written into the tables when they are set, see `write_node`.
+        If objects are added or removed, call `pack` to fill the tables again.
         """
-        self.Faces = list()
-        self.Edges = list()
-        self.Nodes = list()
+        self.coordinates = None
+        self.face_nodes = None
+        self.edge_nodes = None
+        self.edge_faces = None
+
+        self._nodes = None
+        self._edges = None
+        self._faces = None
+
+        # Node to face and node to edge adjacency of the tables
+        # in compressed form, see `adjacency`.
+        self.node_faces = None
+        self.node_edges = None
+
         self.Zones = list()
 
-    def init(self, xn, yn, x, y):
+        # Index of nodes and edges kept between calls of `add_zone`.
+        self.merge_index = None
+
+        # Index of faces and nodes to locate points, see `build_locator`.
+        self.locator = None
+
+        # Bounding box and order of the nodes kept between zones merged
+        # by the algorithm auto, see `auto.GridFeatures`.
+        self.auto_features = None
+
+    @property
+    def Nodes(self):
         """
-        The initialization of the grid is done in the next steps:
+        List of grid's nodes created from the tables on first access.
+        """
+        if self._nodes is None:
+            self.build_objects()
+        return self._nodes
 
-            1. Calculate the number of nodes, faces and edges basing on
-            the number of points by axis.
+    @Nodes.setter
+    def Nodes(self, nodes):
+        self._nodes = nodes
 
-            2. Initialize the elements' ids.
+    @property
+    def Edges(self):
+        """
+        List of grid's edges created from the tables on first access.
+        """
+        if self._edges is None:
+            self.build_objects()
+        return self._edges
 
-            3. Initialize Zone 1 - make all nodes and faces belong to zone 1
-            of the grid.
+    @Edges.setter
+    def Edges(self, edges):
+        self._edges = edges
+
+    @property
+    def Faces(self):
+        """
+        List of grid's faces created from the tables on first access.
+        """
+        if self._faces is None:
+            self.build_objects()
+        return self._faces
+
+    @Faces.setter
+    def Faces(self, faces):
+        self._faces = faces
+
+    def build_objects(self):
+        """
+        Create Node, Edge and Face objects from the array tables
+        and link them with each other and with the zones.
+        """
+        nodes = list()
+        edges = list()
+        faces = list()
+
+        # Adjacency is built again from the current tables.
+        self.node_faces = None
+        self.node_edges = None
+
+        if self.coordinates is not None:
+            for i, (x, y) in enumerate(self.coordinates.tolist()):
+                n = Node()
+                n.Id = i
+                n.x = x
+                n.y = y
+                n.grid = self
+                nodes.append(n)
+
+        if self.face_nodes is not None:
+            for i, (a, b, c) in enumerate(self.face_nodes.tolist()):
+                f = Face()
+                f.Id = i
+                f.nodes = (nodes[a], nodes[b], nodes[c])
+                f.grid = self
+                faces.append(f)
+
+        if self.edge_nodes is not None:
+            for i, ((a, b), fids) in enumerate(zip(self.edge_nodes.tolist(), self.edge_faces.tolist())):
+                e = Edge()
+                e.Id = i
+                e.nodes = (nodes[a], nodes[b])
+                e.faces = tuple(faces[j] for j in fids if j != -1)
+                e.grid = self
+                edges.append(e)
+
+            if self.face_nodes is not None:
+                for f, ids in zip(faces, self.face_edges().tolist()):
+                    f.edges = tuple(edges[j] for j in ids if j != -1)
+
+        self._nodes = nodes
+        self._edges = edges
+        self._faces = faces
+
+        for z in self.Zones:
+            if z.grid is self and z.node_ids is not None:
+                z.Nodes = [nodes[i] for i in z.node_ids.tolist()]
+                z.Faces = [faces[i] for i in z.face_ids.tolist()]
+
+    def face_edges(self):
+        """
+        Edges of the sides (n1 n2), (n2 n3), (n3 n1) of each face.
+
+        Sides are found among the edges by the sorted pair of nodes' ids
+        like in `build_edges`.
+
+        :return: (F, 3) int64 array of ids of the edges, -1 for a side with no edge.
+        """
+        count = len(self.coordinates) + 1
+        sides = self.face_nodes[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+        keys = sides.min(axis=1).astype(np.int64) * count + sides.max(axis=1)
+
+        if not len(self.edge_nodes):
+            return np.full((len(self.face_nodes), 3), -1, dtype=np.int64)
+
+        edge_keys = self.edge_nodes.min(axis=1).astype(np.int64) * count + self.edge_nodes.max(axis=1)
+        order = np.argsort(edge_keys)
+        sorted_keys = edge_keys[order]
+
+        found = np.minimum(np.searchsorted(sorted_keys, keys), len(order) - 1)
+        return np.where(sorted_keys[found] == keys, order[found], -1).reshape(-1, 3)
+
+    @staticmethod
+    def adjacency(table, count):
+        """
+        Invert the table of elements' items into compressed sparse rows.
+
+        Ids of the elements of the item i are ids[offsets[i]: offsets[i + 1]]
+        in ascending order. Items equal to -1 are skipped.
+
+        :param table: (M, k) array of items of each element,
+        e.g. grid.face_nodes or grid.edge_faces.
+        :param count: number of items.
+        :return: tuple (ndarray (count + 1,), ndarray): offsets and ids of elements.
+        """
+        items = table.ravel()
+        elements = np.arange(len(items)) // table.shape[1]
+
+        present = items != -1
+        items = items[present]
+        elements = elements[present]
+
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(items, minlength=count), out=offsets[1:])
+
+        return offsets, elements[np.argsort(items, kind='stable')].astype(np.int32)
+
+    def adjacent_faces(self, i):
+        """
+        List of faces of the node i taken from the tables.
+
+        :param i: node's id.
+        """
+        if self.node_faces is None:
+            self.node_faces = self.adjacency(self.face_nodes, len(self.coordinates))
+        offsets, ids = self.node_faces
+        return [self.Faces[j] for j in ids[offsets[i]: offsets[i + 1]].tolist()]
+
+    def adjacent_edges(self, i):
+        """
+        List of edges of the node i taken from the tables.
+
+        :param i: node's id.
+        """
+        if self.node_edges is None:
+            self.node_edges = self.adjacency(self.edge_nodes, len(self.coordinates))
+        offsets, ids = self.node_edges
+        return [self.Edges[j] for j in ids[offsets[i]: offsets[i + 1]].tolist()]
+
+    def drop_objects(self):
+        """
+        Forget Node, Edge and Face objects of the grid and its zones,
+        so they are created from the tables again on demand.
+
+        The forgotten objects no longer write their changes into the tables.
+        """
+        for objects in (self._nodes, self._edges, self._faces):
+            for o in objects or ():
+                o.grid = None
+
+        self._nodes = None
+        self._edges = None
+        self._faces = None
+
+        self.node_faces = None
+        self.node_edges = None
+
+        for z in self.Zones:
+            if z.grid is self and z.node_ids is not None:
+                z.Nodes = None
+                z.Faces = None
+
+    def append_nodes(self, points):
+        """
+        Append nodes to grid.coordinates.
+
+        If Node objects were created, the objects of the new nodes are appended
+        to grid.Nodes, so the objects are not created again from the tables.
+
+        :param points: (n, 2) array of coordinates of the new nodes.
+        """
+        count = len(self.coordinates)
+        self.coordinates = np.concatenate((self.coordinates, points))
+
+        if self._nodes is not None:
+            for i, (x, y) in enumerate(points.tolist(), count):
+                n = Node()
+                n.Id = i
+                n.x = x
+                n.y = y
+                n.grid = self
+                self._nodes.append(n)
+
+        # Adjacency of the new number of nodes is built on demand.
+        self.node_faces = None
+        self.node_edges = None
+
+    def renumber_nodes(self, new_ids):
+        """
+        Give new ids to the nodes in the tables of faces, edges and zones.
+
+        Coordinates should be reordered by the caller.
+
+        :param new_ids: array: new_ids[i] is the new id of the node i.
+        """
+        if self.face_nodes is not None:
+            self.face_nodes = new_ids[self.face_nodes]
+        if self.edge_nodes is not None:
+            self.edge_nodes = new_ids[self.edge_nodes]
+
+        for z in self.Zones:
+            if z.grid is self and z.node_ids is not None:
+                z.node_ids = new_ids[z.node_ids]
+
+    def reorder(self, method='hilbert'):
+        """
+        Renumber nodes and faces, so elements close in the grid get close ids.
+
+        Nodes are numbered along the Hilbert curve ('hilbert') or in reverse
+        Cuthill-McKee order ('rcm'), faces are sorted by their nodes' new ids,
+        see `reorder`. Edges are built again in order of the new faces.
+        Zones keep their nodes and faces under the new ids.
+
+        :param method: 'hilbert' or 'rcm'.
+        :return: tuple (ndarray, ndarray): node_order and face_order,
+        the old ids of the new nodes and faces: node k was node_order[k].
+        """
+        # Grids assembled from objects only have no tables yet.
+        if self.coordinates is None:
+            self.pack()
+        self.drop_objects()
+
+        if method == 'hilbert':
+            node_order = reorder.hilbert_order(self.coordinates)
+        elif method == 'rcm':
+            if self.edge_nodes is None:
+                self.build_edges()
+            node_order = reorder.rcm_order(self.edge_nodes, len(self.coordinates))
+        else:
+            raise Exception('Reorder method must be hilbert or rcm.')
+
+        new_ids = np.empty(len(node_order), dtype=np.int32)
+        new_ids[node_order] = np.arange(len(node_order), dtype=np.int32)
+
+        self.coordinates = self.coordinates[node_order]
+        self.renumber_nodes(new_ids)
+
+        face_order = reorder.face_order(self.face_nodes)
+        new_face_ids = np.empty(len(face_order), dtype=np.int32)
+        new_face_ids[face_order] = np.arange(len(face_order), dtype=np.int32)
+
+        self.face_nodes = self.face_nodes[face_order]
+        for z in self.Zones:
+            if z.grid is self and z.face_ids is not None:
+                z.face_ids = new_face_ids[z.face_ids]
+
+        if self.edge_nodes is not None:
+            self.build_edges()
+
+        # The index refers to the old ids.
+        self.merge_index = None
+
+        return node_order, face_order
+
+    def build_edges(self):
+        """
+        Create the edges of the faces in grid.edge_nodes and grid.edge_faces.
+
+        Sides of the faces (n1 n2), (n2 n3), (n3 n1) are keyed by the sorted pair
+        of nodes' ids. Equal keys are found by one sort, so the edges of all
+        faces are created at once.
+
+        Edges are numbered in order of the first appearance going face
+        by face, and keep the direction of the side where they appear first.
+        """
+        faces = np.empty((0, 3), dtype=np.int32) if self.face_nodes is None else self.face_nodes
+
+        sides = np.stack((faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]), axis=1).reshape(-1, 2)
+        keys = sides.min(axis=1).astype(np.int64) * (len(self.coordinates) + 1) + sides.max(axis=1)
+
+        _, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+
+        if len(counts) and counts.max() > 2:
+            raise Exception('The edge is linked to the maximum number of faces.')
+
+        # Number the edges by the first appearance.
+        order = np.argsort(first)
+        number = np.empty(len(order), dtype=np.int64)
+        number[order] = np.arange(len(order))
+        edges = number[inverse.reshape(-1)]
+
+        # Sides grouped by edges with the first appearance at the head of each group.
+        grouped = np.argsort(edges, kind='stable')
+        starts = np.cumsum(counts[order]) - counts[order]
+
+        self.edge_nodes = sides[first[order]].astype(np.int32)
+        self.edge_faces = np.full((len(order), 2), -1, dtype=np.int32)
+        self.edge_faces[:, 0] = first[order] // 3
+
+        shared = counts[order] == 2
+        self.edge_faces[shared, 1] = grouped[starts[shared] + 1] // 3
+
+    def add_zone(self, nodes, faces):
+        """
+        Merge a zone into the grid.
+
+        Nodes of the zone lying no farther than EPS from the grid's nodes are merged
+        with them like `sorted_batch` does, the rest are appended. Ids of the existing
+        nodes, faces and edges do not change.
 
-            4. Initialize the coordinates of nodes basing on the given
+        The index of nodes and edges is kept between calls, so a zone is merged
+        and its edges are linked in time proportional to the size of the zone
+        (up to the logarithm), see `merge_index`. The index is built again if the
+        tables were replaced since the last call.
+
+        :param nodes: (n, 2) array of coordinates of the zone's nodes.
+        :param faces: (f, 3) array of 0-based zone-local ids of faces' nodes.
+        :return: Zone object added to grid.Zones.
+        """
+        # The locator of the current tables indexes only the zone's faces and nodes.
+        # It is checked first as the merge index moves the same rows into its own tables.
+        locator = self.locator if self.locator is not None and self.locator.is_valid() else None
+
+        if self.merge_index is None or not self.merge_index.is_valid():
+            self.merge_index = MergeIndex(self)
+
+        zone = self.merge_index.add_zone(nodes, faces)
+
+        if locator is not None:
+            locator.update()
+
+        # Objects are created from the new tables on demand.
+        if self._nodes is not None:
+            self.drop_objects()
+        self.node_faces = None
+        self.node_edges = None
+
+        return zone
+
+    def build_locator(self):
+        """
+        Index the faces and nodes to locate points, see `locator`.
+
+        The index is kept and built again only if the tables were replaced
+        since, e.g. by read_tecplot or reorder. Zones added by `add_zone`
+        are indexed incrementally.
+
+        :return: Locator object.
+        """
+        if self.locator is None or not self.locator.is_valid():
+            self.locator = Locator(self)
+        return self.locator
+
+    def locate_faces(self, points):
+        """
+        Find the face containing each point, see `Locator.locate_faces`.
+
+        :param points: (n, 2) array of coordinates.
+        :return: tuple (ndarray (n,), ndarray (n, 3)): ids of the faces (-1 outside the grid)
+        and barycentric coordinates of the points by the faces' nodes.
+        """
+        return self.build_locator().locate_faces(points)
+
+    def nearest_nodes(self, points):
+        """
+        Find the node nearest to each point, see `Locator.nearest_nodes`.
+
+        :param points: (n, 2) array of coordinates.
+        :return: tuple (ndarray (n,), ndarray (n,)): ids of the nodes and distances to them.
+        """
+        return self.build_locator().nearest_nodes(points)
+
+    def write_node(self, node):
+        """
+        Write the coordinates of the node object into grid.coordinates.
+
+        Called when the coordinates of a node created from the tables are set.
+        Indexes of the nodes are built again on demand.
+
+        :param node: Node object of the grid.
+        """
+        self.coordinates[node.Id] = (node.x, node.y)
+        self.merge_index = None
+        self.locator = None
+        self.auto_features = None
+
+    def write_face(self, face):
+        """
+        Write the nodes of the face object into grid.face_nodes.
+
+        Called when the nodes of a face created from the tables are set.
+
+        :param face: Face object of the grid.
+        """
+        self.face_nodes[face.Id] = [n.Id for n in face.nodes]
+        self.node_faces = None
+        self.merge_index = None
+        self.locator = None
+
+    def write_edge(self, edge):
+        """
+        Write the nodes and faces of the edge object into grid.edge_nodes and grid.edge_faces.
+
+        Called when the nodes or faces of an edge created from the tables are set.
+
+        :param edge: Edge object of the grid.
+        """
+        self.edge_nodes[edge.Id] = [n.Id for n in edge.nodes]
+        self.edge_faces[edge.Id] = [f.Id for f in edge.faces] + [-1] * (2 - len(edge.faces))
+        self.node_edges = None
+        self.merge_index = None
+
+    def pack(self):
+        """
+        Fill the array tables from Node, Edge and Face objects.
+
+        Changes of the objects created from the tables are written into them
+        as they are made. Call it after objects were added to or removed from
+        the lists, e.g. for a grid assembled from objects only. The objects
+        write their changes into the new tables then.
+        Does nothing if the objects were not created.
+        """
+        if self._nodes is None:
+            return
+
+        self.init_ids()
+
+        self.coordinates = np.array([(n.x, n.y) for n in self.Nodes], dtype=np.float64).reshape(-1, 2)
+        self.face_nodes = np.array([[n.Id for n in f.nodes] for f in self.Faces], dtype=np.int32).reshape(-1, 3)
+        self.edge_nodes = np.array([[n.Id for n in e.nodes] for e in self.Edges], dtype=np.int32).reshape(-1, 2)
+        self.edge_faces = np.array([[f.Id for f in e.faces] + [-1] * (2 - len(e.faces)) for e in self.Edges],
+                                   dtype=np.int32).reshape(-1, 2)
+
+        for objects in (self.Nodes, self.Edges, self.Faces):
+            for o in objects:
+                o.grid = self
+
+        for z in self.Zones:
+            # Zones of other grids keep their ids.
+            if z.Nodes is None or z.grid not in (None, self):
+                continue
+            z.grid = self
+            z.node_ids = np.array([n.Id for n in z.Nodes], dtype=np.int32)
+            z.face_ids = np.array([f.Id for f in z.Faces], dtype=np.int32)
+
+    def zone_arrays(self, zone):
+        """
+        Coordinates and connectivity of the zone in zone-local numbering.
+
+        If a grid node occurs in the zone several times, faces refer to
+        its first occurrence.
+
+        The zone may belong to another grid, e.g. appended to grid.Zones from it.
+        Its arrays are taken from the tables of that grid then, or from the zone's
+        objects if that grid is assembled from objects only.
+
+        :param zone: Zone object.
+        :return: tuple (ndarray (n, 2), ndarray (f, 3)): coordinates and
+        0-based connectivity list of the zone.
+        """
+        grid = self if zone.grid is None else zone.grid
+        if grid is not self and (grid.coordinates is None or zone.node_ids is None):
+            return self.object_arrays(zone.Nodes, zone.Faces)
+
+        ids = zone.node_ids
+        local = np.empty(len(grid.coordinates), dtype=np.int32)
+        local[ids[::-1]] = np.arange(len(ids) - 1, -1, -1, dtype=np.int32)
+        return grid.coordinates[ids], local[grid.face_nodes[zone.face_ids]]
+
+    @staticmethod
+    def object_arrays(nodes, faces):
+        """
+        Coordinates and connectivity of Node and Face objects in the numbering of the list of nodes.
+
+        :param nodes: list of Node objects.
+        :param faces: list of Face objects with nodes from the list.
+        :return: tuple (ndarray (n, 2), ndarray (f, 3)): coordinates and
+        0-based connectivity list, faces refer to the first occurrence of a node.
+        """
+        local = dict()
+        for k, n in enumerate(nodes):
+            local.setdefault(n, k)
+
+        coordinates = np.array([(n.x, n.y) for n in nodes], dtype=np.float64).reshape(-1, 2)
+        face_nodes = np.array([[local[n] for n in f.nodes] for f in faces], dtype=np.int32).reshape(-1, 3)
+        return coordinates, face_nodes
+
+    def init(self, xn, yn, x, y):
+        """
+        The initialization of the grid is done in the next steps:
+
+            1. Initialize the coordinates of nodes basing on the given
             coordinates of rectangular to put the grid inside it.
 
                          +--------o (x2, y2)
@@ -39,7 +573,13 @@ class Grid:
                          |        |
                 (x1, y1) o--------+
 
-            5. Triangulate the grid.
+            2. Triangulate the grid filling the tables of faces and edges.
+
+            3. Initialize Zone 1 - make all nodes and faces belong to zone 1
+            of the grid.
+
+        All steps work with whole arrays. Node, Edge and Face objects
+        are created from the tables when they are accessed.
 
         :param xn: number of points by x-axis.
         :param yn: number of points by y-axis.
@@ -51,19 +591,13 @@ class Grid:
         assert x[0] < x[1], 'The second point should be x1 < x2'
         assert y[0] < y[1], 'The second point should be y1 < y2'
 
-        num_nodes = self.number_of_nodes(xn, yn)
-        num_edges = self.number_of_edges(xn, yn)
-        num_faces = self.number_of_faces(xn, yn)
+        self.init_coordinates(xn, yn, x, y)
 
-        self.init_element_arrays(num_nodes, num_edges, num_faces)
+        self.triangulation(xn, yn)
 
         self.init_zone()
 
-        self.init_coordinates(xn, yn, x, y)
-
-        self.init_ids()
-
-        self.triangulation(xn, yn)
+        self.drop_objects()
 
     def init_ids(self):
         """
@@ -110,14 +644,45 @@ class Grid:
         :param x: tuple (x1, x2): x-coord. of the rect.
         :param y: tuple (y1, y2): y-coord. of the rect.
         """
-        size_x = fabs(x[0] - x[1]) / (xn - 1)
-        size_y = fabs(y[0] - y[1]) / (yn - 1)
-
         # Init coordinates.
-        for j in range(yn):
-            for i in range(xn):
-                self.Nodes[j * xn + i].x = x[0] + i * size_x
-                self.Nodes[j * xn + i].y = y[0] + j * size_y
+        self.coordinates = np.empty((self.number_of_nodes(xn, yn), 2), dtype=np.float64)
+        self.coordinates[:, 0] = np.tile(self.structured_axis(xn, x), yn)
+        self.coordinates[:, 1] = np.repeat(self.structured_axis(yn, y), xn)
+
+    @staticmethod
+    def structured_axis(n, a):
+        """
+        Coordinates of points along an axis of the structured grid.
+
+        :param n: number of points.
+        :param a: tuple (a1, a2) of the ends of the segment.
+        :return: array of n coordinates.
+        """
+        return a[0] + np.arange(n) * (fabs(a[0] - a[1]) / (n - 1))
+
+    @staticmethod
+    def structured_faces(xn, first, last):
+        """
+        Faces of the rows of squares first..last - 1 of the structured grid.
+
+        Faces fu, fd of the square in row i and column j have ids
+        2 * (j + i * (xn - 1)) and 2 * (j + i * (xn - 1)) + 1.
+
+        :param xn: number of points by x-axis.
+        :param first: first row of squares.
+        :param last: row of squares after the last one.
+        :return: (F, 3) array of 0-based ids of faces' nodes.
+        """
+        sx = xn - 1
+        nul = (np.arange(first, last)[:, None] * xn + np.arange(sx)).ravel()
+        nur = nul + 1
+        ndl = nul + xn
+        ndr = ndl + 1
+
+        face_nodes = np.empty((2 * len(nul), 3), dtype=np.int32)
+        face_nodes[0::2] = np.stack((nul, ndl, nur), axis=1)
+        face_nodes[1::2] = np.stack((ndr, nur, ndl), axis=1)
+        return face_nodes
 
     def init_zone(self):
         """
@@ -126,8 +691,9 @@ class Grid:
         Makes all elements of the grid belong to zone 1.
         """
         z = Zone()
-        z.Nodes = self.Nodes
-        z.Faces = self.Faces
+        z.grid = self
+        z.node_ids = np.arange(len(self.coordinates), dtype=np.int32)
+        z.face_ids = np.arange(len(self.face_nodes), dtype=np.int32)
         self.Zones.append(z)
 
     def triangulation(self, xn, yn):
@@ -145,62 +711,53 @@ class Grid:
                     |/          fd|
                     *-------------*
                    ndl   ed     ndr
+
+        Faces are numbered square by square, see structured_faces.
+
+        Edges go in three groups: horizontal edges row by row,
+        vertical edges row by row, diagonal edges square by square.
         """
         sx = xn - 1
         sy = yn - 1
 
-        ehn = sx * yn
-        evn = sy * xn
-
-        for i in range(sy):
-            for j in range(0, sx):
-
-                # Take two faces.
-                fu = self.Faces[2 * (j + i * sx)]
-                fd = self.Faces[2 * (j + i * sx) + 1]
-
-                # Take three nodes for fu.
-                nul = self.Nodes[i * xn + j]
-                nur = self.Nodes[i * xn + j + 1]
-                ndl = self.Nodes[(i + 1) * xn + j]
-                ndr = self.Nodes[(i + 1) * xn + j + 1]
-
-                # Edges.
-                eu = self.Edges[i * sx + j]
-                ed = self.Edges[(i + 1) * sx + j]
-                el = self.Edges[ehn + i * xn + j]
-                er = self.Edges[ehn + i * xn + j + 1]
-                ec = self.Edges[ehn + evn + i * sx + j]
-
-                # Link nodes and face 1.
-                self.link_face_and_node(fu, nul)
-                self.link_face_and_node(fu, ndl)
-                self.link_face_and_node(fu, nur)
-
-                # Link nodes and face 2.
-                self.link_face_and_node(fd, ndr)
-                self.link_face_and_node(fd, nur)
-                self.link_face_and_node(fd, ndl)
-
-                # Link node and edges.
-                self.link_node_and_edge(nul, eu)
-                self.link_node_and_edge(nur, eu)
-                self.link_node_and_edge(nul, el)
-                self.link_node_and_edge(ndl, el)
-                self.link_node_and_edge(nur, ec)
-                self.link_node_and_edge(ndl, ec)
-
-                # For the bottom row of squares we add nodes in to the
-                # bottom edge.
-                if i == sy - 1:
-                    self.link_node_and_edge(ndl, ed)
-                    self.link_node_and_edge(ndr, ed)
-
-                # For the right column of squares we add nodes in to the
-                # right edge.
-                if j == sx - 1:
-                    self.link_node_and_edge(nur, er)
-                    self.link_node_and_edge(ndr, er)
+        self.face_nodes = self.structured_faces(xn, 0, sy)
+
+        # Horizontal edges: fd of the square above and fu of the square below.
+        r = np.repeat(np.arange(yn), sx)
+        c = np.tile(np.arange(sx), yn)
+        left = r * xn + c
+        horizontal = np.stack((left, left + 1), axis=1)
+        horizontal_faces = self.edge_pair(np.where(r > 0, 2 * (c + (r - 1) * sx) + 1, -1),
+                                          np.where(r < sy, 2 * (c + r * sx), -1))
+
+        # Vertical edges: fd of the square to the left and fu of the square to the right.
+        r = np.repeat(np.arange(sy), xn)
+        c = np.tile(np.arange(xn), sy)
+        top = r * xn + c
+        vertical = np.stack((top, top + xn), axis=1)
+        vertical_faces = self.edge_pair(np.where(c > 0, 2 * (c - 1 + r * sx) + 1, -1),
+                                        np.where(c < sx, 2 * (c + r * sx), -1))
+
+        # Diagonal edges (nur, ndl) are shared by fu and fd of the square.
+        diagonal = self.face_nodes[0::2, 2:0:-1]
+        diagonal_faces = np.arange(len(self.face_nodes)).reshape(-1, 2)
+
+        self.edge_nodes = np.concatenate((horizontal, vertical, diagonal)).astype(np.int32)
+        self.edge_faces = np.concatenate((horizontal_faces, vertical_faces, diagonal_faces)).astype(np.int32)
+
+    @staticmethod
+    def edge_pair(first, second):
+        """
+        Put the faces of edges in order: the face with less id first,
+        -1 last for an edge with a single face.
+
+        :param first: array of ids of faces with less id or -1.
+        :param second: array of ids of other faces or -1.
+        :return: (E, 2) array.
+        """
+        return np.where((first == -1)[:, None],
+                        np.stack((second, first), axis=1),
+                        np.stack((first, second), axis=1))
 
     @staticmethod
     def link_face_and_node(f, n):
@@ -212,7 +769,7 @@ class Grid:
         if len(f.nodes) == 3:
             raise Exception('The face is linked to the maximum number of nodes.')
         n.faces.append(f)
-        f.nodes.append(n)
+        f.nodes += (n,)
 
     @staticmethod
     def link_node_and_edge(n, e):
@@ -221,10 +778,10 @@ class Grid:
         :param n: node.
         :param e: edge.
         """
-        if len(e.nodes) == 3:
+        if len(e.nodes) == 2:
             raise Exception('The edge is linked to the maximum number of nodes.')
         n.edges.append(e)
-        e.nodes.append(n)
+        e.nodes += (n,)
 
     @staticmethod
     def link_face_and_edge(f, e):
@@ -235,8 +792,8 @@ class Grid:
         """
         if len(e.faces) == 2:
             raise Exception('The edge is linked to the maximum number of faces.')
-        f.edges.append(e)
-        e.faces.append(f)
+        f.edges += (e,)
+        e.faces += (f,)
 
     @staticmethod
     def number_of_edges(xn, yn):
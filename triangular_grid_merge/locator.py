@@ -0,0 +1,519 @@
+"""
+Module provides the spatial index of a grid to locate points.
+
+    locator = grid.build_locator()
+    faces, barycentric = locator.locate_faces(points)
+    nodes, distances = locator.nearest_nodes(points)
+
+The plane is divided into square cells of a quadtree: the cells of the
+lowest level have the side about the size of a face, a cell of the level
+k + 1 joins 2 x 2 cells of the level k.
+
+Each face is kept once, at the lowest level where its bounding box covers
+at most 2 x 2 cells, in the cell of the lower left corner of the box.
+So a point is compared only with the faces kept in its cell and the three
+cells below and to the left of it at each level, and the memory grows with
+the number of faces on graded grids too.
+
+Cells of the nodes make a quadtree as well, its top level has at
+most 2 x 2 cells. The nearest node is searched for from the top down:
+each cell keeps one of its nodes, and the cells farther from the point
+than the nearest of these nodes are dropped at each level, the nodes of
+the remaining cells of the lowest level are compared with the point.
+
+Cells are kept in sorted segments like in `merge_index`, so the faces and
+nodes of zones added by `Grid.add_zone` are indexed without sorting the
+whole grid again.
+"""
+import numpy as np
+
+# Barycentric coordinates not less than -TOLERANCE mean the point is inside the face.
+TOLERANCE = 1e-9
+
+# Number of points searched for at once, it bounds the memory used.
+CHUNK = 1 << 16
+
+# Cells are keyed by their indexes shifted by CELL_OFFSET, so keys of different cells differ.
+CELL_OFFSET = 1 << 31
+CELL_KEY = 1 << 32
+
+# Children of a cell of the quadtree by x and y.
+CHILDREN = np.array([(0, 0), (0, 1), (1, 0), (1, 1)], dtype=np.int64)
+
+# Cells keeping the faces which may contain a point of the cell (0, 0) of their level.
+CORNERS = -CHILDREN
+
+
+class CellBuckets:
+    __doc__ = "Ids of items by cells in segments of sorted keys."
+
+    def __init__(self, distinct=False):
+        """
+        :param distinct: keep only the first item of each cell.
+        """
+        self.distinct = distinct
+
+        # Tuples (sorted keys of cells, ids of items).
+        self.segments = list()
+
+    @staticmethod
+    def keys(cx, cy):
+        """
+        Key the cells by their indexes.
+
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :return: int64 array of keys.
+        """
+        return (cx + CELL_OFFSET) * CELL_KEY + (cy + CELL_OFFSET)
+
+    def add(self, cx, cy, ids):
+        """
+        Put the items into the cells.
+
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :param ids: int64 array of ids of the items.
+        """
+        if not len(ids):
+            return
+        self.segments.append(self.sort(self.keys(cx, cy), ids))
+
+        while len(self.segments) > 1 and len(self.segments[-2][0]) <= 2 * len(self.segments[-1][0]):
+            last_keys, last_ids = self.segments.pop()
+            previous_keys, previous_ids = self.segments.pop()
+            self.segments.append(self.sort(np.concatenate((previous_keys, last_keys)),
+                                           np.concatenate((previous_ids, last_ids))))
+
+    def sort(self, keys, ids):
+        """
+        Sort the keys and the ids by them.
+
+        :return: tuple (keys, ids).
+        """
+        if self.distinct:
+            keys, first = np.unique(keys, return_index=True)
+            return keys, ids[first]
+        order = np.argsort(keys, kind='stable')
+        return keys[order], ids[order]
+
+    def first(self, cx, cy):
+        """
+        An item of each cell.
+
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :return: int64 array of ids, -1 for the empty cells.
+        """
+        keys = self.keys(cx, cy)
+        found = np.full(len(keys), -1, dtype=np.int64)
+
+        # Sorted keys are searched for much faster.
+        order = np.argsort(keys)
+        keys = keys[order]
+
+        for segment_keys, ids in self.segments:
+            c = np.minimum(np.searchsorted(segment_keys, keys), len(segment_keys) - 1)
+            hit = segment_keys[c] == keys
+            found[order[hit]] = ids[c[hit]]
+        return found
+
+    def find(self, cx, cy):
+        """
+        Items of the cells.
+
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :return: tuple (ndarray, ndarray): positions of the cells in cx, cy
+        and ids of their items.
+        """
+        keys = self.keys(cx, cy)
+        cells = list()
+        items = list()
+
+        # Sorted keys are searched for much faster.
+        order = np.argsort(keys)
+        keys = keys[order]
+
+        for segment_keys, ids in self.segments:
+            starts = np.searchsorted(segment_keys, keys, side='left')
+            counts = np.searchsorted(segment_keys, keys, side='right') - starts
+            total = int(counts.sum())
+            shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            cells.append(np.repeat(order, counts))
+            items.append(ids[shift + np.arange(total)])
+
+        if not cells:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(cells), np.concatenate(items)
+
+    def items(self):
+        """
+        Cells and ids of all items.
+
+        :return: tuple (ndarray, ndarray, ndarray): cells' indexes by x and y and ids of the items.
+        """
+        keys = np.concatenate([np.empty(0, dtype=np.int64)] + [k for k, _ in self.segments])
+        ids = np.concatenate([np.empty(0, dtype=np.int64)] + [i for _, i in self.segments])
+
+        # Keys wrap around int64, their bits are the shifted indexes.
+        bits = keys.view(np.uint64)
+        cx = (bits >> np.uint64(32)).astype(np.int64) - CELL_OFFSET
+        cy = (bits & np.uint64(CELL_KEY - 1)).astype(np.int64) - CELL_OFFSET
+        return cx, cy, ids
+
+
+class Locator:
+    __doc__ = "Index of faces and nodes of a grid by square cells."
+
+    def __init__(self, grid):
+        """
+        Index the faces and nodes of the grid.
+
+        :param grid: Grid object with the tables.
+        """
+        if grid.coordinates is None:
+            grid.pack()
+
+        self.grid = grid
+        self.side = self.cell_side(grid.coordinates, grid.face_nodes)
+
+        # Faces kept at each level of the quadtree.
+        self.faces = list()
+
+        # Levels of the quadtree of the nodes, the lowest one keeps all nodes
+        # and the others a node of each cell.
+        self.levels = [CellBuckets()]
+
+        # Bounds of the nodes' cells by x and y.
+        self.low = None
+        self.high = None
+
+        # Numbers of indexed faces and nodes, the rest are added by `update`.
+        self.face_count = 0
+        self.node_count = 0
+        self.update()
+
+    @staticmethod
+    def cell_side(coordinates, face_nodes):
+        """
+        Side of the cells of the lowest level: the median size of the faces'
+        bounding boxes or the mean distance between nodes if there are no faces.
+
+        The median is taken of at most CHUNK faces evenly spread over the table.
+        """
+        if face_nodes is not None and len(face_nodes):
+            lo, hi = Locator.boxes(coordinates, face_nodes[::max(1, len(face_nodes) // CHUNK)])
+            size = (hi - lo).max(axis=1)
+            side = float(np.median(size))
+        elif coordinates is not None and len(coordinates) > 1:
+            span = coordinates.max(axis=0) - coordinates.min(axis=0)
+            side = float(np.sqrt(np.prod(span) / len(coordinates)) or span.max())
+        else:
+            side = 0.0
+        return side if side > 0 else 1.0
+
+    @staticmethod
+    def boxes(coordinates, face_nodes):
+        """
+        Bounding boxes of the faces.
+
+        :param coordinates: (N, 2) array of the nodes.
+        :param face_nodes: (F, 3) array of the faces' nodes.
+        :return: tuple (ndarray (F, 2), ndarray (F, 2)): lower left and upper right corners.
+        """
+        a, b, c = (coordinates[face_nodes[:, k]] for k in range(3))
+        return np.minimum(np.minimum(a, b), c), np.maximum(np.maximum(a, b), c)
+
+    def is_valid(self):
+        """
+        Whether the tables of the grid were not replaced since the last update.
+        """
+        return self.grid.coordinates is self.tables[0] and self.grid.face_nodes is self.tables[1]
+
+    def update(self):
+        """
+        Index the faces and nodes appended to the tables since the last update.
+        """
+        grid = self.grid
+        coordinates = np.empty((0, 2), dtype=np.float64) if grid.coordinates is None else grid.coordinates
+        face_nodes = np.empty((0, 3), dtype=np.int32) if grid.face_nodes is None else grid.face_nodes
+
+        faces = face_nodes[self.face_count:]
+        if len(faces):
+            lo, hi = (self.cells(corner) for corner in self.boxes(coordinates, faces))
+
+            # The box spanning at most 2 ** k cells of the lowest level covers
+            # at most 2 x 2 cells of the level k.
+            span = (hi - lo).max(axis=1)
+            level = np.zeros(len(faces), dtype=np.int64)
+            level[span > 1] = np.ceil(np.log2(span[span > 1])).astype(np.int64)
+
+            for k in np.unique(level).tolist():
+                while len(self.faces) <= k:
+                    self.faces.append(CellBuckets())
+                at = np.flatnonzero(level == k)
+                self.faces[k].add(lo[at, 0] >> k, lo[at, 1] >> k, at + self.face_count)
+
+        points = coordinates[self.node_count:]
+        if len(points):
+            self.add_nodes(self.cells(points), np.arange(self.node_count, len(coordinates)))
+
+        self.face_count = len(face_nodes)
+        self.node_count = len(coordinates)
+        self.coordinates = coordinates
+        self.face_nodes = face_nodes
+        self.tables = (grid.coordinates, grid.face_nodes)
+
+    def add_nodes(self, cells, ids):
+        """
+        Put the nodes into the cells of all levels of the quadtree
+        and add the levels needed to cover the nodes by 2 x 2 top cells.
+
+        Each level gets a node of each cell from the cells of the level below,
+        so the upper levels sort fewer and fewer nodes.
+
+        :param cells: (n, 2) int64 array of the nodes' cells.
+        :param ids: int64 array of the nodes' ids.
+        """
+        low = cells.min(axis=0)
+        high = cells.max(axis=0)
+        self.low = low if self.low is None else np.minimum(self.low, low)
+        self.high = high if self.high is None else np.maximum(self.high, high)
+
+        cx, cy = cells[:, 0], cells[:, 1]
+        self.levels[0].add(cx, cy, ids)
+        for k in range(1, len(self.levels)):
+            cx, cy, ids = self.distinct(cx >> 1, cy >> 1, ids)
+            self.levels[k].add(cx, cy, ids)
+
+        # The new levels are made of the cells of the top level.
+        while np.any((self.high >> (len(self.levels) - 1)) - (self.low >> (len(self.levels) - 1)) > 1):
+            cx, cy, ids = self.levels[-1].items()
+            self.levels.append(CellBuckets(distinct=True))
+            self.levels[-1].add(cx >> 1, cy >> 1, ids)
+
+    @staticmethod
+    def distinct(cx, cy, ids):
+        """
+        An item of each cell.
+
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :param ids: int64 array of ids of the items.
+        :return: tuple (cx, cy, ids) of the distinct cells.
+        """
+        _, first = np.unique(CellBuckets.keys(cx, cy), return_index=True)
+        return cx[first], cy[first], ids[first]
+
+    def cells(self, points):
+        """
+        Cells containing the points.
+
+        :param points: (n, 2) array of coordinates.
+        :return: (n, 2) int64 array of cells' indexes by x and y.
+        """
+        return np.floor(points / self.side).astype(np.int64)
+
+    def locate_faces(self, points):
+        """
+        Find the face containing each point.
+
+        A point on the common side of faces gets the face with the least id.
+
+        :param points: (n, 2) array of coordinates.
+        :return: tuple (ndarray (n,), ndarray (n, 3)): ids of the faces, -1 for the points
+        outside the grid, and barycentric coordinates of the points by the faces' nodes
+        (point = l1 * node1 + l2 * node2 + l3 * node3), zeros for the points outside.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        found = np.full(len(points), -1, dtype=np.int64)
+        barycentric = np.zeros((len(points), 3), dtype=np.float64)
+
+        for start in range(0, len(points), CHUNK):
+            chunk = points[start: start + CHUNK]
+            cells = self.cells(chunk)
+
+            # The cell of the point and the cells below and to the left of it at each level.
+            query = list()
+            faces = list()
+            for k, level in enumerate(self.faces):
+                if not level.segments:
+                    continue
+                cx = (cells[:, 0] >> k)[None] + CORNERS[:, 0, None]
+                cy = (cells[:, 1] >> k)[None] + CORNERS[:, 1, None]
+                position, ids = level.find(cx.ravel(), cy.ravel())
+                query.append(position % len(chunk))
+                faces.append(ids)
+            query = np.concatenate([np.empty(0, dtype=np.int64)] + query)
+            faces = np.concatenate([np.empty(0, dtype=np.int64)] + faces)
+
+            a, b, c = (self.coordinates[self.face_nodes[faces, k]] for k in range(3))
+            p = chunk[query]
+            det = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                l2 = ((p[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (p[:, 1] - a[:, 1])) / det
+                l3 = ((b[:, 0] - a[:, 0]) * (p[:, 1] - a[:, 1]) - (p[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])) / det
+            l1 = 1 - l2 - l3
+
+            # Degenerate faces give nan and contain nothing.
+            inside = (l1 >= -TOLERANCE) & (l2 >= -TOLERANCE) & (l3 >= -TOLERANCE)
+            query, faces = query[inside], faces[inside]
+            weights = np.stack((l1[inside], l2[inside], l3[inside]), axis=1)
+
+            # The least face id of each point.
+            order = np.lexsort((faces, query))
+            first = order[np.r_[True, query[order][1:] != query[order][:-1]]] if len(order) else order
+            found[start + query[first]] = faces[first]
+            barycentric[start + query[first]] = weights[first]
+
+        return found, barycentric
+
+    def nearest_nodes(self, points):
+        """
+        Find the node nearest to each point.
+
+        The search for a point starts from the lowest level where the cell of
+        the point has a node: the nearest node lies in the 5 x 5 cells around it.
+        Points outside the top cells start from all top cells.
+        Of equally near nodes the one with the least id is taken.
+
+        :param points: (n, 2) array of coordinates.
+        :return: tuple (ndarray (n,), ndarray (n,)): ids of the nodes and distances to them,
+        -1 and inf if the grid has no nodes.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        found = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+        if not self.node_count:
+            return found, distances
+
+        # Occupied cells of the top level.
+        top = len(self.levels) - 1
+        grid_x, grid_y = np.meshgrid(np.arange(self.low[0] >> top, (self.high[0] >> top) + 1),
+                                     np.arange(self.low[1] >> top, (self.high[1] >> top) + 1))
+        top_x, top_y = grid_x.ravel(), grid_y.ravel()
+        top_nodes = self.levels[top].first(top_x, top_y)
+        present = top_nodes >= 0
+        top_x, top_y, top_nodes = top_x[present], top_y[present], top_nodes[present]
+
+        block = np.stack(np.meshgrid(np.arange(-2, 3), np.arange(-2, 3)), axis=-1).reshape(-1, 2)
+
+        for start in range(0, len(points), CHUNK):
+            chunk = points[start: start + CHUNK]
+            cells = self.cells(chunk)
+
+            # Lowest level where the cell of the point has a node.
+            level = np.full(len(chunk), top + 1)
+            undecided = np.arange(len(chunk))
+            for k in range(top + 1):
+                occupied = self.levels[k].first(cells[undecided, 0] >> k, cells[undecided, 1] >> k) >= 0
+                level[undecided[occupied]] = k
+                undecided = undecided[~occupied]
+
+            remaining = list()
+            for k in range(top + 1, -1, -1):
+                query = np.flatnonzero(level == k)
+                if not len(query):
+                    continue
+                if k > top:
+                    cx = np.tile(top_x, len(query))
+                    cy = np.tile(top_y, len(query))
+                    nodes = np.tile(top_nodes, len(query))
+                    query = np.repeat(query, len(top_x))
+                    k = top
+                else:
+                    cx = np.repeat(cells[query, 0] >> k, len(block)) + np.tile(block[:, 0], len(query))
+                    cy = np.repeat(cells[query, 1] >> k, len(block)) + np.tile(block[:, 1], len(query))
+                    query = np.repeat(query, len(block))
+                    nodes = self.levels[k].first(cx, cy)
+                    present = nodes >= 0
+                    query, cx, cy, nodes = query[present], cx[present], cy[present], nodes[present]
+                remaining.append(self.descend(chunk, query, cx, cy, nodes, k))
+
+            query, cx, cy = (np.concatenate(a) for a in zip(*remaining))
+            cell, nodes = self.levels[0].find(cx, cy)
+            best, best_distance = self.closest(chunk, query[cell], nodes)
+            found[start: start + len(chunk)] = best
+            distances[start: start + len(chunk)] = best_distance
+
+        return found, distances
+
+    def descend(self, points, query, cx, cy, nodes, k):
+        """
+        Go down the quadtree from the cells of the level k to the lowest level
+        dropping the cells which cannot have the nearest node.
+
+        :param points: (n, 2) array of coordinates.
+        :param query: positions of the points of the cells in ascending order.
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :param nodes: ids of a node of each cell.
+        :param k: level of the cells.
+        :return: tuple (query, cx, cy) of the remaining cells of the lowest level.
+        """
+        while True:
+            query, cx, cy = self.prune(points, query, cx, cy, nodes, self.side * 2.0 ** k)
+            if k == 0:
+                return query, cx, cy
+
+            # Occupied children of the remaining cells.
+            query = np.repeat(query, len(CHILDREN))
+            cx = np.repeat(2 * cx, len(CHILDREN)) + np.tile(CHILDREN[:, 0], len(cx))
+            cy = np.repeat(2 * cy, len(CHILDREN)) + np.tile(CHILDREN[:, 1], len(cy))
+            k -= 1
+            nodes = self.levels[k].first(cx, cy)
+            present = nodes >= 0
+            query, cx, cy, nodes = query[present], cx[present], cy[present], nodes[present]
+
+    def prune(self, points, query, cx, cy, nodes, side):
+        """
+        Drop the cells which are farther from the point than the node
+        of another cell of the point.
+
+        :param points: (n, 2) array of coordinates.
+        :param query: positions of the points of the cells in ascending order.
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :param nodes: ids of a node of each cell.
+        :param side: side of the cells.
+        :return: tuple (query, cx, cy) of the remaining cells.
+        """
+        if not len(query):
+            return query, cx, cy
+
+        p = points[query]
+        low = np.stack((cx, cy), axis=1) * side
+        near = np.hypot(*np.maximum(np.maximum(low - p, p - low - side), 0).T)
+        distance = np.hypot(*(self.coordinates[nodes] - p).T)
+
+        # Cells of a point follow each other.
+        starts = np.flatnonzero(np.r_[True, query[1:] != query[:-1]])
+        bound = np.repeat(np.minimum.reduceat(distance, starts), np.diff(np.r_[starts, len(query)]))
+
+        # Margin for rounding of the cells' borders.
+        keep = near <= bound * (1 + TOLERANCE) + side * TOLERANCE
+        return query[keep], cx[keep], cy[keep]
+
+    def closest(self, points, query, nodes):
+        """
+        The nearest of the candidate nodes of each point.
+
+        :param points: (n, 2) array of coordinates.
+        :param query: positions of the points of the candidates.
+        :param nodes: ids of the candidate nodes.
+        :return: tuple (ndarray (n,), ndarray (n,)): ids of the nearest nodes
+        and distances to them, -1 and inf for the points without candidates.
+        """
+        best = np.full(len(points), -1, dtype=np.int64)
+        best_distance = np.full(len(points), np.inf)
+
+        distance = np.hypot(*(self.coordinates[nodes] - points[query]).T)
+
+        # The nearest candidate of each point with the least id.
+        order = np.lexsort((nodes, distance, query))
+        first = order[np.r_[True, query[order][1:] != query[order][:-1]]] if len(order) else order
+        best[query[first]] = nodes[first]
+        best_distance[query[first]] = distance[first]
+
+        return best, best_distance
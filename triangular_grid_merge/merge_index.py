@@ -0,0 +1,274 @@
+"""
+Module provides the index of a grid kept between merges of zones.
+
+`Grid.add_zone` merges zones one at a time. Sorting all nodes and edges
+of the grid for each zone would take time proportional to the grid,
+so the index keeps them in sorted segments:
+
+    a new segment is made of the nodes and edges added by a zone;
+
+    the last two segments are sorted together while the last but one
+    is not larger than twice the last one.
+
+So there are at most log2(N) segments, each node or edge is sorted
+again at most log2(N) times, and a zone is merged in time proportional
+to its size up to the logarithm.
+
+The tables of the grid are kept in arrays with spare space at the end,
+grid.coordinates and others are the filled parts of the arrays.
+"""
+import numpy as np
+
+from . import node_algorithms
+from .node_algorithms import CellIndex, merge_coordinates
+from .zone import Zone
+
+# Multiplier of the less node id in the key of the edge.
+EDGE_KEY = 1 << 32
+
+
+class NodeIndex:
+    __doc__ = "Index of points by segments of CellIndex."
+
+    def __init__(self):
+        # Tuples (CellIndex, id of its first point) in order of ids.
+        self.segments = list()
+
+        # Number of indexed points compared with the points searched for.
+        self.comparisons = 0
+
+    def add(self, points, start):
+        """
+        Index the points with ids start, start + 1 ...
+
+        :param points: (n, 2) array of coordinates.
+        :param start: id of the first point.
+        """
+        if not len(points):
+            return
+        self.segments.append((CellIndex(points), start))
+
+        while len(self.segments) > 1 and len(self.segments[-2][0].points) <= 2 * len(self.segments[-1][0].points):
+            last, _ = self.segments.pop()
+            previous, start = self.segments.pop()
+            self.segments.append((CellIndex(np.concatenate((previous.points, last.points))), start))
+
+    def first_match(self, points):
+        """
+        For each point find the indexed point with the least id
+        lying no farther than EPS by each coordinate.
+
+        :param points: (n, 2) array of coordinates.
+        :return: (n,) int64 array of ids, -1 where nothing is found.
+        """
+        found = np.full(len(points), -1, dtype=np.int64)
+        queries = np.arange(len(points))
+
+        # Segments hold increasing ids, so the first one matching has the least id.
+        for index, start in self.segments:
+            if not len(queries):
+                break
+            before = index.comparisons
+            match = index.first_match(points[queries])
+            self.comparisons += index.comparisons - before
+            hit = match >= 0
+            found[queries[hit]] = match[hit] + start
+            queries = queries[~hit]
+
+        return found
+
+
+class EdgeIndex:
+    __doc__ = "Index of edges by segments of sorted keys."
+
+    def __init__(self):
+        # Tuples (sorted keys, ids of edges).
+        self.segments = list()
+
+    @staticmethod
+    def keys(edge_nodes):
+        """
+        Key the edges by the sorted pair of nodes' ids.
+
+        :param edge_nodes: (e, 2) array of ids of edges' nodes.
+        :return: int64 array of keys.
+        """
+        edge_nodes = edge_nodes.astype(np.int64)
+        return edge_nodes.min(axis=1) * EDGE_KEY + edge_nodes.max(axis=1)
+
+    def add(self, keys, start):
+        """
+        Index the edges with ids start, start + 1 ...
+
+        :param keys: int64 array of keys of the edges.
+        :param start: id of the first edge.
+        """
+        if not len(keys):
+            return
+        ids = np.arange(start, start + len(keys), dtype=np.int64)
+        order = np.argsort(keys)
+        self.segments.append((keys[order], ids[order]))
+
+        while len(self.segments) > 1 and len(self.segments[-2][0]) <= 2 * len(self.segments[-1][0]):
+            last_keys, last_ids = self.segments.pop()
+            previous_keys, previous_ids = self.segments.pop()
+            keys = np.concatenate((previous_keys, last_keys))
+            ids = np.concatenate((previous_ids, last_ids))
+            order = np.argsort(keys)
+            self.segments.append((keys[order], ids[order]))
+
+    def find(self, keys):
+        """
+        Find the edges by their keys.
+
+        :param keys: int64 array of keys.
+        :return: int64 array of ids, -1 where the edge is absent.
+        """
+        found = np.full(len(keys), -1, dtype=np.int64)
+        for segment_keys, ids in self.segments:
+            c = np.minimum(np.searchsorted(segment_keys, keys), len(segment_keys) - 1)
+            hit = segment_keys[c] == keys
+            found[hit] = ids[c[hit]]
+        return found
+
+
+class MergeIndex:
+    __doc__ = "Index of nodes and edges of a grid kept between merges of zones."
+
+    def __init__(self, grid):
+        """
+        Index the nodes and edges of the grid.
+
+        :param grid: Grid object.
+        """
+        # Grids assembled from objects only have no tables yet.
+        if grid.coordinates is None:
+            grid.pack()
+        if grid.coordinates is None:
+            grid.coordinates = np.empty((0, 2), dtype=np.float64)
+        if grid.face_nodes is None:
+            grid.face_nodes = np.empty((0, 3), dtype=np.int32)
+        if grid.edge_nodes is None or grid.edge_faces is None:
+            grid.build_edges()
+
+        self.grid = grid
+        self.eps = node_algorithms.EPS
+
+        # Arrays with spare space holding the tables.
+        self.tables = dict()
+        self.sizes = dict()
+        for name in ('coordinates', 'face_nodes', 'edge_nodes', 'edge_faces'):
+            table = getattr(grid, name)
+            self.tables[name] = np.array(table)
+            self.sizes[name] = len(table)
+            setattr(grid, name, self.tables[name][:len(table)])
+
+        self.nodes = NodeIndex()
+        self.nodes.add(grid.coordinates, 0)
+
+        self.edges = EdgeIndex()
+        self.edges.add(self.edges.keys(grid.edge_nodes), 0)
+
+    def is_valid(self):
+        """
+        Whether the tables of the grid were not replaced
+        and EPS was not changed since the last merge.
+        """
+        return self.eps == node_algorithms.EPS and \
+            all(getattr(self.grid, name) is not None and getattr(self.grid, name).base is self.tables[name]
+                and len(getattr(self.grid, name)) == self.sizes[name] for name in self.tables)
+
+    def append(self, name, rows):
+        """
+        Append rows to the table of the grid.
+
+        :param name: name of the table.
+        :param rows: array of rows.
+        :return: id of the first appended row.
+        """
+        start = self.sizes[name]
+        end = start + len(rows)
+        table = self.tables[name]
+
+        # Grow by doubling, so the copies take linear time in total.
+        if end > len(table):
+            table = np.empty((max(end, 2 * len(table)),) + table.shape[1:], dtype=table.dtype)
+            table[:start] = self.tables[name][:start]
+            self.tables[name] = table
+
+        table[start:end] = rows
+        self.sizes[name] = end
+        setattr(self.grid, name, table[:end])
+        return start
+
+    def add_zone(self, points, faces):
+        """
+        Merge the zone into the grid.
+
+        Nodes are merged like `merge_coordinates` does. Edges of the zone's faces
+        are numbered and linked like `Grid.build_edges` does, so the tables are
+        the same as after reading all zones by read_tecplot with `sorted_batch`.
+
+        :param points: (n, 2) array of coordinates of the zone's nodes.
+        :param faces: (f, 3) array of 0-based zone-local ids of faces' nodes.
+        :return: Zone object.
+        """
+        grid = self.grid
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+
+        remap, added = merge_coordinates(grid.coordinates, points, self.nodes)
+        remap = remap.astype(np.int32)
+        faces = remap[faces]
+
+        # Edges of the zone's faces, see Grid.build_edges.
+        sides = np.stack((faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]), axis=1).reshape(-1, 2)
+        keys = self.edges.keys(sides)
+
+        _, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+
+        if len(counts) and counts.max() > 2:
+            raise Exception('The edge is linked to the maximum number of faces.')
+
+        order = np.argsort(first)
+        number = np.empty(len(order), dtype=np.int64)
+        number[order] = np.arange(len(order))
+        grouped = np.argsort(number[inverse.reshape(-1)], kind='stable')
+        starts = np.cumsum(counts[order]) - counts[order]
+
+        first = first[order]
+        counts = counts[order]
+        face_start = self.sizes['face_nodes']
+
+        # Faces of the zone's edges: the first side and the second one if any.
+        edge_faces = np.full((len(first), 2), -1, dtype=np.int64)
+        edge_faces[:, 0] = first // 3 + face_start
+        shared = counts == 2
+        edge_faces[shared, 1] = grouped[starts[shared] + 1] // 3 + face_start
+
+        # Only edges between merged nodes may exist already.
+        old = self.edges.find(keys[first])
+        present = old >= 0
+        if np.any(shared[present]) or np.any(grid.edge_faces[old[present], 1] != -1):
+            raise Exception('The edge is linked to the maximum number of faces.')
+
+        # The existing edges get their second face.
+        grid.edge_faces[old[present], 1] = edge_faces[present, 0]
+
+        self.append('coordinates', points[added])
+        self.nodes.add(points[added], self.sizes['coordinates'] - len(added))
+
+        self.append('face_nodes', faces)
+
+        new = ~present
+        edge_start = self.append('edge_nodes', sides[first[new]])
+        self.append('edge_faces', edge_faces[new])
+        self.edges.add(keys[first[new]], edge_start)
+
+        z = Zone()
+        z.grid = grid
+        z.node_ids = remap
+        z.face_ids = np.arange(face_start, face_start + len(faces), dtype=np.int32)
+        grid.Zones.append(z)
+
+        return z
@@ -4,14 +4,81 @@
 class Node:
     __doc__ = "class describing node"
 
+    __slots__ = ('Id', '_x', '_y', 'grid', '_faces', '_edges')
+
     def __init__(self):
         """
         Construct node.
         :param id: node's id in the grid.
         """
+        # Grid keeping node's adjacency if the node is created from its tables.
+        self.grid = None
+
         self.Id = None
         self.x = None
         self.y = None
 
-        self.faces = list()
-        self.edges = list()
+        self._faces = None
+        self._edges = None
+
+    @property
+    def x(self):
+        """
+        Node's x-coordinate.
+
+        Written into grid.coordinates when set if the node is created from the grid's tables.
+        """
+        return self._x
+
+    @x.setter
+    def x(self, x):
+        self._x = x
+        if self.grid is not None:
+            self.grid.write_node(self)
+
+    @property
+    def y(self):
+        """
+        Node's y-coordinate.
+
+        Written into grid.coordinates when set if the node is created from the grid's tables.
+        """
+        return self._y
+
+    @y.setter
+    def y(self, y):
+        self._y = y
+        if self.grid is not None:
+            self.grid.write_node(self)
+
+    @property
+    def faces(self):
+        """
+        List of node's faces.
+
+        The list is created on first access, from the grid's
+        adjacency if the node is created from the grid's tables.
+        """
+        if self._faces is None:
+            self._faces = list() if self.grid is None else self.grid.adjacent_faces(self.Id)
+        return self._faces
+
+    @faces.setter
+    def faces(self, faces):
+        self._faces = faces
+
+    @property
+    def edges(self):
+        """
+        List of node's edges.
+
+        The list is created on first access, from the grid's
+        adjacency if the node is created from the grid's tables.
+        """
+        if self._edges is None:
+            self._edges = list() if self.grid is None else self.grid.adjacent_edges(self.Id)
+        return self._edges
+
+    @edges.setter
+    def edges(self, edges):
+        self._edges = edges
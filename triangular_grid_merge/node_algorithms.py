@@ -1,13 +1,15 @@
 """The module provides functionality to merge a zone into grid
 comparing nodes coordinates."""
 
-from math import fabs
+from math import fabs, floor
+
+import numpy as np
 
 # Accuracy to compare nodes' coordinates.
 EPS = 10e-5
 
 
-def n_square(grid, nodes):
+def n_square(grid, nodes, stats=None):
     """
     Compose grid.Nodes from the nodes from zones to avoid repeating.
 
@@ -19,7 +21,11 @@ def n_square(grid, nodes):
 
     :param grid: Grid object.
     :param nodes: list: nodes of zone to add to the grid.
+    :param stats: Stats object to count comparisons, matches and inserts.
     """
+    comparisons = 0
+    matches = 0
+
     for i in range(len(nodes)):
 
         node_is_found = False
@@ -33,13 +39,18 @@ def n_square(grid, nodes):
             if cond1 and cond2:
                 nodes[i] = grid.Nodes[j]
                 node_is_found = True
+                comparisons += j + 1
+                matches += 1
                 break
 
         if not node_is_found:
+            comparisons += len(grid.Nodes)
             grid.Nodes.append(nodes[i])
 
+    count_merge(stats, comparisons, matches, len(nodes) - matches)
+
 
-def dichotomy_1_sided(grid, nodes):
+def dichotomy_1_sided(grid, nodes, stats=None):
     """
     Compose grid.Nodes from the nodes from zones to avoid repeating.
 
@@ -57,7 +68,10 @@ def dichotomy_1_sided(grid, nodes):
 
     :param grid: Grid object.
     :param nodes: list: nodes of zone to add to the grid.
+    :param stats: Stats object to count comparisons, matches and inserts.
     """
+    comparisons = 0
+    matches = 0
 
     for i in range(0, len(nodes)):
         a = 0
@@ -66,6 +80,7 @@ def dichotomy_1_sided(grid, nodes):
 
         while a <= b:
             m = (a + b) // 2
+            comparisons += 1
 
             if fabs(grid.Nodes[m].x - nodes[i].x) < EPS and (m == 0 or fabs(grid.Nodes[m - 1].x - nodes[i].x) > EPS):
 
@@ -81,6 +96,8 @@ def dichotomy_1_sided(grid, nodes):
                     if c == len(grid.Nodes):
                         break
 
+                comparisons += c - m
+
             if not node_is_found:
 
                 if grid.Nodes[m].x > nodes[i].x or fabs(grid.Nodes[m].x - nodes[i].x) < EPS:
@@ -93,9 +110,13 @@ def dichotomy_1_sided(grid, nodes):
 
         if not node_is_found:
             grid.Nodes.insert(a, nodes[i])
+        else:
+            matches += 1
+
+    count_merge(stats, comparisons, matches, len(nodes) - matches)
 
 
-def dichotomy_2_sided(grid, nodes):
+def dichotomy_2_sided(grid, nodes, stats=None):
     """
     Compose grid.Nodes from the nodes from zones to avoid repeating.
 
@@ -111,7 +132,11 @@ def dichotomy_2_sided(grid, nodes):
 
     :param grid: Grid object.
     :param nodes: list: nodes of zone to add to the grid.
+    :param stats: Stats object to count comparisons, matches and inserts.
     """
+    comparisons = 0
+    matches = 0
+
     for i in range(0, len(nodes)):
         a = 0
         b = len(grid.Nodes) - 1
@@ -119,6 +144,7 @@ def dichotomy_2_sided(grid, nodes):
 
         while a <= b:
             m = (a + b) // 2
+            comparisons += 1
 
             if fabs(grid.Nodes[m].x - nodes[i].x) < EPS:
 
@@ -132,6 +158,8 @@ def dichotomy_2_sided(grid, nodes):
 
                     c -= 1
 
+                comparisons += m - c
+
                 if not node_is_found:
 
                     c = m
@@ -146,6 +174,8 @@ def dichotomy_2_sided(grid, nodes):
                         if c == len(grid.Nodes):
                             break
 
+                    comparisons += c - m
+
             if node_is_found:
                 break
 
@@ -157,3 +187,468 @@ def dichotomy_2_sided(grid, nodes):
 
         if not node_is_found:
             grid.Nodes.insert(a, nodes[i])
+        else:
+            matches += 1
+
+    count_merge(stats, comparisons, matches, len(nodes) - matches)
+
+
+def count_merge(stats, comparisons, matches, inserts):
+    """
+    Add the counters of a merge of a zone to stats.
+
+    :param stats: Stats object or None.
+    :param comparisons: number of nodes the zone's nodes were compared with.
+    :param matches: number of the zone's nodes found in the grid.
+    :param inserts: number of the zone's nodes added to the grid.
+    """
+    if stats is not None:
+        stats.count('comparisons', comparisons)
+        stats.count('matches', matches)
+        stats.count('inserts', inserts)
+
+
+class SpatialHash:
+    __doc__ = "Hash of nodes by square cells with the side EPS."
+
+    def __init__(self, nodes):
+        """
+        Put the nodes into the cells.
+
+        :param nodes: list: nodes to hash. The list is kept by reference
+        and nodes appended to it should be added by `add`.
+        """
+        self.eps = EPS
+        self.nodes = nodes
+        self.cells = dict()
+
+        # Number of nodes compared with the points searched for.
+        self.comparisons = 0
+
+        for i in range(len(nodes)):
+            self.add(i)
+
+    def cell(self, x, y):
+        """
+        Cell containing the point (x, y).
+
+        :return: tuple (int, int): cell's indexes by x and y.
+        """
+        return floor(x / self.eps), floor(y / self.eps)
+
+    def add(self, i):
+        """
+        Put the node self.nodes[i] into its cell.
+
+        :param i: position of the node in self.nodes.
+        """
+        node = self.nodes[i]
+        self.cells.setdefault(self.cell(node.x, node.y), list()).append(i)
+
+    def find(self, x, y):
+        """
+        Find the first node lying no farther than EPS by each coordinate
+        from the point (x, y).
+
+        The point and the node can lie in the neighbor cells,
+        so all nine cells around the point are checked.
+
+        :return: position of the node in self.nodes or None.
+        """
+        cx, cy = self.cell(x, y)
+        found = None
+
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                cell = self.cells.get((i, j), ())
+                self.comparisons += len(cell)
+                for c in cell:
+                    node = self.nodes[c]
+                    if fabs(node.x - x) <= self.eps and fabs(node.y - y) <= self.eps:
+                        if found is None or c < found:
+                            found = c
+
+        return found
+
+
+def spatial_hash(grid, nodes, index=None, stats=None):
+    """
+    Compose grid.Nodes from the nodes from zones to avoid repeating.
+
+    If some nodes in grid are shared between several zones, the task is
+    to avoid including one particular node twice to the grid.
+
+    The nodes are compared according to their coordinates (x, y).
+
+    The nodes of grid.Nodes are put into square cells with the side EPS.
+    Given a node the algorithm compares it only with the nodes from its cell and
+    eight neighbor cells. So the merge takes expected linear time.
+
+    The result is the same as of `n_square`.
+
+    :param grid: Grid object.
+    :param nodes: list: nodes of zone to add to the grid.
+    :param index: SpatialHash of grid.Nodes to reuse when several zones are merged.
+    Built from grid.Nodes if not given.
+    :param stats: Stats object to count comparisons, matches and inserts.
+    """
+    if index is None:
+        index = SpatialHash(grid.Nodes)
+
+    comparisons = index.comparisons
+    inserts = 0
+
+    for i in range(len(nodes)):
+        c = index.find(nodes[i].x, nodes[i].y)
+
+        if c is not None:
+            nodes[i] = grid.Nodes[c]
+        else:
+            grid.Nodes.append(nodes[i])
+            index.add(len(grid.Nodes) - 1)
+            inserts += 1
+
+    count_merge(stats, index.comparisons - comparisons, len(nodes) - inserts, inserts)
+
+
+class CellIndex:
+    __doc__ = "Vectorized index of points by square cells with the side 4 * EPS."
+
+    def __init__(self, points):
+        """
+        Sort the points by their cells.
+
+        :param points: (N, 2) array of points' coordinates.
+        Point's id is its position in the array.
+        """
+        self.eps = EPS
+        self.side = 4 * EPS
+        self.points = points
+
+        cells = self.cells(points)
+        keys = self.keys(cells[:, 0], cells[:, 1])
+
+        # Stable sort keeps the points of one cell ordered by id.
+        self.order = np.argsort(keys, kind='stable')
+        keys = keys[self.order]
+
+        # Number of indexed points compared with the points searched for.
+        self.comparisons = 0
+
+        # Position of the first point of each occupied cell in self.order.
+        self.starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.empty(0, np.int64)
+        self.counts = np.diff(np.r_[self.starts, len(keys)])
+        self.cell_keys = keys[self.starts]
+
+    def cells(self, points):
+        """
+        Cells containing the points.
+
+        Cells are centered at the multiples of the side, so the nodes
+        of grids with round coordinates lie far from the cells' borders.
+
+        :param points: (n, 2) array of coordinates.
+        :return: (n, 2) int64 array of cells' indexes by x and y.
+        """
+        return np.floor(points / self.side + 0.5).astype(np.int64)
+
+    @staticmethod
+    def keys(cx, cy):
+        """
+        Hash the cells' indexes into single integers.
+
+        Different cells may share a key. It only adds
+        candidates which are then rejected by comparing coordinates.
+
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :return: int64 array of keys.
+        """
+        with np.errstate(over='ignore'):
+            return cx * 1000003 + cy
+
+    def ranges(self, cx, cy):
+        """
+        Find the points of the cells.
+
+        :param cx: int64 array of cells' indexes by x.
+        :param cy: int64 array of cells' indexes by y.
+        :return: tuple (ndarray, ndarray): position of the cells' first points in self.order
+        and the number of points in the cells.
+        """
+        keys = self.keys(cx, cy)
+        if len(self.cell_keys) == 0:
+            return np.zeros(len(keys), np.int64), np.zeros(len(keys), np.int64)
+
+        # Sorted keys are searched for much faster.
+        order = np.argsort(keys)
+        c = np.empty(len(keys), dtype=np.int64)
+        c[order] = np.searchsorted(self.cell_keys, keys[order])
+        c = np.minimum(c, len(self.cell_keys) - 1)
+        present = self.cell_keys[c] == keys
+        return self.starts[c], np.where(present, self.counts[c], 0)
+
+    def close_points(self, points):
+        """
+        Go through the indexed points lying no farther than EPS
+        by each coordinate from the points.
+
+        The square of side 2 * EPS around a point overlaps at most four cells.
+        Only the overlapped cells are checked, the points of the cells
+        are compared in parallel.
+
+        :param points: (n, 2) array of coordinates.
+        :return: generator of tuples (ndarray, ndarray): positions of points and ids
+        of the indexed points close to them. A position appears once in a tuple.
+        """
+        lo = self.cells(points - self.eps)
+        hi = self.cells(points + self.eps)
+
+        cross_x = hi[:, 0] != lo[:, 0]
+        cross_y = hi[:, 1] != lo[:, 1]
+
+        # The cells overlapped by the square and the points overlapping them.
+        cells = ((lo[:, 0], lo[:, 1], np.arange(len(points))),
+                 (hi[:, 0], lo[:, 1], np.flatnonzero(cross_x)),
+                 (lo[:, 0], hi[:, 1], np.flatnonzero(cross_y)),
+                 (hi[:, 0], hi[:, 1], np.flatnonzero(cross_x & cross_y)))
+
+        for cx, cy, queries in cells:
+            start, count = self.ranges(cx[queries], cy[queries])
+            active = count > 0
+            queries, start, count = queries[active], start[active], count[active]
+
+            k = 0
+            self.comparisons += int(count.sum())
+            while len(queries):
+                ids = self.order[start + k]
+                close = np.abs(self.points[ids] - points[queries]).max(axis=1) <= self.eps
+                yield queries[close], ids[close]
+
+                k += 1
+                active = count > k
+                queries, start, count = queries[active], start[active], count[active]
+
+    def first_match(self, points):
+        """
+        For each point find the indexed point with the least id
+        lying no farther than EPS by each coordinate.
+
+        :param points: (n, 2) array of coordinates.
+        :return: (n,) int64 array of ids, -1 where nothing is found.
+        """
+        found = np.full(len(points), -1, dtype=np.int64)
+
+        for queries, ids in self.close_points(points):
+            better = (found[queries] == -1) | (ids < found[queries])
+            found[queries[better]] = ids[better]
+
+        return found
+
+    def close_pairs(self, points):
+        """
+        All pairs of a point and an indexed point lying no farther than EPS by each coordinate.
+
+        :param points: (n, 2) array of coordinates.
+        :return: tuple (ndarray, ndarray): positions of points and ids of the indexed points,
+        sorted by positions, then by ids.
+        """
+        pairs = list(self.close_points(points))
+        queries = np.concatenate([np.empty(0, dtype=np.int64)] + [q for q, _ in pairs])
+        ids = np.concatenate([np.empty(0, dtype=np.int64)] + [i for _, i in pairs])
+
+        order = np.lexsort((ids, queries))
+        return queries[order], ids[order]
+
+
+def merge_coordinates(coordinates, points, index=None, stats=None):
+    """
+    Merge the nodes of a zone into the merged nodes in one vectorized pass.
+
+    Given a zone node the algorithm looks for the first merged node
+    lying no farther than EPS by each coordinate. The nodes not found
+    are appended to the merged nodes in the zone order and are also
+    searched for by the next nodes of the zone.
+
+    The result is the same as of `n_square`.
+
+    :param coordinates: (N, 2) array of merged nodes.
+    :param points: (n, 2) array of zone's nodes.
+    :param index: index of the merged nodes with the method `first_match`
+    like CellIndex, kept between zones. Only the zone's nodes are indexed then.
+    :param stats: Stats object to count comparisons, matches and inserts.
+    :return: tuple (ndarray, ndarray): (n,) ids of the zone's nodes among the merged nodes
+    with appended ones and zone-local ids of the nodes to append.
+    """
+    n = len(coordinates)
+    comparisons = 0
+
+    if index is None:
+        # Index both merged and zone's nodes, so a zone node finds
+        # the merged nodes and the earlier zone nodes at once.
+        index = CellIndex(np.concatenate((coordinates, points)))
+        first = index.first_match(points)
+        shift = 0
+    else:
+        before = index.comparisons
+        first = index.first_match(points)
+        comparisons = index.comparisons - before
+        index = CellIndex(points)
+        first = np.where(first >= 0, first, index.first_match(points) + n)
+        shift = n
+
+    remap = np.where(first < n, first, -1)
+
+    # The rest of the zone's nodes are merged with each other.
+    rest = np.flatnonzero(first >= n)
+    first = first[rest] - n
+
+    # The node is new if no earlier node is close to it and coincides
+    # with the closest earlier node if that node is new.
+    new = np.zeros(len(points), dtype=bool)
+    new[rest] = first == rest
+    joined = new[first]
+
+    # Otherwise the earlier nodes form a chain: the node coincides with
+    # the earliest new node close to it, which is known when the nodes
+    # before it are resolved. The close pairs are found at once and
+    # resolved in the order of nodes.
+    chain = np.flatnonzero(~joined)
+    if len(chain):
+        queries, close = index.close_pairs(points[rest[chain]])
+        close = close + shift - n
+        earlier = (close >= 0) & (close < rest[chain][queries])
+        queries, close = queries[earlier], close[earlier]
+        bounds = np.searchsorted(queries, np.arange(len(chain) + 1)).tolist()
+
+        is_new = bytearray(new.tobytes())
+        close = close.tolist()
+        found = rest[chain].tolist()
+        for i in range(len(chain)):
+            for c in close[bounds[i]: bounds[i + 1]]:
+                if is_new[c]:
+                    found[i] = c
+                    break
+            else:
+                is_new[found[i]] = True
+
+        first[chain] = found
+        new = np.frombuffer(is_new, dtype=bool).copy()
+
+    ids = np.cumsum(new) - 1 + n
+    remap[rest] = ids[first]
+
+    added = np.flatnonzero(new)
+    count_merge(stats, comparisons + index.comparisons, len(points) - len(added), len(added))
+
+    return remap, added
+
+
+def boundary_nodes(faces):
+    """
+    Nodes of the boundary of a zone.
+
+    A side of a face is on the boundary if no other face has it.
+
+    :param faces: (f, 3) array of 0-based ids of faces' nodes.
+    :return: sorted array of ids of the nodes on the boundary.
+    """
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    m = faces.max(initial=0) + 1
+
+    # Key of the side by the sorted pair of nodes' ids.
+    a = faces.ravel()
+    b = np.roll(faces, -1, axis=1).ravel()
+    keys = np.minimum(a, b) * m + np.maximum(a, b)
+    keys.sort()
+
+    # Keys met once.
+    single = np.ones(len(keys), dtype=bool)
+    repeated = keys[1:] == keys[:-1]
+    single[1:] &= ~repeated
+    single[:-1] &= ~repeated
+    keys = keys[single]
+
+    return np.unique(np.concatenate((keys // m, keys % m)))
+
+
+def merge_boundaries(coordinates, boundary, zones, stats=None):
+    """
+    Merge the nodes of zones comparing only the nodes on their boundaries.
+
+    Zones can only touch each other by their boundaries, so the interior nodes
+    of a zone are appended without any search. A boundary node of a zone is
+    searched for among the boundary nodes of the grid and of the earlier zones.
+    Those are grouped by zones, and only the groups whose bounding boxes
+    come closer than EPS to the bounding box of the zone's boundary are searched.
+
+    Given a boundary node the algorithm looks for the first node
+    lying no farther than EPS by each coordinate like `n_square` does.
+    Nodes of one zone are not merged with each other.
+
+    :param coordinates: (N, 2) array of merged nodes.
+    :param boundary: ids of the merged nodes on the boundary of the grid.
+    :param zones: list of tuples (ndarray (n, 2), ndarray (f, 3)): coordinates
+    of zones' nodes and 0-based zone-local ids of faces' nodes.
+    :param stats: Stats object to count comparisons, matches, inserts and boundary nodes.
+    :return: tuple (list, ndarray): ids of each zone's nodes among the merged nodes
+    and (M, 2) array of the nodes to append to the merged nodes.
+    """
+    count = len(coordinates)
+    comparisons = 0
+    matches = 0
+
+    # Groups of boundary nodes: tuples (ids, coordinates, lower corner, upper corner).
+    groups = list()
+
+    def add_group(ids, points):
+        if len(ids):
+            groups.append((ids, points, points.min(axis=0), points.max(axis=0)))
+
+    boundary = np.asarray(boundary, dtype=np.int64)
+    add_group(boundary, coordinates[boundary])
+
+    remaps = list()
+    added = list()
+
+    for points, faces in zones:
+        local = boundary_nodes(faces)
+        local = local[local < len(points)]
+        remap = np.full(len(points), -1, dtype=np.int64)
+
+        if len(local) and groups:
+            lo = points[local].min(axis=0) - EPS
+            hi = points[local].max(axis=0) + EPS
+
+            near = [g for g in groups if np.all(g[2] <= hi) and np.all(g[3] >= lo)]
+
+            if near:
+                ids = np.concatenate([g[0] for g in near])
+                order = np.argsort(ids, kind='stable')
+                ids = ids[order]
+                index = CellIndex(np.concatenate([g[1] for g in near])[order])
+
+                found = index.first_match(points[local])
+                hit = found >= 0
+                remap[local[hit]] = ids[found[hit]]
+                comparisons += index.comparisons
+                matches += int(np.count_nonzero(hit))
+
+        # The rest of the nodes are appended in the zone's order.
+        new = remap == -1
+        remap[new] = np.arange(count, count + np.count_nonzero(new))
+        count += np.count_nonzero(new)
+        added.append(points[new])
+
+        fresh = local[new[local]]
+        add_group(remap[fresh], points[fresh])
+
+        remaps.append(remap)
+
+        if stats is not None:
+            stats.count('boundary_nodes', len(local))
+
+    added = np.concatenate([np.empty((0, 2))] + added)
+    count_merge(stats, comparisons, matches, len(added))
+
+    return remaps, added
@@ -0,0 +1,302 @@
+"""
+Module provides merge of tecplot files into a single zone grid
+which does not have to fit in memory.
+
+The merge keeps only bounded parts of the grid in memory at a time:
+
+    1. Zones are read one by one. Their coordinates and connectivity lists
+    with global ids of nodes are spilled to temporary files, and nodes are
+    collected into runs of records (x, y, id) sorted by x.
+
+    2. The runs are merged in order of x by a heap of their heads. The merged
+    records are kept in a window until no record read later can lie within EPS
+    of their group of close nodes. The group is merged like `n_square` does then:
+    in order of ids, a node is merged with the earliest kept node close to it.
+
+    3. Merged nodes are numbered in order of ids, the table of new ids
+    is kept in a memory-mapped temporary file.
+
+    4. Coordinates of merged nodes and the connectivity list with new ids
+    are written to the output file chunk by chunk.
+
+The result is the same as of `n_square`. The window holds the nodes lying
+within EPS by x of the last read one and the groups they are chained with.
+"""
+import heapq
+import os
+import tempfile
+
+import numpy as np
+
+from . import node_algorithms
+from .node_algorithms import CellIndex, merge_coordinates
+from .compression import open_output
+from .reader import iter_tecplot_zones
+from .plt import iter_plt_zones
+from .tecplot import file_format, print_tecplot_header, print_zone_sizes, format_values, print_connectivity_list, \
+    WRITE_BUFFER
+
+# Record of a node in sorted runs.
+RECORD = np.dtype([('x', '<f8'), ('y', '<f8'), ('id', '<i8')])
+
+# Default bound of the memory used by the merge in bytes.
+MEMORY_LIMIT = 1 << 28
+
+
+def merge_tecplot_files(inputs, output, memory_limit=MEMORY_LIMIT, tmp_dir=None):
+    """
+    Merge zones of tecplot files into a single zone written to the ASCII file.
+
+    Memory used is bounded by memory_limit besides one zone of the input
+    and the pages of temporary files cached by the system.
+
+    :param inputs: list of tecplot files (.dat or .plt) to read zones from.
+    :param output: ASCII tecplot file to write the merged grid in.
+    :param memory_limit: bound of the memory for sorting and chunks in bytes.
+    :param tmp_dir: directory for temporary files. The system default if not given.
+    :return: tuple (int, int): number of nodes and faces of the merged grid.
+    """
+    if file_format(output) == 'plt':
+        raise Exception('Only ASCII output is supported by the out-of-core merge')
+
+    # Records in a run, sorting needs several copies of them.
+    run_size = max(1024, memory_limit // (8 * RECORD.itemsize))
+    # Rows of tables in a chunk.
+    chunk = max(1024, memory_limit // 64)
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as tmp:
+        nodes, faces, runs = spill_zones(inputs, tmp, run_size)
+
+        reps = np.lib.format.open_memmap(os.path.join(tmp, 'reps.npy'), mode='w+', dtype=np.int64, shape=(nodes,))
+        merge_runs(runs, reps, run_size)
+
+        new_ids = np.lib.format.open_memmap(os.path.join(tmp, 'new_ids.npy'), mode='w+', dtype=np.int64,
+                                            shape=(nodes,))
+        merged = number_nodes(reps, new_ids, chunk)
+
+        coordinates = np.memmap(os.path.join(tmp, 'coordinates.bin'), dtype='<f8', mode='r', shape=(nodes, 2))
+        face_nodes = np.memmap(os.path.join(tmp, 'faces.bin'), dtype='<i8', mode='r', shape=(faces, 3))
+
+        with open_output(output, WRITE_BUFFER) as f:
+            print_tecplot_header(f)
+            print_zone_sizes(f, 'ZONE 1', merged, faces)
+
+            # Variables' values of the merged nodes.
+            for k in range(2):
+                for start in range(0, nodes, chunk):
+                    ids = np.arange(start, min(start + chunk, nodes))
+                    for text in format_values(coordinates[start: start + chunk, k][reps[ids] == ids]):
+                        f.write(text)
+                f.write('\n')
+
+            # Connectivity list.
+            for start in range(0, faces, chunk):
+                print_connectivity_list(f, new_ids[face_nodes[start: start + chunk]])
+
+        del coordinates, face_nodes, reps, new_ids
+
+    return merged, faces
+
+
+def spill_zones(inputs, tmp, run_size):
+    """
+    Read zones and spill them to temporary files.
+
+    Coordinates go to coordinates.bin, connectivity lists with global
+    0-based ids of nodes go to faces.bin, records of nodes go to runs
+    sorted by x.
+
+    :param inputs: list of tecplot files.
+    :param tmp: directory for temporary files.
+    :param run_size: number of records in a run.
+    :return: tuple (int, int, list): number of nodes, number of faces and
+    file names of runs.
+    """
+    nodes = 0
+    faces = 0
+    runs = list()
+    buffer = list()
+    buffered = 0
+
+    with open(os.path.join(tmp, 'coordinates.bin'), 'wb') as fc, open(os.path.join(tmp, 'faces.bin'), 'wb') as ff:
+        for filename in inputs:
+            if file_format(filename) == 'plt':
+                zones = iter_plt_zones(filename)
+            else:
+                zones = iter_tecplot_zones(filename)
+
+            for header, coordinates, face_nodes in zones:
+                np.ascontiguousarray(coordinates, dtype='<f8').tofile(fc)
+                (face_nodes.astype('<i8') + nodes).tofile(ff)
+
+                records = np.empty(len(coordinates), dtype=RECORD)
+                records['x'] = coordinates[:, 0]
+                records['y'] = coordinates[:, 1]
+                records['id'] = np.arange(nodes, nodes + len(coordinates))
+
+                nodes += len(coordinates)
+                faces += len(face_nodes)
+
+                # Zones are cut into runs of bounded size.
+                for start in range(0, len(records), run_size):
+                    part = records[start: start + run_size]
+                    buffer.append(part)
+                    buffered += len(part)
+                    if buffered >= run_size:
+                        runs.append(write_run(buffer, tmp, len(runs)))
+                        buffer = list()
+                        buffered = 0
+
+        if buffer:
+            runs.append(write_run(buffer, tmp, len(runs)))
+
+    return nodes, faces, runs
+
+
+def write_run(buffer, tmp, number):
+    """
+    Sort records by x and write them to the file of the run.
+
+    :return: file name of the run.
+    """
+    records = np.concatenate(buffer)
+    records = records[np.argsort(records['x'], kind='stable')]
+    filename = os.path.join(tmp, 'run{}.bin'.format(number))
+    records.tofile(filename)
+    return filename
+
+
+def merge_runs(runs, reps, run_size):
+    """
+    Find the node each node is merged with.
+
+    Runs are merged by a heap keyed on the x of their next records. The run
+    with the least x gives all its records up to the x of the next run at once.
+    A block of each run is read into memory at a time.
+
+    Taken records are kept in the window. Records closer than EPS to each other
+    are grouped, and a group is finished when the next x read is farther than EPS
+    from all its records. The finished groups are merged by `merge_coordinates`
+    in order of ids and leave the window.
+
+    :param runs: file names of runs.
+    :param reps: array to fill: id of the node each node is merged with.
+    :param run_size: number of records in a run.
+    """
+    block = max(1024, run_size // (len(runs) + 1))
+
+    files = [np.memmap(run, dtype=RECORD, mode='r') for run in runs]
+    positions = [0] * len(files)
+    blocks = [np.array(f[:block]) for f in files]
+    # x of the blocks' records apart, taking a field of the records is slow.
+    xs = [b['x'].copy() for b in blocks]
+    # Records of a block from marks[i] to starts[i] are taken, but not moved to the window yet.
+    marks = [0] * len(files)
+    starts = [0] * len(files)
+
+    heap = [(float(x[0]), i) for i, x in enumerate(xs) if len(x)]
+    heapq.heapify(heap)
+
+    window = np.empty(0, dtype=RECORD)
+    taken = list()
+    count = 0
+
+    while heap:
+        _, i = heapq.heappop(heap)
+        bound = heap[0][0] if heap else np.inf
+
+        x = xs[i]
+        end = max(starts[i] + 1, int(x.searchsorted(bound, side='right')))
+        count += end - starts[i]
+        starts[i] = end
+
+        if end == len(x):
+            taken.append(blocks[i][marks[i]:])
+            positions[i] += len(x)
+            blocks[i] = np.array(files[i][positions[i]: positions[i] + block])
+            x = xs[i] = blocks[i]['x'].copy()
+            marks[i] = starts[i] = 0
+        if starts[i] < len(x):
+            heapq.heappush(heap, (float(x[starts[i]]), i))
+
+        if count >= block or not heap:
+            for k in range(len(files)):
+                taken.append(blocks[k][marks[k]: starts[k]])
+                marks[k] = starts[k]
+            window = finish_groups(np.concatenate([window] + taken), heap[0][0] if heap else np.inf, reps)
+            taken = list()
+            count = 0
+
+    del files
+
+
+def finish_groups(window, front, reps):
+    """
+    Merge the groups of close records which no record read later can join.
+
+    :param window: records taken in order of x and not merged yet.
+    :param front: x of the next record to be read, inf if all are read.
+    :param reps: array to fill: id of the node each node is merged with.
+    :return: records of the groups left in the window.
+    """
+    eps = node_algorithms.EPS
+    points = np.stack((window['x'], window['y']), axis=1)
+
+    # Groups are labeled by their least position, spreading labels through close pairs.
+    queries, close = CellIndex(points).close_pairs(points)
+    labels = np.arange(len(window))
+    while True:
+        spread = labels.copy()
+        np.minimum.at(spread, queries, labels[close])
+        spread = spread[spread]
+        if np.array_equal(spread, labels):
+            break
+        labels = spread
+
+    last = np.full(len(window), -np.inf)
+    np.maximum.at(last, labels, window['x'])
+    finished = front - last[labels] > eps
+
+    records = window[finished]
+    records = records[np.argsort(records['id'], kind='stable')]
+    remap, added = merge_coordinates(np.empty((0, 2)), np.stack((records['x'], records['y']), axis=1))
+    reps[records['id']] = records['id'][added][remap]
+
+    return window[~finished]
+
+
+def number_nodes(reps, new_ids, chunk):
+    """
+    Number the merged nodes in order of ids.
+
+    A node is merged with the node of less or equal id, so the new id
+    of the latter is known when the node is numbered.
+
+    :param reps: id of the node each node is merged with.
+    :param new_ids: array to fill: ids of nodes in the merged grid.
+    :param chunk: number of nodes numbered at once.
+    :return: number of merged nodes.
+    """
+    count = 0
+    for start in range(0, len(reps), chunk):
+        ids = np.arange(start, min(start + chunk, len(reps)))
+        rep = np.asarray(reps[start: start + chunk])
+
+        new = rep == ids
+        numbers = np.full(len(ids), -1, dtype=np.int64)
+        numbers[new] = np.arange(count, count + np.count_nonzero(new))
+        count += int(np.count_nonzero(new))
+
+        # Nodes merged with earlier chunks.
+        earlier = ~new & (rep < start)
+        numbers[earlier] = new_ids[rep[earlier]]
+
+        # Nodes merged with nodes of the chunk, possibly through a chain.
+        pending = np.flatnonzero(numbers == -1)
+        while len(pending):
+            numbers[pending] = numbers[rep[pending] - start]
+            pending = pending[numbers[pending] == -1]
+
+        new_ids[start: start + len(ids)] = numbers
+
+    return count
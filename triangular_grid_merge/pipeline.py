@@ -0,0 +1,82 @@
+"""
+Module provides the pipelined writing of text files.
+
+    with PipelinedWriter(f, workers=4) as writer:
+        writer.write('ZONE T = "ZONE 1"\n')
+        writer.submit(format_chunk, format_values, values)
+
+Chunks are formatted by worker processes, as formatting of numbers holds
+the GIL, while the main process writes the formatted chunks to the file
+in order. The number of chunks being formatted or waiting to be written
+is bounded, so a slow disk stops submitting and the memory stays bounded.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Chunks in the pipeline per worker.
+DEPTH = 4
+
+
+class PipelinedWriter:
+    __doc__ = "Text file object formatting submitted chunks in worker processes and writing them in order."
+
+    def __init__(self, f, workers=None):
+        """
+        Start the worker processes.
+
+        :param f: text file object to write in.
+        :param workers: number of worker processes. The number of CPUs if not given.
+        """
+        self.f = f
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.workers)
+
+        # Strings and futures of formatted chunks in order of the file.
+        self.pending = deque()
+        self.depth = DEPTH * self.workers
+
+    def write(self, text):
+        """
+        Write the text after the chunks submitted before.
+
+        :param text: str.
+        """
+        self.pending.append(text)
+        self.drain(self.depth)
+
+    def submit(self, function, *args):
+        """
+        Format a chunk by the function in a worker and write it after the chunks submitted before.
+
+        :param function: module level function returning str.
+        :param args: arguments of the function.
+        """
+        self.pending.append(self.pool.submit(function, *args))
+        self.drain(self.depth)
+
+    def drain(self, limit):
+        """
+        Write the first chunks waiting for them to be formatted until at most limit chunks are left.
+        """
+        while len(self.pending) > limit:
+            item = self.pending.popleft()
+            self.f.write(item if isinstance(item, str) else item.result())
+
+    def close(self):
+        """
+        Write all chunks and stop the workers. The file is not closed.
+        """
+        if self.pool is None:
+            return
+        try:
+            self.drain(0)
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
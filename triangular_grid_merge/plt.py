@@ -0,0 +1,339 @@
+"""
+Module provides interaction with binary tecplot format (.plt).
+
+Only FETRIANGLE zones with X, Y variables are written.
+The layout follows the version 112 of the format:
+
+    header section: magic number, title, names of variables,
+    a record for each zone, end of header marker;
+
+    data section: for each zone the format of variables, min/max
+    of variables, blocks of variables and 0-based connectivity list.
+"""
+import numpy as np
+
+from .compression import open_binary_output, open_input
+
+# Magic number of the format version.
+MAGIC = b'#!TDV112'
+
+# Marker of a zone record.
+ZONE_MARKER = 299.0
+
+# Marker of the end of the header section.
+EOH_MARKER = 357.0
+
+# Zone type FETRIANGLE.
+FETRIANGLE = 2
+
+# Formats of variables' values.
+FORMATS = {1: '<f4', 2: '<f8'}
+
+
+def print_plt(grid, filename, merge=False):
+    """
+    Write grid to the binary tecplot file.
+
+    :param grid: Grid object.
+    :param filename: file to write in.
+    :param merge: (bool) whether to merge grid and write it as a single zone.
+    """
+    # Grids assembled from objects only have no tables yet.
+    if grid.coordinates is None:
+        grid.pack()
+
+    if merge:
+        assert len(grid.Zones) > 1, '\nGrid is not multizone.\n'
+        zones = [('ZONE 1', grid.coordinates, grid.face_nodes)]
+    else:
+        zones = [('ZONE {}'.format(i + 1),) + grid.zone_arrays(z) for i, z in enumerate(grid.Zones)]
+
+    with open_binary_output(filename) as f:
+        write_plt(f, zones)
+
+
+def write_plt(f, zones):
+    """
+    Write zones to the binary file object.
+
+    :param f: binary file object to write in.
+    :param zones: list of tuples (str, ndarray (N, 2), ndarray (E, 3)): zone's title,
+    coordinates of nodes and 0-based connectivity list.
+    """
+    # Header section.
+    f.write(MAGIC)
+    write_int32(f, 1, 0)
+    write_string(f, 'GRID')
+    write_int32(f, 2)
+    write_string(f, 'X')
+    write_string(f, 'Y')
+
+    for title, coordinates, face_nodes in zones:
+        write_float32(f, ZONE_MARKER)
+        write_string(f, title)
+        # Parent zone, strand id.
+        write_int32(f, -1, -1)
+        # Solution time.
+        f.write(np.float64(0).astype('<f8').tobytes())
+        # Not used, zone type, no var location, no face neighbors, no user face connections.
+        write_int32(f, -1, FETRIANGLE, 0, 0, 0)
+        # Number of nodes and elements, cell dimensions, no auxiliary data.
+        write_int32(f, len(coordinates), len(face_nodes), 0, 0, 0, 0)
+
+    write_float32(f, EOH_MARKER)
+
+    # Data section.
+    for title, coordinates, face_nodes in zones:
+        write_float32(f, ZONE_MARKER)
+        # Double values, no passive variables, no sharing of variables and connectivity.
+        write_int32(f, 2, 2, 0, 0, -1)
+
+        if len(coordinates):
+            limits = np.stack((coordinates.min(axis=0), coordinates.max(axis=0)), axis=1)
+        else:
+            limits = np.zeros((2, 2))
+        f.write(np.ascontiguousarray(limits, dtype='<f8'))
+
+        f.write(np.ascontiguousarray(coordinates.T, dtype='<f8'))
+        f.write(np.ascontiguousarray(face_nodes, dtype='<i4'))
+
+
+def write_int32(f, *values):
+    """
+    Write 32-bit integers.
+    """
+    f.write(np.array(values, dtype='<i4').tobytes())
+
+
+def write_float32(f, value):
+    """
+    Write 32-bit float.
+    """
+    f.write(np.array([value], dtype='<f4').tobytes())
+
+
+def write_string(f, string):
+    """
+    Write string as 32-bit character codes ending with zero.
+    """
+    write_int32(f, *[ord(c) for c in string], 0)
+
+
+def read_int32(f, count=1):
+    """
+    Read 32-bit integers.
+
+    :return: int if count is 1, ndarray otherwise.
+    """
+    values = read_array(f, '<i4', count)
+    return int(values[0]) if count == 1 else values
+
+
+def read_float32(f):
+    """
+    Read 32-bit float.
+    """
+    return float(read_array(f, '<f4', 1)[0])
+
+
+def read_array(f, dtype, count):
+    """
+    Read an array of the given type by one read of the buffer.
+
+    :param f: binary file object.
+    :param dtype: type of values.
+    :param count: number of values.
+    :return: ndarray.
+    """
+    size = np.dtype(dtype).itemsize * count
+    data = f.read(size)
+    if len(data) != size:
+        raise Exception('Unexpected end of binary tecplot file')
+    return np.frombuffer(data, dtype=dtype)
+
+
+def read_string(f):
+    """
+    Read string of 32-bit character codes ending with zero.
+    """
+    chars = list()
+    while True:
+        c = read_int32(f)
+        if c == 0:
+            return ''.join(chars)
+        chars.append(chr(c))
+
+
+def read_zone_header(f):
+    """
+    Read a zone record of the header section after the zone marker.
+
+    :param f: binary file object.
+    :return: dict: zone header with the keys like in ASCII files.
+    """
+    title = read_string(f)
+    read_int32(f, 2)
+    read_array(f, '<f8', 1)
+
+    _, zone_type, var_location, neighbors, connections = read_int32(f, 5).tolist()
+
+    if zone_type != FETRIANGLE:
+        raise Exception('Zone "{}" is not FETRIANGLE'.format(title))
+    if var_location or neighbors or connections:
+        raise Exception('Zone "{}" uses features not supported by the reader'.format(title))
+
+    nodes, elements = read_int32(f, 2).tolist()
+    read_int32(f, 3)
+
+    if read_int32(f) != 0:
+        raise Exception('Zone "{}" has auxiliary data not supported by the reader'.format(title))
+
+    return {'T': title, 'NODES': nodes, 'ELEMENTS': elements, 'DATAPACKING': 'BLOCK', 'ZONETYPE': 'FETRIANGLE'}
+
+
+def read_file_header(f, filename):
+    """
+    Read the header section of binary tecplot file.
+
+    :param f: binary file object at the start of the file.
+    :param filename: name of the file for messages.
+    :return: tuple (int, list of dicts): number of variables and zone headers.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise Exception('{} is not a binary tecplot file of version 112'.format(filename))
+
+    read_int32(f, 2)
+    read_string(f)
+    variables = read_int32(f)
+    for _ in range(variables):
+        read_string(f)
+
+    if variables < 2:
+        raise Exception('At least two variables X, Y are expected')
+
+    headers = list()
+    while True:
+        marker = read_float32(f)
+        if marker == EOH_MARKER:
+            break
+        if marker != ZONE_MARKER:
+            raise Exception('Records other than zones are not supported by the reader')
+        headers.append(read_zone_header(f))
+
+    return variables, headers
+
+
+def read_plt_headers(filename):
+    """
+    Read the headers of zones of binary tecplot file.
+
+    Headers of all zones go before the data, so only the header section is read.
+
+    :param filename: file to read from.
+    :return: tuple (int, list of dicts): number of variables and zone headers.
+    """
+    with open_input(filename, background=False) as f:
+        return read_file_header(f, filename)
+
+
+def plt_zone_offsets(filename):
+    """
+    Find the positions of zones in the data section without reading their data.
+
+    Only the formats of variables are read at the start of each zone,
+    the values and the connectivity list are skipped.
+
+    :param filename: file to scan.
+    :return: tuple (int, list, list of dicts): number of variables, positions of the zone markers
+    in the decompressed stream for compressed files and zone headers.
+    """
+    offsets = list()
+
+    with open_input(filename, background=False) as f:
+        variables, headers = read_file_header(f, filename)
+
+        for header in headers:
+            offsets.append(f.tell())
+            formats = read_zone_formats(f, variables)
+            size = sum(np.dtype(FORMATS[c]).itemsize for c in formats) * header['NODES'] + 12 * header['ELEMENTS']
+            f.seek(size, 1)
+
+    return variables, offsets, headers
+
+
+def read_plt_zone(filename, offset, header, variables):
+    """
+    Read the zone at the given position of the data section.
+
+    :param filename: file to read from.
+    :param offset: position of the zone marker found by `plt_zone_offsets`.
+    :param header: dict: zone header.
+    :param variables: number of variables.
+    :return: tuple (dict, ndarray (N, 2), ndarray (E, 3)): zone header,
+    coordinates of nodes and 0-based connectivity list.
+    """
+    with open_input(filename, background=False) as f:
+        f.seek(offset)
+        return (header,) + read_zone_data(f, header, variables)
+
+
+def read_zone_formats(f, variables):
+    """
+    Read the start of a zone of the data section up to its blocks of variables.
+
+    :param f: binary file object at the zone marker.
+    :param variables: number of variables.
+    :return: list of formats of variables, keys of FORMATS.
+    """
+    if read_float32(f) != ZONE_MARKER:
+        raise Exception('Zone marker expected in the data section')
+
+    formats = read_int32(f, variables).tolist()
+    if any(c not in FORMATS for c in formats):
+        raise Exception('Only float and double values are supported by the reader')
+
+    passive, sharing = read_int32(f, 2).tolist()
+    if passive or sharing or read_int32(f) != -1:
+        raise Exception('Passive and shared variables are not supported by the reader')
+
+    read_array(f, '<f8', 2 * variables)
+
+    return formats
+
+
+def read_zone_data(f, header, variables):
+    """
+    Read a zone of the data section.
+
+    :param f: binary file object at the zone marker.
+    :param header: dict: zone header.
+    :param variables: number of variables.
+    :return: tuple (ndarray (N, 2), ndarray (E, 3)): coordinates of nodes
+    and 0-based connectivity list.
+    """
+    formats = read_zone_formats(f, variables)
+
+    nodes = header['NODES']
+    blocks = [read_array(f, FORMATS[c], nodes) for c in formats]
+    coordinates = np.stack(blocks[:2], axis=1).astype(np.float64)
+
+    face_nodes = read_array(f, '<i4', 3 * header['ELEMENTS']).reshape(-1, 3).astype(np.int32)
+
+    return coordinates, face_nodes
+
+
+def iter_plt_zones(filename):
+    """
+    Read binary tecplot file zone by zone.
+
+    Values and connectivity of a zone are read by one read of the buffer each.
+
+    :param filename: file to read from.
+    :return: generator of tuples (dict, ndarray (N, 2), ndarray (E, 3)):
+    zone header, coordinates of nodes and 0-based connectivity list.
+    """
+    with open_input(filename, background=False) as f:
+        variables, headers = read_file_header(f, filename)
+
+        for header in headers:
+            yield (header,) + read_zone_data(f, header, variables)
@@ -0,0 +1,538 @@
+"""
+Module provides streaming reading of tecplot files zone by zone.
+"""
+import io
+import re
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from .compression import compression, open_input
+from .stats import NULL_STATS
+
+# Size of the chunk read from the file at once.
+READ_CHUNK = 1 << 20
+
+# Size of the chunk read at once when only headers are parced.
+HEADER_CHUNK = 1 << 12
+
+# Bytes separating tokens.
+SEPARATORS = b' \t\r\n,'
+
+# Keywords starting the records of tecplot file.
+RECORDS = ('TITLE', 'VARIABLES', 'ZONE', 'FILETYPE')
+
+
+class Tokenizer:
+    __doc__ = "Class splitting a binary stream into tokens of tecplot format reading it by chunks."
+
+    def __init__(self, f, offset=0, chunk=READ_CHUNK):
+        """
+        Construct tokenizer.
+
+        :param f: binary file object to read from.
+        :param offset: position of the stream in the file.
+        :param chunk: size of the chunk read at once.
+        """
+        self.f = f
+        self.chunk = chunk
+
+        # Unconsumed part of the stream starts at buffer[pos].
+        self.buffer = b''
+        self.pos = 0
+
+        # Position of buffer[0] in the file.
+        self.offset = offset
+
+        self.eof = False
+
+    def tell(self):
+        """
+        Position of the first unconsumed byte in the file.
+        """
+        return self.offset + self.pos
+
+    def fill(self):
+        """
+        Read the next chunk dropping the consumed part of the buffer.
+
+        :return: False if the end of the file is reached.
+        """
+        if self.eof:
+            return False
+
+        chunk = self.f.read(self.chunk)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.offset += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def skip(self):
+        """
+        Skip separators and comments.
+
+        :return: False if the end of the file is reached.
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in SEPARATORS:
+                self.pos += 1
+
+            if self.pos == len(self.buffer):
+                if not self.fill():
+                    return False
+                continue
+
+            if self.buffer[self.pos] != ord('#'):
+                return True
+
+            # Comment lasts to the end of line.
+            end = self.buffer.find(b'\n', self.pos)
+            while end == -1:
+                if not self.fill():
+                    self.pos = len(self.buffer)
+                    return False
+                end = self.buffer.find(b'\n', self.pos)
+            self.pos = end + 1
+
+    def end_of(self, stop):
+        """
+        Find the end of the token starting at self.pos.
+
+        :param stop: function telling whether the byte ends the token.
+        :return: position of the byte after the token in self.buffer.
+        """
+        end = self.pos + 1
+        while True:
+            while end < len(self.buffer) and not stop(self.buffer[end]):
+                end += 1
+            if end < len(self.buffer):
+                return end
+
+            # The token may continue in the next chunk.
+            shift = self.pos
+            if not self.fill():
+                return len(self.buffer)
+            end -= shift
+
+    def peek(self):
+        """
+        Return the next token without consuming it.
+
+        Quoted strings are returned with the quotes. Equality sign and
+        brackets are separate tokens.
+
+        :return: str token or None at the end of the file.
+        """
+        if not self.skip():
+            return None
+
+        first = self.buffer[self.pos]
+
+        if first == ord('"'):
+            end = self.end_of(lambda c: c == ord('"')) + 1
+        elif first in b'=()[]':
+            end = self.pos + 1
+        else:
+            end = self.end_of(lambda c: c in SEPARATORS or c in b'=()[]"')
+
+        return self.buffer[self.pos: end].decode()
+
+    def next(self):
+        """
+        Consume the next token.
+
+        :return: str token or None at the end of the file.
+        """
+        token = self.peek()
+        if token is not None:
+            self.pos += len(token.encode())
+        return token
+
+    def expect(self, expected):
+        """
+        Consume the next token checking its value.
+
+        :param expected: expected token.
+        """
+        token = self.next()
+        if token != expected:
+            raise Exception('Expected "{}" but found "{}" at byte {}'.format(expected, token, self.tell()))
+
+    def numbers(self, count):
+        """
+        Consume the given number of numeric tokens.
+
+        Numbers may be spread over any number of lines.
+
+        :param count: number of tokens.
+        :return: list of bytes tokens.
+        """
+        tokens = list()
+
+        while len(tokens) < count:
+            if not self.skip():
+                raise Exception('Unexpected end of file: {} more numbers expected'.format(count - len(tokens)))
+
+            # Only the part of the buffer ending with a separator contains whole tokens.
+            end = len(self.buffer)
+            if not self.eof:
+                end = max(self.buffer.rfind(c, self.pos) for c in (b' ', b'\n', b'\t', b','))
+                if end <= self.pos:
+                    self.fill()
+                    continue
+
+            left = count - len(tokens)
+            parts = self.buffer[self.pos: end].replace(b',', b' ').split(None, left)
+
+            if len(parts) > left:
+                # The rest goes after the last needed token.
+                self.pos = end - len(parts[left])
+                del parts[left]
+            else:
+                self.pos = end
+
+            tokens += parts
+
+        return tokens
+
+    def array(self, count, dtype):
+        """
+        Consume the given number of numbers as an array.
+
+        If the stream is a file on disk, the numbers are parced by NumPy
+        directly from the file in one call without creating Python objects.
+        Otherwise (e.g. a decompressed stream), or if the numbers are separated
+        not only by spaces, they are split into tokens by chunks.
+
+        :param count: number of numbers.
+        :param dtype: type of the array.
+        :return: ndarray of numbers.
+        """
+        start = self.tell()
+
+        # Decompressing streams have the file number of the compressed file.
+        if not isinstance(self.f, io.BufferedReader):
+            return np.array(self.numbers(count)).astype(dtype)
+
+        try:
+            self.f.fileno()
+            self.f.seek(start)
+        except (AttributeError, OSError, ValueError):
+            return np.array(self.numbers(count)).astype(dtype)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                values = np.fromfile(self.f, dtype=dtype, count=count, sep=' ')
+            except (ValueError, DeprecationWarning):
+                values = None
+
+        if values is not None and len(values) == count:
+            # Continue after the numbers.
+            self.offset = self.f.tell()
+        else:
+            self.f.seek(start)
+            self.offset = start
+
+        self.buffer = b''
+        self.pos = 0
+        self.eof = False
+
+        if values is not None and len(values) == count:
+            return values
+        return np.array(self.numbers(count)).astype(dtype)
+
+
+def is_number(token):
+    """
+    Whether the token starts a number.
+
+    :param token: str token.
+    """
+    return token[0].isdigit() or token[0] in '+-.'
+
+
+def value(tokenizer):
+    """
+    Consume the value of a key=value pair.
+
+    Values in parentheses like VARLOCATION = ([3]=CELLCENTERED)
+    are returned as a whole.
+
+    :param tokenizer: Tokenizer object.
+    :return: str value without quotes.
+    """
+    token = tokenizer.next()
+
+    if token == '(':
+        depth = 1
+        tokens = [token]
+        while depth:
+            token = tokenizer.next()
+            if token is None:
+                raise Exception('Unexpected end of file in parentheses')
+            depth += (token == '(') - (token == ')')
+            tokens.append(token)
+        return ' '.join(tokens)
+
+    return token.strip('"')
+
+
+def parce_zone_header(tokenizer):
+    """
+    Parce zone header given after the word ZONE.
+
+    Keys may go in any order and be separated by any spaces,
+    commas and line breaks. Short forms N, E, F, ET are translated
+    into NODES, ELEMENTS, DATAPACKING, ZONETYPE.
+
+    :param tokenizer: Tokenizer object.
+    :return: dict: upper-case keys and values of the header.
+    """
+    header = dict()
+
+    while True:
+        token = tokenizer.peek()
+        if token is None or is_number(token) or token.upper() in RECORDS:
+            break
+
+        key = tokenizer.next().upper()
+        tokenizer.expect('=')
+        header[key] = value(tokenizer)
+
+    if 'N' in header:
+        header['NODES'] = header.pop('N')
+    if 'E' in header:
+        header['ELEMENTS'] = header.pop('E')
+    if 'ET' in header:
+        header['ZONETYPE'] = 'FE' + header.pop('ET').upper()
+    if 'F' in header:
+        header['DATAPACKING'] = header.pop('F').upper()[2:]
+
+    header.setdefault('T', '')
+    header.setdefault('DATAPACKING', 'POINT')
+    header.setdefault('ZONETYPE', 'ORDERED')
+
+    if header['ZONETYPE'].upper() != 'FETRIANGLE':
+        raise Exception('Zone "{}" is not FETRIANGLE'.format(header['T']))
+    if 'NODES' not in header or 'ELEMENTS' not in header:
+        raise Exception('Zone "{}" has no number of nodes or elements'.format(header['T']))
+
+    header['NODES'] = int(header['NODES'])
+    header['ELEMENTS'] = int(header['ELEMENTS'])
+    header['DATAPACKING'] = header['DATAPACKING'].upper()
+
+    return header
+
+
+def parce_variables(tokenizer):
+    """
+    Parce the names of variables given after VARIABLES =.
+
+    :param tokenizer: Tokenizer object.
+    :return: list of names.
+    """
+    names = list()
+
+    while True:
+        token = tokenizer.peek()
+        if token is None or token.upper() in RECORDS and not token.startswith('"'):
+            return names
+        names.append(tokenizer.next().strip('"'))
+
+
+def parce_zone_data(tokenizer, header, variables):
+    """
+    Parce values of variables and connectivity list of a zone.
+
+    :param tokenizer: Tokenizer object.
+    :param header: dict: zone header.
+    :param variables: number of variables.
+    :return: tuple (ndarray (N, 2), ndarray (E, 3)): coordinates of nodes
+    and 0-based connectivity list.
+    """
+    nodes = header['NODES']
+    faces = header['ELEMENTS']
+
+    values = tokenizer.array(nodes * variables, np.float64)
+
+    if header['DATAPACKING'] == 'BLOCK':
+        coordinates = values.reshape(variables, nodes)[:2].T.copy()
+    else:
+        coordinates = values.reshape(nodes, variables)[:, :2].copy()
+
+    face_nodes = tokenizer.array(faces * 3, np.int32).reshape(faces, 3) - 1
+
+    return coordinates, face_nodes
+
+
+def parce_file_header(tokenizer):
+    """
+    Parce the records going before the first zone.
+
+    :param tokenizer: Tokenizer object.
+    :return: number of variables.
+    """
+    variables = 2
+
+    while True:
+        token = tokenizer.peek()
+        if token is None or token.upper() == 'ZONE':
+            return variables
+
+        key = tokenizer.next().upper()
+
+        if key == 'VARIABLES':
+            tokenizer.expect('=')
+            variables = len(parce_variables(tokenizer))
+            if variables < 2:
+                raise Exception('At least two variables X, Y are expected')
+
+        elif key in ('TITLE', 'FILETYPE'):
+            tokenizer.expect('=')
+            value(tokenizer)
+
+        else:
+            raise Exception('Unexpected "{}" at byte {}'.format(token, tokenizer.tell()))
+
+
+def parce_zone(tokenizer, variables):
+    """
+    Parce a zone starting with the word ZONE.
+
+    :param tokenizer: Tokenizer object.
+    :param variables: number of variables.
+    :return: tuple (dict, ndarray (N, 2), ndarray (E, 3)): zone header,
+    coordinates of nodes and 0-based connectivity list.
+    """
+    token = tokenizer.next()
+    if token.upper() != 'ZONE':
+        raise Exception('Expected "ZONE" but found "{}" at byte {}'.format(token, tokenizer.tell()))
+
+    header = parce_zone_header(tokenizer)
+    coordinates, face_nodes = parce_zone_data(tokenizer, header, variables)
+    return header, coordinates, face_nodes
+
+
+def zone_offsets(filename):
+    """
+    Find the positions of zones in the file without parcing them.
+
+    The file is scanned by chunks for the lines starting with the word ZONE.
+
+    :param filename: file to scan.
+    :return: list of positions of the word ZONE of each zone
+    in the decompressed stream for compressed files.
+    """
+    pattern = re.compile(rb'^[ \t]*zone\b', re.IGNORECASE | re.MULTILINE)
+    offsets = list()
+
+    with open_input(filename) as f:
+        # Position of data[0] in the file. It is always the start of a line.
+        base = 0
+        data = b''
+
+        while True:
+            chunk = f.read(READ_CHUNK)
+            data += chunk
+
+            # Only whole lines are scanned until the end of the file.
+            end = data.rfind(b'\n') + 1 if chunk else len(data)
+
+            offsets += [base + m.end() - 4 for m in pattern.finditer(data, 0, end)]
+
+            base += end
+            data = data[end:]
+
+            if not chunk:
+                return offsets
+
+
+def read_zone_headers(filename, offsets=None):
+    """
+    Read the headers of zones without parcing their values and connectivity lists.
+
+    The file is scanned for zones by `zone_offsets`, then only a few bytes
+    at the position of each zone are parced.
+
+    :param filename: file to read from.
+    :param offsets: positions of zones found by `zone_offsets` before.
+    :return: tuple (int, list, list of dicts): number of variables, positions of zones and their headers.
+    """
+    if offsets is None:
+        offsets = zone_offsets(filename)
+
+    headers = list()
+
+    with open_input(filename, background=False) as f:
+        variables = parce_file_header(Tokenizer(f, chunk=HEADER_CHUNK))
+
+        for offset in offsets:
+            f.seek(offset)
+            tokenizer = Tokenizer(f, offset, HEADER_CHUNK)
+            token = tokenizer.next()
+            if token is None or token.upper() != 'ZONE':
+                raise Exception('Expected "ZONE" but found "{}" at byte {}'.format(token, offset))
+            headers.append(parce_zone_header(tokenizer))
+
+    return variables, offsets, headers
+
+
+def read_zone(filename, offset, variables):
+    """
+    Read the zone at the given position of the file.
+
+    :param filename: file to read from.
+    :param offset: position of the word ZONE.
+    :param variables: number of variables.
+    :return: tuple (dict, ndarray (N, 2), ndarray (E, 3)): zone header,
+    coordinates of nodes and 0-based connectivity list.
+    """
+    with open_input(filename, background=False) as f:
+        f.seek(offset)
+        return parce_zone(Tokenizer(f, offset), variables)
+
+
+def iter_tecplot_zones(filename, workers=None, stats=None):
+    """
+    Read tecplot file zone by zone.
+
+    The file is read by chunks, so only one zone is kept in memory.
+
+    If several workers are given, the positions of zones are found first
+    and zones are parced in parallel by worker processes which send back
+    arrays. Zones are yielded in the order of the file.
+
+    Files compressed by gzip or xz are decompressed by chunks while reading,
+    see `compression`. They are read by one process, as a worker would have to
+    decompress the file up to its zone.
+
+    :param filename: file to read from.
+    :param workers: number of worker processes.
+    :param stats: Stats object to time the scan of the file for zones.
+    :return: generator of tuples (dict, ndarray (N, 2), ndarray (E, 3)):
+    zone header, coordinates of nodes and 0-based connectivity list.
+    """
+    if compression(filename) is not None:
+        workers = None
+
+    with open_input(filename) as f:
+        tokenizer = Tokenizer(f)
+        variables = parce_file_header(tokenizer)
+
+        if workers is None or workers < 2:
+            while tokenizer.peek() is not None:
+                yield parce_zone(tokenizer, variables)
+            return
+
+    with (stats or NULL_STATS).phase('scan'):
+        offsets = zone_offsets(filename)
+
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(read_zone, repeat(filename), offsets, repeat(variables))
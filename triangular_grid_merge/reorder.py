@@ -0,0 +1,192 @@
+"""
+Module provides orders of nodes and faces improving locality of a grid.
+
+    hilbert - nodes go along the Hilbert curve through the bounding box,
+    so nodes close in space get close ids;
+
+    rcm - reverse Cuthill-McKee order: nodes are numbered by levels of
+    breadth-first search from a peripheral node, which reduces the bandwidth
+    of the node adjacency (the largest difference of ids of nodes of a face).
+
+Faces are sorted by their nodes' new ids, so the faces of a node are
+close to each other as well. See `Grid.reorder`.
+"""
+import numpy as np
+
+# Bits of each coordinate of a node on the Hilbert curve.
+HILBERT_BITS = 16
+
+
+def hilbert_keys(coordinates, bits=HILBERT_BITS):
+    """
+    Positions of the points on the Hilbert curve through their bounding box.
+
+    The box is divided into 2^bits x 2^bits cells, the position of a point
+    is the number of its cell along the curve.
+
+    :param coordinates: (N, 2) array of points.
+    :param bits: bits of each coordinate.
+    :return: (N,) int64 array of positions.
+    """
+    side = 1 << bits
+    if not len(coordinates):
+        return np.empty(0, dtype=np.int64)
+
+    lo = coordinates.min(axis=0)
+    span = coordinates.max(axis=0) - lo
+    span[span == 0] = 1
+
+    cells = ((coordinates - lo) / span * (side - 1)).astype(np.int64)
+    x = cells[:, 0]
+    y = cells[:, 1]
+
+    keys = np.zeros(len(coordinates), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        keys += s * s * ((3 * rx) ^ ry)
+
+        # Rotate the quadrant, so the curve inside it starts at its corner.
+        flip = rx & ~ry
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+
+    return keys
+
+
+def hilbert_order(coordinates):
+    """
+    Order of the nodes along the Hilbert curve.
+
+    :param coordinates: (N, 2) array of nodes.
+    :return: (N,) int64 array: order[k] is the old id of the node k.
+    """
+    return np.argsort(hilbert_keys(coordinates), kind='stable')
+
+
+def node_graph(edge_nodes, count):
+    """
+    Adjacency of nodes connected by edges in compressed sparse rows.
+
+    :param edge_nodes: (E, 2) array of edges' nodes, each pair once.
+    :param count: number of nodes.
+    :return: tuple (ndarray (count + 1,), ndarray): offsets and ids of the neighbours
+    of each node in ascending order.
+    """
+    pairs = np.concatenate((edge_nodes, edge_nodes[:, ::-1])).astype(np.int64)
+    keys = np.sort(pairs[:, 0] * count + pairs[:, 1])
+    nodes = keys // count
+
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(nodes, minlength=count), out=offsets[1:])
+
+    return offsets, keys % count
+
+
+def bfs_levels(offsets, neighbours, degree, start, visited):
+    """
+    Levels of breadth-first search in Cuthill-McKee order.
+
+    The unvisited neighbours of a level are numbered in order of their first
+    parent in the level, the neighbours of a node by ascending degree.
+
+    :param offsets: offsets of `node_graph`.
+    :param neighbours: neighbours of `node_graph`.
+    :param degree: (N,) array of numbers of neighbours.
+    :param start: id of the first node.
+    :param visited: (N,) bool array, marked for the nodes of the levels.
+    :return: generator of int64 arrays: nodes of each level.
+    """
+    level = np.array([start], dtype=np.int64)
+    visited[start] = True
+
+    while len(level):
+        yield level
+
+        counts = degree[level]
+        total = int(counts.sum())
+        if not total:
+            return
+
+        # Neighbours of the level's nodes one node after another.
+        shift = np.repeat(offsets[level] - (np.cumsum(counts) - counts), counts)
+        found = neighbours[shift + np.arange(total)]
+        parent = np.repeat(np.arange(len(level)), counts)
+
+        fresh = ~visited[found]
+        found = found[fresh]
+        parent = parent[fresh]
+
+        found = found[np.lexsort((found, degree[found], parent))]
+        _, first = np.unique(found, return_index=True)
+
+        level = found[np.sort(first)]
+        visited[level] = True
+
+
+def peripheral_node(offsets, neighbours, degree, start, visited):
+    """
+    Find a node of the component far from the others.
+
+    Starting from the node, go to the node of the least degree in the last
+    level of breadth-first search while the number of levels grows.
+
+    :return: id of the node.
+    """
+    depth = 0
+    while True:
+        levels = list(bfs_levels(offsets, neighbours, degree, start, visited.copy()))
+        if len(levels) <= depth:
+            return start
+        depth = len(levels)
+        last = levels[-1]
+        candidate = last[np.argmin(degree[last])]
+        if candidate == start:
+            return start
+        start = candidate
+
+
+def rcm_order(edge_nodes, count):
+    """
+    Reverse Cuthill-McKee order of the nodes.
+
+    Each connected component is numbered from its peripheral node.
+    Nodes of no edge go last in order of their ids.
+
+    :param edge_nodes: (E, 2) array of edges' nodes, each pair once.
+    :param count: number of nodes.
+    :return: (count,) int64 array: order[k] is the old id of the node k.
+    """
+    offsets, neighbours = node_graph(edge_nodes, count)
+    degree = np.diff(offsets)
+
+    visited = degree == 0
+    order = list()
+
+    # Components start from the unvisited node of the least degree.
+    candidates = np.argsort(degree, kind='stable')
+    c = 0
+    while True:
+        while c < count and visited[candidates[c]]:
+            c += 1
+        if c == count:
+            break
+        start = peripheral_node(offsets, neighbours, degree, candidates[c], visited)
+        order += list(bfs_levels(offsets, neighbours, degree, start, visited))
+
+    order = np.concatenate(order)[::-1] if order else np.empty(0, dtype=np.int64)
+    return np.concatenate((order, np.flatnonzero(degree == 0)))
+
+
+def face_order(face_nodes):
+    """
+    Order of the faces by the sorted ids of their nodes.
+
+    :param face_nodes: (F, 3) array of faces' nodes.
+    :return: (F,) int64 array: order[k] is the old id of the face k.
+    """
+    nodes = np.sort(face_nodes, axis=1)
+    return np.lexsort((nodes[:, 2], nodes[:, 1], nodes[:, 0]))
@@ -0,0 +1,125 @@
+"""
+Module provides the collector of timings and counters of reading and writing grids.
+
+    stats = Stats()
+    read_tecplot(grid, 'name.dat', stats=stats)
+    print(stats.to_json())
+
+Phases are timed by wall clock, a phase entered several times (like parsing
+of each zone) accumulates its time, number of calls and items. Counters
+accumulate numbers like comparisons of coordinates done by merge algorithms.
+
+Functions taking `stats=None` use NULL_STATS then, which does nothing,
+so the instrumentation costs nothing when it is off.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class Stats:
+    __doc__ = "Collector of wall time of phases and counters."
+
+    def __init__(self):
+        # Name of the phase -> dict with seconds, calls and items.
+        self.phases = dict()
+        # Name of the counter -> number.
+        self.counters = dict()
+
+    def add_phase(self, name, seconds, items=0):
+        """
+        Add the time and items of a call of the phase.
+
+        :param name: name of the phase.
+        :param seconds: wall time of the call.
+        :param items: number of items processed by the call.
+        """
+        phase = self.phases.setdefault(name, {'seconds': 0.0, 'calls': 0, 'items': 0})
+        phase['seconds'] += seconds
+        phase['calls'] += 1
+        phase['items'] += items
+
+    @contextmanager
+    def phase(self, name, items=0):
+        """
+        Time the block of code as a call of the phase.
+
+            with stats.phase('set_nodes', len(nodes)):
+                ...
+
+        :param name: name of the phase.
+        :param items: number of items processed by the block.
+        """
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_phase(name, time.perf_counter() - start, items)
+
+    def timed(self, name, iterable, items=None):
+        """
+        Time getting of each element of the iterable as a call of the phase.
+
+        :param name: name of the phase.
+        :param iterable: iterable to go through.
+        :param items: function giving the number of items of an element.
+        :return: generator of the elements.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                element = next(iterator)
+            except StopIteration:
+                return
+            self.add_phase(name, time.perf_counter() - start, items(element) if items else 0)
+            yield element
+
+    def count(self, name, number=1):
+        """
+        Add the number to the counter.
+        """
+        self.counters[name] = self.counters.get(name, 0) + int(number)
+
+    def as_dict(self):
+        """
+        :return: dict with phases and counters.
+        """
+        return {'phases': {name: dict(phase) for name, phase in self.phases.items()},
+                'counters': dict(self.counters)}
+
+    def to_json(self, **kwargs):
+        """
+        :return: str: JSON of phases and counters.
+        """
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def log(self, logger=None, level=logging.INFO):
+        """
+        Write phases and counters to the log, one line each.
+
+        :param logger: logger to write to. The logger of the module if not given.
+        :param level: level of messages.
+        """
+        logger = logger or logging.getLogger(__name__)
+        for name, phase in self.phases.items():
+            logger.log(level, '%s: %.6f s, %d calls, %d items', name, phase['seconds'], phase['calls'], phase['items'])
+        for name, number in self.counters.items():
+            logger.log(level, '%s: %d', name, number)
+
+
+class NullStats:
+    __doc__ = "Collector doing nothing."
+
+    def phase(self, name, items=0):
+        return nullcontext(self)
+
+    def timed(self, name, iterable, items=None):
+        return iterable
+
+    def count(self, name, number=1):
+        pass
+
+
+NULL_STATS = NullStats()
@@ -1,53 +1,183 @@
 """
 Module provides interaction with tecplot format.
 """
+import logging
+
+import numpy as np
+
+from . import cache
+from .compression import open_output, strip_extension
+from .pipeline import PipelinedWriter
+from .auto import choose_algorithm, GridFeatures
+from .stats import NULL_STATS
 from .node import Node
 from .face import Face
-from .edge import Edge
-from .grid import Grid
 from .zone import Zone
-from .node_algorithms import n_square, dichotomy_1_sided, dichotomy_2_sided
+from .grid import Grid
+from .reader import iter_tecplot_zones, read_zone_headers
+from .plt import iter_plt_zones, print_plt, read_plt_headers
+from .node_algorithms import n_square, dichotomy_1_sided, dichotomy_2_sided, spatial_hash, merge_coordinates, \
+    merge_boundaries, SpatialHash
+
+logger = logging.getLogger(__name__)
 
+# Size of the buffer of the written file.
+WRITE_BUFFER = 1 << 20
 
-def print_tecplot(grid, filename, merge=False):
+# Number of values or faces formatted at once.
+CHUNK = 1 << 16
+
+# Algorithms to merge nodes of zones, see `read_tecplot`.
+ALGORITHMS = ['n_square', 'dichotomy_1_sided', 'dichotomy_2_sided', 'spatial_hash', 'sorted_batch', 'boundary', 'auto']
+
+
+def print_tecplot(grid, filename, merge=False, format=None, stats=None, reorder=None, pipeline=False,
+                  workers=None):
     """
     Write grid containing multiple zones to the file.
 
+    The file is opened once and written through a large buffer.
+
     :param grid: Grid object.
     :param filename: file to write in.
     :param merge: (bool) whether to merge grid.
     Use ids of the nodes in grid.Nodes instead of zone.Nodes.
     And the ids of faces from grid.Faces instead of zone.Faces.
     I.e. continuing numbering through the grid.
+    :param format: 'dat' for ASCII or 'plt' for binary tecplot format.
+    Chosen by the extension of the file if not given.
+    :param stats: Stats object to collect wall time of writing (write, pack, reorder, write_zone)
+    and numbers of written zones, nodes and faces.
+    :param reorder: 'hilbert' or 'rcm' to renumber nodes and faces of the merged grid
+    before writing, see `Grid.reorder`. The grid keeps the new numbering.
+    :param pipeline: (bool) format chunks of blocks of variables and of the connectivity list
+    of ASCII file in worker processes while the formatted chunks are written, see `pipeline`.
+    The file is the same. Phases of stats time submitting of chunks then.
+    :param workers: number of worker processes of the pipeline. The number of CPUs if not given.
+    """
+    if stats is None:
+        stats = NULL_STATS
+
+    if reorder is not None and not merge:
+        raise Exception('Reorder is only done for the merged grid.')
+
+    with stats.phase('write'):
+        # Grids assembled from objects only have no tables yet.
+        if grid.coordinates is None:
+            with stats.phase('pack'):
+                grid.pack()
+
+        if reorder is not None:
+            with stats.phase('reorder', len(grid.coordinates)):
+                grid.reorder(reorder)
+
+        if file_format(filename, format) == 'plt':
+            print_plt(grid, filename, merge)
+        else:
+            with open_output(filename, WRITE_BUFFER) as f:
+                if pipeline:
+                    with PipelinedWriter(f, workers) as writer:
+                        print_grid(grid, writer, merge, stats)
+                else:
+                    print_grid(grid, f, merge, stats)
+
+
+def print_grid(grid, f, merge=False, stats=None):
+    """
+    Write the header and the zones of the grid.
+
+    :param grid: Grid object.
+    :param f: text file object or PipelinedWriter to write in.
+    :param merge: (bool) whether to write the merged grid as a single zone.
+    :param stats: Stats object to time writing of zones.
     """
-    print_tecplot_header(filename)
+    print_tecplot_header(f)
 
     if merge:
-        print_merged_grid(grid, filename)
+        print_merged_grid(grid, f, stats)
     else:
-        print_zones(grid, filename)
+        print_zones(grid, f, stats)
+
 
+def write_structured_tecplot(filename, xn, yn, x, y, chunk_rows=None):
+    """
+    Write the structured grid Grid.init would make without building it.
 
-def print_zones(grid, filename):
+    Blocks of X and Y and the connectivity list are generated and written
+    by bands of chunk_rows rows, so the memory used does not depend on the
+    size of the grid. The file is the same print_tecplot writes for the grid.
+
+    :param filename: file to write in.
+    :param xn: number of points by x-axis.
+    :param yn: number of points by y-axis.
+    :param x: tuple (x1, x2) x-coordinates for the area to put the grid in.
+    :param y: tuple (y1, y2) y-coordinates for the area to put the grid in.
+    :param chunk_rows: number of rows of points or squares in a band.
+    By default a band holds about CHUNK nodes.
     """
-    Print grid's zones to the filename.
+    assert xn > 1, "The number of points should be more than one."
+    assert yn > 1, "The number of points should be more than one."
+    assert x[0] < x[1], 'The second point should be x1 < x2'
+    assert y[0] < y[1], 'The second point should be y1 < y2'
+
+    if chunk_rows is None:
+        chunk_rows = max(1, CHUNK // xn)
+    assert chunk_rows > 0, 'The band should contain at least one row.'
+
+    xs = Grid.structured_axis(xn, x)
+    ys = Grid.structured_axis(yn, y)
+
+    with open_output(filename, WRITE_BUFFER) as f:
+        print_tecplot_header(f)
+        print_zone_sizes(f, 'ZONE 1', Grid.number_of_nodes(xn, yn), Grid.number_of_faces(xn, yn))
+
+        # Variables' values.
+        for k in range(2):
+            for first in range(0, yn, chunk_rows):
+                last = min(first + chunk_rows, yn)
+                if k == 0:
+                    band = np.tile(xs, last - first)
+                else:
+                    band = np.repeat(ys[first: last], xn)
+                for chunk in format_values(band):
+                    f.write(chunk)
+            f.write('\n')
+
+        # Connectivity list.
+        for first in range(0, yn - 1, chunk_rows):
+            last = min(first + chunk_rows, yn - 1)
+            print_connectivity_list(f, Grid.structured_faces(xn, first, last))
+
+
+def print_zones(grid, f, stats=None):
+    """
+    Print grid's zones to the file.
 
     Warning! if you use this function to add zones
     to the existing tecplot file already containing zones
     then the numeration of zone titles should be handled manually.
 
     :param grid: Grid object.
-    :param filename: file to plot zones in.
+    :param f: text file object to plot zones in.
+    :param stats: Stats object to time writing of each zone.
     """
+    if stats is None:
+        stats = NULL_STATS
+
     for i, z in enumerate(grid.Zones):
-        print_zone_header(filename, 'ZONE {}'.format(i + 1), z.Nodes, z.Faces)
+        with stats.phase('write_zone', len(z.node_ids)):
+            coordinates, face_nodes = grid.zone_arrays(z)
+
+            print_zone_header(f, 'ZONE {}'.format(i + 1), coordinates, face_nodes)
+
+            print_variables(f, coordinates)
 
-        print_variables(filename, z.Nodes)
+            print_connectivity_list(f, face_nodes)
 
-        print_connectivity_list(filename, z.Nodes, z.Faces)
+        count_written(stats, coordinates, face_nodes)
 
 
-def print_merged_grid(grid, filename):
+def print_merged_grid(grid, f, stats=None):
     """
     Merge all zones and print the grid as single zone.
 
@@ -55,24 +185,70 @@ def print_merged_grid(grid, filename):
      instead of their position zone-wise.
 
     :param grid: Grid object.
-    :param filename: file to write in.
+    :param f: text file object to write in.
+    :param stats: Stats object to time writing of the zone.
     """
     assert len(grid.Zones) > 1, '\nGrid is not multizone.\n'
 
-    print_zone_header(filename, 'ZONE 1', grid.Nodes, grid.Faces)
+    if stats is None:
+        stats = NULL_STATS
+
+    with stats.phase('write_zone', len(grid.coordinates)):
+        print_zone_header(f, 'ZONE 1', grid.coordinates, grid.face_nodes)
+
+        print_variables(f, grid.coordinates)
+
+        print_connectivity_list(f, grid.face_nodes)
+
+    count_written(stats, grid.coordinates, grid.face_nodes)
 
-    print_variables(filename, grid.Nodes)
 
-    print_connectivity_list(filename, grid.Nodes, grid.Faces)
+def count_written(stats, coordinates, face_nodes):
+    """
+    Count a written zone, its nodes and faces.
+    """
+    stats.count('written_zones')
+    stats.count('written_nodes', len(coordinates))
+    stats.count('written_faces', len(face_nodes))
 
 
-def read_tecplot(grid, filename, algorithm='dichotomy_2_sided'):
+def file_format(filename, format=None):
+    """
+    Choose tecplot format of the file.
+
+    :param filename: name of the file.
+    :param format: 'dat', 'plt' or None to choose by the extension of the file
+    (the one before .gz or .xz for compressed files).
+    :return: 'dat' or 'plt'.
+    """
+    if format is None:
+        format = 'plt' if strip_extension(filename).lower().endswith('.plt') else 'dat'
+
+    if format not in ['dat', 'plt']:
+        raise Exception('Wrong name for format')
+
+    return format
+
+
+def read_tecplot(grid, filename, algorithm='dichotomy_2_sided', format=None, workers=None, cache_dir=None, stats=None,
+                 cache_size=cache.CACHE_SIZE):
     """
     Read tecplot file.
 
     :param grid: Grid object.
     :param filename: file to read from.
     :param algorithm: algorithm to compare nodes' coordinates when merging zones.
+    :param format: 'dat' for ASCII or 'plt' for binary tecplot format.
+    Chosen by the extension of the file if not given.
+    :param workers: number of processes to parce zones of ASCII file in parallel.
+    :param cache_dir: directory of the binary cache of read grids, see `cache`.
+    When the grid is empty and the file was read before with the same algorithm and EPS,
+    the tables are memory-mapped from the cache instead of parcing and merging.
+    Errors of the cache are logged and the file is read as if there was no cache.
+    :param stats: Stats object to collect wall time of phases (read, scan, parse, set_nodes,
+    set_faces...) and counters of the merge, see `stats`.
+    :param cache_size: bound of the total size of entries in cache_dir in bytes.
+    The least recently used entries are removed when the cache grows over it.
 
     `n_square` given a node searches for it by trivial element by element search.
 
@@ -82,128 +258,314 @@ def read_tecplot(grid, filename, algorithm='dichotomy_2_sided'):
     `dichotomy_1_sided` given a node uses dichotomy to locate a node with equal x-coordinate and which stays first
     of all nodes with equal x-coordinate when the algorithm continues to compare y-coordinate of neighbor elements
     with equal x-coordinates in one directions (to the right).
+
+    `spatial_hash` puts nodes into square cells with the side EPS and given a node compares it
+    only with the nodes from the nine cells around it. Takes expected linear time.
+
+    `sorted_batch` sorts nodes by square cells with the side 4 * EPS, so the square of side 2 * EPS
+    around a node overlaps at most four cells, and searches for all nodes of a zone at once
+    using vectorized comparisons.
+
+    `boundary` searches only for the nodes on the boundary of a zone among the nodes
+    on the boundaries of the grid and of the earlier zones whose bounding boxes touch it.
+    Interior nodes are appended without search, nodes of one zone are not merged
+    with each other.
+
+    `auto` chooses one of the algorithms above for each zone by the cost model of `auto`
+    from the sizes of the zone and the grid, the number of nodes sharing x-coordinate
+    and the overlap of the zone with the grid. Chosen algorithms are counted in `stats`
+    as auto_<name>. `boundary` is never chosen as it only suits zones meeting by boundaries.
     """
-    if algorithm not in ['n_square', 'dichotomy_1_sided', 'dichotomy_2_sided']:
+    if algorithm not in ALGORITHMS:
         raise Exception('Wrong name for algorithm')
 
-    file_with_grid = open(filename, 'r')
+    if stats is None:
+        stats = NULL_STATS
 
-    lines = file_with_grid.readlines()
+    with stats.phase('read'):
+        read_zones(grid, filename, algorithm, format, workers, cache_dir, stats, cache_size)
 
-    faces_count = list()
-    indexes = list()
 
-    # Find and remember all ELEMENTS words in the file.
-    # They design a start of zone.
-    for i, line in enumerate(lines):
-        if line.find('ELEMENTS =') != -1:
-            faces_count.append(number_of_faces(line))
+def read_headers(filename, format=None):
+    """
+    Read the headers of zones of tecplot file without reading their data.
 
-            # +3 is the correction to start from the line
-            # where the variables start.
-            indexes.append(i + 3)
+    ASCII file is scanned for the lines starting with ZONE, see `reader.read_zone_headers`,
+    binary file keeps all headers before the data.
 
-    # List of lists of nodes for each zone.
+    :param filename: file to read from.
+    :param format: 'dat' or 'plt'. Chosen by the extension of the file if not given.
+    :return: list of dicts: zone headers with the keys T, NODES, ELEMENTS...
+    """
+    if file_format(filename, format) == 'plt':
+        return read_plt_headers(filename)[1]
+    return read_zone_headers(filename)[2]
+
+
+def read_zones(grid, filename, algorithm, format, workers, cache_dir, stats, cache_size=cache.CACHE_SIZE):
+    """
+    Read zones of tecplot file into the grid, see `read_tecplot`.
+    """
+    # Grids assembled from objects only have no tables yet.
+    if grid.coordinates is None:
+        grid.pack()
+
+    # The merge depends on the nodes already in the grid, so only empty grids are cached.
+    entry = None
+    if cache_dir is not None and (grid.coordinates is None or not len(grid.coordinates)) and not grid.Zones:
+        entry = cache.entry_path(cache_dir, filename, algorithm, file_format(filename, format))
+        with stats.phase('cache_load'):
+            try:
+                loaded = cache.load(grid, entry, filename)
+            except Exception as e:
+                logger.warning('Cache entry %s of %s is not loaded: %s', entry, filename, e)
+                loaded = False
+            if loaded:
+                stats.count('cache_hits')
+                return
+        stats.count('cache_misses')
+
+    # List of arrays of nodes' coordinates for each zone.
     nodes = list()
-    # List of lists of faces for each zone.
+    # List of arrays of faces' nodes for each zone.
     faces = list()
 
-    # Extract each zone from certain lines using indexes of lines
-    # obtained earlier.
-    for f, i in zip(faces_count, indexes):
-        # Create a zone.
+    if file_format(filename, format) == 'plt':
+        zones = iter_plt_zones(filename)
+    else:
+        zones = iter_tecplot_zones(filename, workers, stats)
+
+    # Zones are parced one by one while reading the file.
+    for header, coordinates, face_nodes in stats.timed('parse', zones, lambda zone: len(zone[1])):
+        nodes.append(coordinates)
+        faces.append(face_nodes)
+
+    merge_zones(grid, nodes, faces, algorithm, stats)
+
+    if entry is not None:
+        with stats.phase('cache_store'):
+            try:
+                cache.store(grid, entry, filename, cache_size)
+            except Exception as e:
+                # The grid is read anyway.
+                logger.warning('Grid of %s is not stored in the cache %s: %s', filename, cache_dir, e)
+
+
+def merge_zones(grid, nodes, faces, algorithm, stats=None):
+    """
+    Merge zones into the grid adding a Zone object for each of them.
+
+    :param grid: Grid object.
+    :param nodes: list of (n, 2) arrays of coordinates of zones' nodes.
+    :param faces: list of (f, 3) arrays of 0-based zone-local ids of faces' nodes.
+    :param algorithm: algorithm to merge nodes, see `read_tecplot`.
+    :param stats: Stats object to time the merge.
+    :return: list of added Zone objects.
+    """
+    if stats is None:
+        stats = NULL_STATS
+
+    # Grids assembled from objects only have no tables yet.
+    if grid.coordinates is None:
+        grid.pack()
+
+    zones = list()
+    for _ in nodes:
         z = Zone()
+        z.grid = grid
         grid.Zones.append(z)
+        zones.append(z)
 
-        # Return nodes and faces for the zone
-        # by parcing the file.
-        parces_nodes, parces_faces = parce_nodes_and_faces(lines[i: i + 2 + f])
-        nodes.append(parces_nodes)
-        faces.append(parces_faces)
+    stats.count('zones', len(nodes))
+    stats.count('zone_nodes', sum(len(c) for c in nodes))
+    stats.count('faces', sum(len(f) for f in faces))
 
-        z.Nodes = parces_nodes
-        z.Faces = parces_faces
+    with stats.phase('set_nodes', sum(len(c) for c in nodes)):
+        remaps = set_nodes(grid, nodes, algorithm, faces, stats)
 
-    set_nodes(grid, nodes, algorithm)
+    with stats.phase('set_faces', sum(len(f) for f in faces)):
+        set_faces(grid, remaps, faces, zones, stats)
 
-    for f, n in zip(faces, nodes):
-        set_faces(grid, n, f)
-        grid.Faces += f
+    stats.count('nodes', len(grid.coordinates))
+    stats.count('edges', len(grid.edge_nodes))
 
-    # Init new elements' ids.
-    grid.init_ids()
+    # Objects are created from the new tables on demand.
+    grid.drop_objects()
 
+    return zones
 
-def set_nodes(grid, nodes, algorithm):
+
+def set_nodes(grid, nodes, algorithm, faces=None, stats=None):
     """
-    Fill grid.Nodes list with unique nodes from each zone.
+    Fill grid.coordinates with unique nodes from each zone.
 
     :param grid: Grid object.
-    :param nodes: list of lists of nodes for each zone.
+    :param nodes: list of (n, 2) arrays of coordinates of zones' nodes.
     :param algorithm: algorithm to merge nodes from multiple zones.
+    :param faces: list of (f, 3) arrays of 0-based zone-local ids of faces' nodes.
+    Needed by `boundary` only.
+    :param stats: Stats object to collect counters of the merge.
+    :return: list of arrays: ids of each zone's nodes in grid.coordinates.
+    """
+    if stats is None:
+        stats = NULL_STATS
+
+    if grid.coordinates is None:
+        grid.coordinates = np.empty((0, 2), dtype=np.float64)
+
+    if algorithm == 'boundary':
+        # Nodes of the edges with a single face.
+        if grid.edge_nodes is None:
+            boundary = np.empty(0, dtype=np.int64)
+        else:
+            boundary = np.unique(grid.edge_nodes[grid.edge_faces[:, 1] == -1])
+        remaps, added = merge_boundaries(grid.coordinates, boundary, list(zip(nodes, faces)), stats)
+        grid.coordinates = np.concatenate((grid.coordinates, added))
+        return [remap.astype(np.int32) for remap in remaps]
+
+    if algorithm == 'sorted_batch':
+        remaps = list()
+        for points in nodes:
+            remap, added = merge_coordinates(grid.coordinates, points, stats=stats)
+            grid.coordinates = np.concatenate((grid.coordinates, points[added]))
+            remaps.append(remap.astype(np.int32))
+        return remaps
+
+    if algorithm == 'auto':
+        return set_nodes_auto(grid, nodes, stats)
+
+    return merge_objects(grid, nodes, algorithm, stats)[0]
+
+
+def set_nodes_auto(grid, nodes, stats):
     """
-    for n in nodes:
+    Fill grid.coordinates with unique nodes from each zone choosing
+    the algorithm for each zone by `auto.choose_algorithm`.
+
+    The bounding box and the order of the grid's nodes are kept in
+    grid.auto_features between zones and calls.
+
+    :param grid: Grid object.
+    :param nodes: list of (n, 2) arrays of coordinates of zones' nodes.
+    :param stats: Stats object to count the chosen algorithms as auto_<name>.
+    :return: list of arrays: ids of each zone's nodes in grid.coordinates.
+    """
+    features = grid.auto_features
+    if features is None or not features.is_valid(grid.coordinates):
+        features = GridFeatures(grid.coordinates)
+
+    remaps = list()
+
+    for points in nodes:
+        algorithm, estimates = choose_algorithm(grid.coordinates, points, features=features)
+        stats.count('auto_' + algorithm)
+        logger.debug('auto: %s for zone of %d nodes, estimates %s', algorithm, len(points), estimates)
+
+        if algorithm == 'sorted_batch':
+            remap, added = merge_coordinates(grid.coordinates, points, stats=stats)
+            # Node objects of the earlier zones are kept for the next zones.
+            grid.append_nodes(points[added])
+            remap = remap.astype(np.int32)
+        else:
+            (remap,), new_ids = merge_objects(grid, [points], algorithm, stats)
+            # Dichotomy may move the nodes of the earlier zones.
+            remaps = [new_ids[r] for r in remaps]
+
+        remaps.append(remap)
+        features.add(grid.coordinates, points, algorithm.startswith('dichotomy'))
+
+    grid.auto_features = features
+
+    return remaps
+
+
+def merge_objects(grid, nodes, algorithm, stats):
+    """
+    Merge zones' nodes into grid.Nodes by an algorithm working with Node objects
+    and fill grid.coordinates.
+
+    :param grid: Grid object.
+    :param nodes: list of (n, 2) arrays of coordinates of zones' nodes.
+    :param algorithm: n_square, dichotomy_1_sided, dichotomy_2_sided or spatial_hash.
+    :param stats: Stats object to collect counters of the merge.
+    :return: tuple (list, ndarray): ids of each zone's nodes in grid.coordinates
+    and new ids of the nodes which were in the grid before.
+    """
+    existing = list(grid.Nodes)
+    zones = list()
+    for points in nodes:
+        zone = list()
+        for x, y in points.tolist():
+            n = Node()
+            n.x = x
+            n.y = y
+            zone.append(n)
+        zones.append(zone)
+
+    # Spatial hash is kept for all the zones.
+    index = SpatialHash(grid.Nodes) if algorithm == 'spatial_hash' else None
+
+    for n in zones:
         if algorithm == 'n_square':
-            n_square(grid, n)
+            n_square(grid, n, stats)
         if algorithm == 'dichotomy_1_sided':
-            dichotomy_1_sided(grid, n)
+            dichotomy_1_sided(grid, n, stats)
         if algorithm == 'dichotomy_2_sided':
-            dichotomy_2_sided(grid, n)
+            dichotomy_2_sided(grid, n, stats)
+        if algorithm == 'spatial_hash':
+            spatial_hash(grid, n, index, stats)
+
+    if algorithm.startswith('dichotomy'):
+        with stats.phase('init_ids', len(grid.Nodes)):
+            grid.init_ids()
+
+        # Dichotomy keeps grid.Nodes sorted, so the existing nodes may move.
+        new_ids = np.array([n.Id for n in existing], dtype=np.int32)
+        grid.renumber_nodes(new_ids)
+        grid.coordinates = np.array([(n.x, n.y) for n in grid.Nodes], dtype=np.float64).reshape(-1, 2)
+    else:
+        # Other algorithms append the new nodes, only they get ids.
+        added = grid.Nodes[len(existing):]
+        with stats.phase('init_ids', len(added)):
+            for i, n in enumerate(added, len(existing)):
+                n.Id = i
+
+        new_ids = np.arange(len(existing), dtype=np.int32)
+        grid.coordinates = np.concatenate((grid.coordinates, np.array([(n.x, n.y) for n in added],
+                                                                      dtype=np.float64).reshape(-1, 2)))
 
+    return [np.array([n.Id for n in zone], dtype=np.int32) for zone in zones], new_ids
 
-def set_faces(grid, nodes, faces):
+
+def set_faces(grid, nodes, faces, zones, stats=None):
     """
-    Link faces and nodes according to the connectivity list.
+    Add faces to grid.face_nodes according to the connectivity lists of the zones.
 
     1 2 3  -> Face 1
     2 3 4  -> Face 2
 
-    Also, edges are created and linked basing on their presence in grid.Edge.
+    Then edges of all faces are created at once by `Grid.build_edges`.
 
     :param grid: Grid object.
-    :param nodes: list : nodes to link.
-    :param faces: list : faces to link.
-    """
-    for f in faces:
-        n1 = nodes[f.nodes_ids[0] - 1]
-        n2 = nodes[f.nodes_ids[1] - 1]
-        n3 = nodes[f.nodes_ids[2] - 1]
-
-        # Link face and nodes.
-        Grid.link_face_and_node(f, n1)
-        Grid.link_face_and_node(f, n2)
-        Grid.link_face_and_node(f, n3)
-
-        # Link faces, nodes and edges.
-        e = grid.is_edge_present(n1, n2)
-        if e is None:
-            e = Edge()
-            grid.link_face_and_edge(f, e)
-            grid.link_node_and_edge(n1, e)
-            grid.link_node_and_edge(n2, e)
-            grid.Edges.append(e)
-        else:
-            grid.link_face_and_edge(f, e)
-
-        e = grid.is_edge_present(n2, n3)
-        if e is None:
-            e = Edge()
-            grid.link_face_and_edge(f, e)
-            grid.link_node_and_edge(n2, e)
-            grid.link_node_and_edge(n3, e)
-            grid.Edges.append(e)
-        else:
-            grid.link_face_and_edge(f, e)
-
-        e = grid.is_edge_present(n3, n1)
-        if e is None:
-            e = Edge()
-            grid.link_face_and_edge(f, e)
-            grid.link_node_and_edge(n3, e)
-            grid.link_node_and_edge(n1, e)
-            grid.Edges.append(e)
-        else:
-            grid.link_face_and_edge(f, e)
+    :param nodes: list of arrays: ids of each zone's nodes in grid.coordinates.
+    :param faces: list of (f, 3) arrays of 0-based zone-local ids of faces' nodes.
+    :param zones: list of Zone objects to fill with ids of their nodes and faces.
+    :param stats: Stats object to time the building of edges.
+    """
+    face_nodes = [np.empty((0, 3), dtype=np.int32) if grid.face_nodes is None else grid.face_nodes]
+    count = len(face_nodes[0])
+
+    for remap, f, z in zip(nodes, faces, zones):
+        face_nodes.append(remap[f])
+
+        z.node_ids = remap
+        z.face_ids = np.arange(count, count + len(f), dtype=np.int32)
+        count += len(f)
+
+    grid.face_nodes = np.concatenate(face_nodes)
+
+    with (stats or NULL_STATS).phase('build_edges', len(grid.face_nodes)):
+        grid.build_edges()
 
 
 def parce_nodes_and_faces(lines):
@@ -281,64 +643,124 @@ def number_of_faces(line):
     return int(line[line.find('ELEMENTS =') + 10: len(line)])
 
 
-def print_tecplot_header(filename):
+def print_tecplot_header(f):
     """
     Write tecplot header containing the information
     about Title and number of variables.
 
-    :param filename: file to write in.
+    :param f: text file object to write in.
     """
-    with open(filename, 'w') as f:
-        f.write('TITLE = "GRID"\n')
-        f.write('VARIABLES = "X", "Y"\n')
+    f.write('TITLE = "GRID"\n')
+    f.write('VARIABLES = "X", "Y"\n')
 
 
-def print_zone_header(filename, zone_name, nodes, faces):
+def print_zone_header(f, zone_name, coordinates, face_nodes):
     """
     Write information about zone into the file.
 
-    :param filename: file to write in.
+    :param f: text file object to write in.
     :param zone_name: name of the zone.
-    :param nodes: nodes.
-    :param faces: faces.
+    :param coordinates: (N, 2) array of nodes' coordinates.
+    :param face_nodes: (F, 3) array of faces' nodes.
     """
-    with open(filename, 'a+') as f:
-        f.write('ZONE T = "{}"\n'.format(zone_name))
-        f.write('NODES = {}\n'.format((len(nodes))))
-        f.write('ELEMENTS = {}\n'.format((len(faces))))
-        f.write('DATAPACKING = BLOCK\n')
-        f.write('ZONETYPE = FETRIANGLE\n')
+    print_zone_sizes(f, zone_name, len(coordinates), len(face_nodes))
 
 
-def print_variables(filename, nodes):
+def print_zone_sizes(f, zone_name, nodes, elements):
     """
-    Write variables values in tecplot file.
+    Write information about zone of the given size into the file.
 
-    :param filename: file to write in.
-    :param nodes: nodes containing values.
+    :param f: text file object to write in.
+    :param zone_name: name of the zone.
+    :param nodes: number of nodes.
+    :param elements: number of faces.
     """
-    with open(filename, 'a+') as f:
-        # Variables' values.
-        for node in nodes:
-            f.write(str(node.x) + ' ')
+    f.write('ZONE T = "{}"\n'.format(zone_name))
+    f.write('NODES = {}\n'.format(nodes))
+    f.write('ELEMENTS = {}\n'.format(elements))
+    f.write('DATAPACKING = BLOCK\n')
+    f.write('ZONETYPE = FETRIANGLE\n')
 
-        f.write('\n')
 
-        for node in nodes:
-            f.write(str(node.y) + ' ')
+def print_variables(f, coordinates):
+    """
+    Write variables values in tecplot file.
+
+    Each variable is written in one line, a space follows each value.
+
+    :param f: text file object to write in.
+    :param coordinates: (N, 2) array of nodes' coordinates.
+    """
+    # Variables' values.
+    for k in range(2):
+        write_chunks(f, format_values, coordinates[:, k])
         f.write('\n')
 
 
-def print_connectivity_list(filename, nodes, faces):
+def print_connectivity_list(f, face_nodes):
     """
     Write tecplot connectivity list.
 
-    :param filename: file to write in.
-    :param faces: faces with nodes.
+    Each face is written in one line, a space follows each node's id.
+
+    :param f: text file object to write in.
+    :param face_nodes: (F, 3) array of 0-based ids of faces' nodes.
     """
-    with open(filename, 'a+') as f:
-        # Connectivity list.
-        for face in faces:
-            for node in face.nodes:
-                f.write(str(nodes.index(node) + 1) + ' ')
-            f.write('\n')
+    # Connectivity list.
+    write_chunks(f, format_connectivity, face_nodes)
+
+
+def write_chunks(f, formatter, array):
+    """
+    Format the array by chunks and write them.
+
+    PipelinedWriter formats the chunks in its workers.
+
+    :param f: text file object or PipelinedWriter to write in.
+    :param formatter: format_values or format_connectivity.
+    :param array: array to format.
+    """
+    if isinstance(f, PipelinedWriter):
+        for start in range(0, len(array), CHUNK):
+            f.submit(format_chunk, formatter, array[start: start + CHUNK])
+    else:
+        for chunk in formatter(array):
+            f.write(chunk)
+
+
+def format_chunk(formatter, array):
+    """
+    Format the array as a single string.
+
+    :param formatter: format_values or format_connectivity.
+    :param array: array to format.
+    :return: str.
+    """
+    return ''.join(formatter(array))
+
+
+def format_values(values):
+    """
+    Format values for the block of a variable by chunks.
+
+    Values are formatted like str(float) does, so the output does not
+    depend on the way it is produced.
+
+    :param values: array of values.
+    :return: generator of strings.
+    """
+    for start in range(0, len(values), CHUNK):
+        chunk = values[start: start + CHUNK].tolist()
+        yield ('%r ' * len(chunk)) % tuple(chunk)
+
+
+def format_connectivity(face_nodes):
+    """
+    Format connectivity list by chunks.
+
+    :param face_nodes: (F, 3) array of 0-based ids of faces' nodes.
+    :return: generator of strings.
+    """
+    for start in range(0, len(face_nodes), CHUNK):
+        chunk = (face_nodes[start: start + CHUNK] + 1).ravel().tolist()
+        yield ('%d %d %d \n' * (len(chunk) // 3)) % tuple(chunk)
@@ -4,6 +4,42 @@
 class Zone:
     __doc__ = 'Class describing grid zone'
 
+    __slots__ = ('grid', 'node_ids', 'face_ids', '_nodes', '_faces')
+
     def __init__(self):
-        self.Nodes = None
-        self.Faces = None
+        # Grid the zone belongs to.
+        self.grid = None
+
+        # Ids of the zone's nodes and faces in the grid's tables.
+        # The position of a node in `node_ids` is its id inside the zone.
+        self.node_ids = None
+        self.face_ids = None
+
+        self._nodes = None
+        self._faces = None
+
+    @property
+    def Nodes(self):
+        """
+        List of zone's nodes created from the grid's tables on first access.
+        """
+        if self._nodes is None and self.grid is not None and self.node_ids is not None:
+            self.grid.build_objects()
+        return self._nodes
+
+    @Nodes.setter
+    def Nodes(self, nodes):
+        self._nodes = nodes
+
+    @property
+    def Faces(self):
+        """
+        List of zone's faces created from the grid's tables on first access.
+        """
+        if self._faces is None and self.grid is not None and self.face_ids is not None:
+            self.grid.build_objects()
+        return self._faces
+
+    @Faces.setter
+    def Faces(self, faces):
+        self._faces = faces
@@ -0,0 +1,304 @@
+"""
+Module provides lazy reading of the zones of tecplot files.
+
+    f = open_tecplot('name.dat')
+    len(f.zones), f.zones[2].name, f.zones[2].nodes
+    coordinates = f.zones[2].coordinates
+    grid = f.merge(zones=f.zones.named('wing*'))
+
+The file is scanned once for the positions and headers of its zones, see
+`reader.read_zone_headers` and `plt.plt_zone_offsets`. A zone seeks to its
+position and is parced when its data is accessed first, `merge` reads and
+merges only the given zones.
+
+The indexes of the last INDEX_COUNT files opened are kept for the process
+and, if the cache directory is given, in the cache, see `cache`. It is used while the file keeps its size
+and modification time, so the file opened again is not scanned.
+"""
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatchcase
+from itertools import repeat
+
+from . import cache
+from .compression import compression
+from .grid import Grid
+from .plt import plt_zone_offsets, read_plt_zone
+from .reader import read_zone_headers, read_zone
+from .stats import NULL_STATS
+from .tecplot import file_format, merge_zones, ALGORITHMS
+
+logger = logging.getLogger(__name__)
+
+# Indexes of files opened by the process, least recently used first:
+# (real path, format, size, modification time) -> index.
+INDEXES = OrderedDict()
+
+# Number of indexes kept for the process.
+INDEX_COUNT = 64
+
+
+def open_tecplot(filename, format=None, cache_dir=None, cache_size=cache.CACHE_SIZE):
+    """
+    Open tecplot file for lazy reading of its zones.
+
+    :param filename: file to read from.
+    :param format: 'dat' for ASCII or 'plt' for binary tecplot format.
+    Chosen by the extension of the file if not given.
+    :param cache_dir: directory of the cache to keep the index of zones in between processes.
+    Errors of the cache are logged and the file is scanned as if there was no cache.
+    :param cache_size: bound of the total size of entries in cache_dir in bytes.
+    :return: TecplotFile object.
+    """
+    format = file_format(filename, format)
+    return TecplotFile(filename, format, zone_index(filename, format, cache_dir, cache_size))
+
+
+def zone_index(filename, format, cache_dir=None, cache_size=cache.CACHE_SIZE):
+    """
+    Index of zones of the file, scanned if it is not cached.
+
+    :param filename: tecplot file.
+    :param format: 'dat' or 'plt'.
+    :param cache_dir: directory of the cache, or None.
+    :param cache_size: bound of the total size of entries in cache_dir in bytes.
+    :return: dict with the number of variables, positions and headers of zones.
+    """
+    st = os.stat(filename)
+    key = (os.path.realpath(filename), format, st.st_size, st.st_mtime_ns)
+
+    if key in INDEXES:
+        INDEXES.move_to_end(key)
+        return INDEXES[key]
+
+    # Indexes of the file before it changed.
+    for old in [old for old in INDEXES if old[:2] == key[:2]]:
+        del INDEXES[old]
+
+    entry = None
+    index = None
+    if cache_dir is not None:
+        entry = cache.index_path(cache_dir, filename, format)
+        try:
+            index = cache.load_index(entry, filename)
+        except Exception as e:
+            logger.warning('Cache entry %s of %s is not loaded: %s', entry, filename, e)
+
+    if index is None:
+        if format == 'plt':
+            variables, offsets, headers = plt_zone_offsets(filename)
+        else:
+            variables, offsets, headers = read_zone_headers(filename)
+        index = {'variables': variables, 'offsets': offsets, 'headers': headers}
+
+        if entry is not None:
+            try:
+                cache.store_index(entry, filename, index, cache_size)
+            except Exception as e:
+                logger.warning('Index of %s is not stored in the cache %s: %s', filename, cache_dir, e)
+
+    INDEXES[key] = index
+    while len(INDEXES) > INDEX_COUNT:
+        INDEXES.popitem(last=False)
+    return index
+
+
+def read_zone_at(filename, format, offset, header, variables):
+    """
+    Read the zone at the given position of the file.
+
+    :return: tuple (ndarray (N, 2), ndarray (E, 3)): coordinates of nodes
+    and 0-based connectivity list.
+    """
+    if format == 'plt':
+        return read_plt_zone(filename, offset, header, variables)[1:]
+    return read_zone(filename, offset, variables)[1:]
+
+
+class TecplotFile:
+    __doc__ = "Tecplot file with the index of its zones, see `open_tecplot`."
+
+    def __init__(self, filename, format, index):
+        """
+        :param filename: tecplot file.
+        :param format: 'dat' or 'plt'.
+        :param index: dict of `zone_index`.
+        """
+        self.filename = filename
+        self.format = format
+        self.variables = index['variables']
+        self.offsets = index['offsets']
+        self.headers = index['headers']
+        self.zones = ZoneList(self)
+
+    def read_zone(self, k):
+        """
+        Read the zone k of the file.
+
+        :param k: position of the zone in the file.
+        :return: tuple (ndarray (N, 2), ndarray (E, 3)): coordinates of nodes
+        and 0-based connectivity list.
+        """
+        return read_zone_at(self.filename, self.format, self.offsets[k], self.headers[k], self.variables)
+
+    def zone_ids(self, zones):
+        """
+        Positions of the zones in the file.
+
+        :param zones: list of LazyZone objects, positions of zones or names of zones.
+        A name stands for all zones having it.
+        :return: list of int.
+        """
+        ids = list()
+        for zone in zones:
+            if isinstance(zone, LazyZone):
+                ids.append(zone.index)
+            elif isinstance(zone, str):
+                named = [k for k, header in enumerate(self.headers) if header['T'] == zone]
+                if not named:
+                    raise Exception('No zone named "{}" in {}'.format(zone, self.filename))
+                ids += named
+            else:
+                ids.append(range(len(self.headers))[zone])
+        return ids
+
+    def merge(self, zones=None, algorithm='dichotomy_2_sided', grid=None, workers=None, stats=None):
+        """
+        Read the zones and merge them into the grid like `read_tecplot` does.
+
+        Only the given zones are parced and merged, in the given order.
+
+        :param zones: list of LazyZone objects, positions or names of zones. All zones if not given.
+        :param algorithm: algorithm to merge nodes, see `read_tecplot`.
+        :param grid: Grid object to merge the zones into. A new grid if not given.
+        :param workers: number of processes to parce zones in parallel. Compressed files are
+        parced by one process.
+        :param stats: Stats object to time the phases and count the merge, see `stats`.
+        :return: Grid object.
+        """
+        if algorithm not in ALGORITHMS:
+            raise Exception('Wrong name for algorithm')
+
+        if stats is None:
+            stats = NULL_STATS
+        if grid is None:
+            grid = Grid()
+
+        ids = list(range(len(self.headers))) if zones is None else self.zone_ids(zones)
+
+        with stats.phase('read'):
+            args = (repeat(self.filename), repeat(self.format), [self.offsets[k] for k in ids],
+                    [self.headers[k] for k in ids], repeat(self.variables))
+
+            if workers is None or workers < 2 or len(ids) < 2 or compression(self.filename) is not None:
+                data = list(stats.timed('parse', map(read_zone_at, *args), lambda zone: len(zone[0])))
+            else:
+                with ProcessPoolExecutor(min(workers, len(ids))) as pool:
+                    data = list(stats.timed('parse', pool.map(read_zone_at, *args), lambda zone: len(zone[0])))
+
+            merge_zones(grid, [d[0] for d in data], [d[1] for d in data], algorithm, stats)
+
+        return grid
+
+
+class ZoneList:
+    __doc__ = "Lazy sequence of zones of tecplot file."
+
+    def __init__(self, file):
+        """
+        :param file: TecplotFile object.
+        """
+        self.file = file
+
+    def __len__(self):
+        return len(self.file.headers)
+
+    def __getitem__(self, k):
+        """
+        Zone at the position k, or list of zones for a slice. Zones are not read here.
+        """
+        if isinstance(k, slice):
+            return [LazyZone(self.file, i) for i in range(len(self))[k]]
+        return LazyZone(self.file, range(len(self))[k])
+
+    def __iter__(self):
+        return (LazyZone(self.file, k) for k in range(len(self)))
+
+    def named(self, pattern):
+        """
+        Zones whose names match the pattern.
+
+        :param pattern: name of zones, may have shell wildcards * ? [...].
+        :return: list of LazyZone objects.
+        """
+        return [zone for zone in self if fnmatchcase(zone.name, pattern)]
+
+
+class LazyZone:
+    __doc__ = "Zone of tecplot file read when its coordinates or connectivity list are accessed first."
+
+    __slots__ = ('file', 'index', '_data')
+
+    def __init__(self, file, index):
+        """
+        :param file: TecplotFile object.
+        :param index: position of the zone in the file.
+        """
+        self.file = file
+        self.index = index
+        self._data = None
+
+    @property
+    def header(self):
+        """
+        dict: zone header with the keys T, NODES, ELEMENTS...
+        """
+        return self.file.headers[self.index]
+
+    @property
+    def name(self):
+        return self.header['T']
+
+    @property
+    def nodes(self):
+        """
+        Number of nodes.
+        """
+        return self.header['NODES']
+
+    @property
+    def elements(self):
+        """
+        Number of faces.
+        """
+        return self.header['ELEMENTS']
+
+    def read(self):
+        """
+        Read the zone once.
+
+        :return: tuple (ndarray (N, 2), ndarray (E, 3)): coordinates of nodes
+        and 0-based connectivity list.
+        """
+        if self._data is None:
+            self._data = self.file.read_zone(self.index)
+        return self._data
+
+    @property
+    def coordinates(self):
+        """
+        (N, 2) array of coordinates of nodes.
+        """
+        return self.read()[0]
+
+    @property
+    def face_nodes(self):
+        """
+        (E, 3) array of 0-based ids of faces' nodes.
+        """
+        return self.read()[1]
+
+    def __repr__(self):
+        return 'LazyZone({}, "{}", nodes={}, elements={})'.format(self.index, self.name, self.nodes, self.elements)